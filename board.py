@@ -0,0 +1,286 @@
+"""
+Compact N x N board backed by one flat byte buffer.
+
+A list-of-lists board costs N + 1 list objects (about 7 KB for 25x25); a
+`Grid` holds the N*N cells row-major in a single `bytes`/`bytearray`
+(cell = r * N + c, 0 = empty), under 1 KB for 25x25. It offers:
+- O(1) copy-on-write clones: clones share the buffer until one of them is
+  written to, and a Grid built on an immutable `bytes` (e.g. the flat
+  puzzles of pipeline.iter_puzzles) never copies it before the first write,
+- zero-copy row/column/box views and `array()` (NumPy views of the buffer),
+- `grid[r][c]` reads and writes, `len(grid)` and iteration over rows, so the
+  solvers written against lists of rows accept it unchanged (reads never
+  copy the buffer, the first write does; `grid[r]` is a short-lived view,
+  no row objects are kept); `as_rows` is the adapter for code that needs
+  real lists,
+- the buffer protocol (`memoryview(grid)` on Python 3.12+, `grid.buffer()`
+  before) and `__array__`, so `np.asarray(grid)` and the validator work.
+  Writable views (`buffer(True)`, `array(True)`) alias the grid's own
+  buffer: a clone taken while one may be alive gets a private copy.
+
+Solver modules declaring `GRID_INPUT = True` get a Grid from the pipeline
+instead of a fresh list of lists (solver_input).
+
+    python board.py   # memory and copy cost per board against lists of lists
+"""
+
+import copy
+import math
+import sys
+import timeit
+
+import numpy as np
+
+
+class _Row:
+    """Row of a Grid: reads go to the current buffer, writes go through Grid._own."""
+
+    __slots__ = ("_grid", "_start", "_n")
+
+    def __init__(self, grid, start, n):
+        self._grid = grid
+        self._start = start
+        self._n = n
+
+    def __len__(self):
+        return self._n
+
+    def _index(self, c):
+        if c < 0:
+            c += self._n
+        if not 0 <= c < self._n:
+            raise IndexError("column index out of range")
+        return self._start + c
+
+    def __getitem__(self, c):
+        if type(c) is int and 0 <= c < self._n:
+            return self._grid._cells[self._start + c]
+        if isinstance(c, slice):
+            return list(self)[c]
+        return self._grid._cells[self._index(c)]
+
+    def __setitem__(self, c, value):
+        self._grid._own()[self._index(c)] = value
+
+    def __iter__(self):
+        return iter(self._grid._cells[self._start : self._start + self._n])
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
+    def __repr__(self):
+        return repr(list(self))
+
+
+class Grid:
+    """N x N board over a flat buffer of N*N cells (see the module docstring)."""
+
+    __slots__ = ("n", "_cells", "_owned", "_exported")
+
+    def __init__(self, cells, n=None):
+        if n is None:
+            n = math.isqrt(len(cells))
+        if len(cells) != n * n:
+            raise ValueError(f"Expected {n * n} cells, got {len(cells)}")
+        self.n = n
+        self._exported = False
+        if isinstance(cells, bytes):
+            # Immutable: shared until the first write
+            self._cells = cells
+            self._owned = False
+        else:
+            self._cells = bytearray(cells)
+            self._owned = True
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Builds a Grid from a list of rows (or any N x N nested sequence)."""
+        return cls(bytes(cell for row in rows for cell in row), len(rows))
+
+    # --- Copy-on-write ---
+
+    def _own(self):
+        if not self._owned:
+            self._cells = bytearray(self._cells)
+            self._owned = True
+        return self._cells
+
+    def clone(self):
+        """
+        O(1) copy: both grids share the buffer until one of them is written
+        to. Once a writable view of this grid has been handed out, the
+        clone gets its own copy instead (the view keeps writing here).
+        """
+        other = Grid.__new__(Grid)
+        other.n = self.n
+        other._exported = False
+        if self._exported:
+            other._cells = bytes(self._cells)
+        else:
+            other._cells = self._cells
+            self._owned = False
+        other._owned = False
+        return other
+
+    __copy__ = clone
+
+    def __deepcopy__(self, memo):
+        return self.clone()
+
+    def __reduce__(self):
+        return (Grid, (bytes(self._cells), self.n))
+
+    # --- Cell access ---
+
+    def __len__(self):
+        return self.n
+
+    def __getitem__(self, key):
+        """grid[r] is a row (read and written as grid[r][c]), grid[r, c] a cell value."""
+        n = self.n
+        if isinstance(key, tuple):
+            r, c = key
+            return self._cells[r * n + c]
+        if not -n <= key < n:
+            raise IndexError("row index out of range")
+        # Short-lived view: the grid keeps no per-row objects
+        return _Row(self, key % n * n, n)
+
+    def __setitem__(self, key, value):
+        n = self.n
+        if isinstance(key, tuple):
+            r, c = key
+            self._own()[r * n + c] = value
+        else:
+            if not -n <= key < n:
+                raise IndexError("row index out of range")
+            r = key % n
+            self._own()[r * n : (r + 1) * n] = bytes(value)
+
+    def __iter__(self):
+        # Read-only rows: iterating does not force a private copy
+        view = memoryview(self._cells).toreadonly()
+        n = self.n
+        for r in range(n):
+            yield view[r * n : (r + 1) * n]
+
+    def __eq__(self, other):
+        if isinstance(other, Grid):
+            return self.n == other.n and self._cells == other._cells
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"Grid(n={self.n}, {bytes(self._cells)!r})"
+
+    # --- Views and interop ---
+
+    def tobytes(self):
+        return bytes(self._cells)
+
+    def buffer(self, writable=False):
+        """memoryview of the N*N cells (a writable one takes ownership first)."""
+        if writable:
+            self._exported = True
+            return memoryview(self._own())
+        return memoryview(self._cells).toreadonly()
+
+    def __buffer__(self, flags):
+        # Python 3.12+ buffer protocol: memoryview(grid), np.frombuffer(grid)...
+        return self.buffer(bool(flags & 1))
+
+    def array(self, writable=False):
+        """(N, N) uint8 NumPy view of the buffer (no copy)."""
+        return np.frombuffer(self.buffer(writable), dtype=np.uint8).reshape(self.n, self.n)
+
+    def __array__(self, dtype=None, copy=None):
+        arr = self.array()
+        if dtype is not None and arr.dtype != dtype:
+            return arr.astype(dtype)
+        return arr.copy() if copy else arr
+
+    def row(self, r):
+        return self.array()[r]
+
+    def col(self, c):
+        return self.array()[:, c]
+
+    def box(self, b):
+        m = math.isqrt(self.n)
+        br, bc = divmod(b, m)
+        return self.array()[br * m : (br + 1) * m, bc * m : (bc + 1) * m]
+
+    def to_rows(self):
+        n, cells = self.n, self._cells
+        return [list(cells[r * n : (r + 1) * n]) for r in range(n)]
+
+    def nbytes(self):
+        """Memory held by this board (object + buffer; a shared buffer is counted in full)."""
+        return sys.getsizeof(self) + sys.getsizeof(self._cells)
+
+
+def as_rows(grid):
+    """Adapter: a list of rows from a Grid, a list of rows or a flat N*N sequence."""
+    if isinstance(grid, Grid):
+        return grid.to_rows()
+    if grid and isinstance(grid[0], (list, tuple)):
+        return [list(row) for row in grid]
+    n = math.isqrt(len(grid))
+    return [list(grid[r * n : (r + 1) * n]) for r in range(n)]
+
+
+def solver_input(module, flat, n):
+    """
+    Input grid for `module.solve` from an immutable flat puzzle: a Grid
+    sharing `flat` (copied on the solver's first write) for modules
+    declaring GRID_INPUT, otherwise a fresh list of rows.
+    """
+    if getattr(module, "GRID_INPUT", False):
+        return Grid(bytes(flat), n)
+    return [list(flat[r * n : (r + 1) * n]) for r in range(n)]
+
+
+# --- Memory / copy report ---
+
+
+def _rows_nbytes(rows):
+    # Cell values <= 64 are cached small ints: only the lists count
+    return sys.getsizeof(rows) + sum(sys.getsizeof(row) for row in rows)
+
+
+def compare_representations(sizes=(9, 16, 25, 36), number=2000):
+    """Per-board memory and copy cost of lists of rows against Grid. Returns {n: {...}}."""
+    report = {}
+    for n in sizes:
+        flat = bytes((r * n + c) % n + 1 for r in range(n) for c in range(n))
+        rows = as_rows(flat)
+        grid = Grid(flat, n)
+        report[n] = {
+            "rows_bytes": _rows_nbytes(rows),
+            "grid_bytes": grid.nbytes(),
+            "deepcopy": timeit.timeit(lambda: copy.deepcopy(rows), number=number // 10) / (number // 10),
+            "to_rows": timeit.timeit(lambda: as_rows(flat), number=number) / number,
+            "clone": timeit.timeit(grid.clone, number=number) / number,
+        }
+    return report
+
+
+def print_representation_report(report):
+    print("\n" + "=" * 90)
+    print(
+        f"{'N':<4} | {'ROWS (B)':<9} | {'GRID (B)':<9} | {'RATIO':<6} | "
+        f"{'DEEPCOPY (us)':<13} | {'FLAT->ROWS (us)':<15} | {'CLONE (us)':<10}"
+    )
+    print("=" * 90)
+    for n, data in report.items():
+        print(
+            f"{n:<4} | {data['rows_bytes']:<9} | {data['grid_bytes']:<9} | "
+            f"{data['rows_bytes'] / data['grid_bytes']:<6.1f} | {data['deepcopy'] * 1e6:<13.2f} | "
+            f"{data['to_rows'] * 1e6:<15.2f} | {data['clone'] * 1e6:<10.3f}"
+        )
+    print("=" * 90)
+
+
+if __name__ == "__main__":
+    print_representation_report(compare_representations())
@@ -0,0 +1,311 @@
+"""
+Packed binary Sudoku dataset format.
+
+Layout (little endian):
+
+    offset  size  field
+    0       4     magic b"SDKP"
+    4       1     format version (1)
+    5       1     N (grid side)
+    6       2     reserved (0)
+    8       8     number of puzzles
+    16      ...   puzzles, N*N bytes each (row-major, 1 byte per cell, 0 = empty)
+
+Every puzzle has the same fixed width, so puzzle `i` lives at
+HEADER_SIZE + i * N * N and the file can be memory-mapped and sliced
+without parsing.
+"""
+
+import argparse
+import glob
+import math
+import mmap
+import os
+import struct
+
+import numpy as np
+
+import board
+
+MAGIC = b"SDKP"
+VERSION = 1
+HEADER = struct.Struct("<4sBBHQ")
+HEADER_SIZE = HEADER.size
+EXTENSION = ".sdkp"
+
+# Alphabet of the one-line text format: '1'..'9' then 'A'..'Z' (base 36).
+# '0' and '.' mean an empty cell.
+_EMPTY_CHARS = "0."
+
+
+# --- Writing ---
+
+
+class PackedWriter:
+    """
+    Streams puzzles into a packed dataset file.
+    The puzzle count in the header is patched when the writer is closed,
+    so the number of puzzles does not need to be known in advance.
+    """
+
+    def __init__(self, path, n):
+        if not 1 <= n <= 255:
+            raise ValueError(f"Grid size {n} does not fit in 1 byte per cell")
+        self.path = path
+        self.n = n
+        self.count = 0
+        self._file = open(path, "wb")
+        self._file.write(HEADER.pack(MAGIC, VERSION, n, 0, 0))
+
+    def write(self, grid):
+        """Appends one grid (list of rows, flat sequence or bytes of N*N cells)."""
+        data = flatten(grid)
+        if len(data) != self.n * self.n:
+            raise ValueError(f"Expected {self.n * self.n} cells, got {len(data)}")
+        self._file.write(data)
+        self.count += 1
+
+    def close(self):
+        if self._file.closed:
+            return
+        self._file.seek(0)
+        self._file.write(HEADER.pack(MAGIC, VERSION, self.n, 0, self.count))
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def flatten(grid):
+    """Returns the N*N cells of a grid (list of rows, board.Grid or flat sequence) as bytes."""
+    if isinstance(grid, (bytes, bytearray, memoryview)):
+        return bytes(grid)
+    if isinstance(grid, board.Grid):
+        return grid.tobytes()
+    if grid and isinstance(grid[0], (list, tuple)):
+        return b"".join(map(bytes, grid))
+    return bytes(grid)
+
+
+def write_packed(path, grids, n=None):
+    """Writes an iterable of grids to `path`. Returns the number of puzzles written."""
+    grids = iter(grids)
+    first = None
+    if n is None:
+        first = next(grids, None)
+        if first is None:
+            raise ValueError("Cannot infer N from an empty iterable")
+        first = flatten(first)
+        n = math.isqrt(len(first))
+    with PackedWriter(path, n) as writer:
+        if first is not None:
+            writer.write(first)
+        for grid in grids:
+            writer.write(grid)
+        return writer.count
+
+
+def pack(grids, n):
+    """In-memory packed dataset (same layout as the file) of the given grids, as bytes."""
+    body = b"".join(flatten(grid) for grid in grids)
+    if len(body) % (n * n):
+        raise ValueError(f"Grids do not all have {n * n} cells")
+    return HEADER.pack(MAGIC, VERSION, n, 0, len(body) // (n * n)) + body
+
+
+# --- Reading ---
+
+
+def unpack(data):
+    """Parses an in-memory packed dataset. Returns (n, [flat bytes of each puzzle])."""
+    if len(data) < HEADER_SIZE:
+        raise ValueError("Truncated header")
+    magic, version, n, _, count = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("Not a packed Sudoku dataset")
+    if version != VERSION:
+        raise ValueError(f"Unsupported format version {version}")
+    cells = n * n
+    if len(data) < HEADER_SIZE + count * cells:
+        raise ValueError(f"Truncated data ({count} puzzles expected)")
+    data = bytes(data)
+    return n, [data[HEADER_SIZE + i * cells : HEADER_SIZE + (i + 1) * cells] for i in range(count)]
+
+
+class PackedDataset:
+    """
+    Memory-mapped reader for a packed dataset.
+
+    - `len(ds)` is the number of puzzles.
+    - `ds[i]` returns the puzzle as a list of lists (a fresh, writable copy).
+    - `ds.view(start, stop)` returns a zero-copy read-only NumPy view of
+      shape (count, N, N) and dtype uint8.
+    - `ds.raw(i)` returns a zero-copy memoryview of the N*N bytes of puzzle i.
+    - Iterating streams the puzzles one by one; only the touched pages are read.
+
+    Views and memoryviews borrow the mapping: drop them before calling close().
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            header = self._file.read(HEADER_SIZE)
+            if len(header) != HEADER_SIZE:
+                raise ValueError(f"{path}: truncated header")
+            magic, version, n, _, count = HEADER.unpack(header)
+            if magic != MAGIC:
+                raise ValueError(f"{path}: not a packed Sudoku dataset")
+            if version != VERSION:
+                raise ValueError(f"{path}: unsupported format version {version}")
+            self.n = n
+            self.cells = n * n
+            self.count = count
+            expected = HEADER_SIZE + count * self.cells
+            if os.fstat(self._file.fileno()).st_size < expected:
+                raise ValueError(f"{path}: truncated data ({count} puzzles expected)")
+            self._mmap = (
+                mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+                if count
+                else None
+            )
+        except Exception:
+            self._file.close()
+            raise
+        self._buffer = memoryview(self._mmap) if self._mmap is not None else memoryview(b"")
+
+    def __len__(self):
+        return self.count
+
+    def _offset(self, index):
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError(f"Puzzle index {index} out of range")
+        return HEADER_SIZE + index * self.cells
+
+    def raw(self, index):
+        """Zero-copy memoryview of the flat cells of puzzle `index`."""
+        offset = self._offset(index)
+        return self._buffer[offset : offset + self.cells]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self.count))]
+        flat = self.raw(index)
+        n = self.n
+        return [list(flat[r * n : (r + 1) * n]) for r in range(n)]
+
+    def view(self, start=0, stop=None):
+        """Zero-copy NumPy view (count, N, N) of puzzles [start, stop)."""
+        start, stop, _ = slice(start, stop).indices(self.count)
+        stop = max(start, stop)
+        if start == stop:
+            return np.empty((0, self.n, self.n), dtype=np.uint8)
+        return np.frombuffer(
+            self._buffer,
+            dtype=np.uint8,
+            count=(stop - start) * self.cells,
+            offset=HEADER_SIZE + start * self.cells,
+        ).reshape(stop - start, self.n, self.n)
+
+    def __iter__(self):
+        for i in range(self.count):
+            yield self[i]
+
+    def close(self):
+        self._buffer.release()
+        if self._mmap is not None:
+            self._mmap.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# --- Converters ---
+
+
+def read_text_grid(file_path):
+    """Parses a grid from the `sudokus/` text layout (whitespace separated numbers)."""
+    grid = []
+    with open(file_path, "r") as f:
+        for line in f:
+            row = [int(tok) for tok in line.replace(".", "0").split()]
+            if row:
+                grid.append(row)
+    return grid
+
+
+def parse_line(line):
+    """
+    Parses a one-line puzzle (e.g. the common 81-char format).
+    Empty cells are '0' or '.'; values above 9 use letters (A=10, B=11, ...).
+    Returns a flat list of N*N ints, or None for blank/comment lines.
+    """
+    line = line.strip()
+    if not line or line.startswith("#"):
+        return None
+    n = math.isqrt(len(line))
+    if n * n != len(line):
+        raise ValueError(f"Line of length {len(line)} is not a square grid")
+    return [0 if ch in _EMPTY_CHARS else int(ch, 36) for ch in line]
+
+
+def convert_lines(txt_path, out_path):
+    """Converts a one-line-per-puzzle text file into a packed dataset."""
+    with open(txt_path, "r") as f:
+        flats = (flat for flat in map(parse_line, f) if flat is not None)
+        return write_packed(out_path, flats)
+
+
+def convert_tree(base_path="sudokus", out_dir="sudokus_packed"):
+    """
+    Converts the `sudokus/<size>/*.txt` tree into one packed file per size
+    (`<out_dir>/<size>.sdkp`). Returns {size_label: count}.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    counts = {}
+    for size_label in sorted(os.listdir(base_path)):
+        current_dir = os.path.join(base_path, size_label)
+        if not os.path.isdir(current_dir):
+            continue
+        sudoku_files = sorted(glob.glob(os.path.join(current_dir, "*.txt")))
+        if not sudoku_files:
+            continue
+        out_path = os.path.join(out_dir, size_label + EXTENSION)
+        counts[size_label] = write_packed(out_path, map(read_text_grid, sudoku_files))
+    return counts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Packed Sudoku dataset tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_tree = sub.add_parser("convert-tree", help="Convert the sudokus/ tree")
+    p_tree.add_argument("base_path", nargs="?", default="sudokus")
+    p_tree.add_argument("out_dir", nargs="?", default="sudokus_packed")
+
+    p_lines = sub.add_parser("convert-lines", help="Convert a one-line-per-puzzle file")
+    p_lines.add_argument("txt_path")
+    p_lines.add_argument("out_path")
+
+    p_info = sub.add_parser("info", help="Show the header of a packed dataset")
+    p_info.add_argument("path")
+
+    args = parser.parse_args()
+    if args.command == "convert-tree":
+        for label, count in convert_tree(args.base_path, args.out_dir).items():
+            print(f"{label}: {count} puzzles -> {os.path.join(args.out_dir, label + EXTENSION)}")
+    elif args.command == "convert-lines":
+        count = convert_lines(args.txt_path, args.out_path)
+        print(f"{count} puzzles -> {args.out_path}")
+    else:
+        with PackedDataset(args.path) as ds:
+            print(f"{args.path}: N={ds.n}, puzzles={len(ds)}")
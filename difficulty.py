@@ -0,0 +1,257 @@
+"""
+Cheap puzzle difficulty analyser.
+
+For each puzzle it measures:
+- clues: number of given cells,
+- singles_ratio: fraction of the empty cells that naked + hidden singles
+  alone can fill,
+- nodes: search nodes a reference solver (singles propagation + MRV
+  branching) needs to reach the first solution,
+- branching: average number of candidates at the branching cells.
+
+Puzzles are then bucketed into tiers (see `tier`); puzzles with clashing
+clues or no solution get the separate INVALID tier. Profiles are cached in
+a JSON file per dataset under results/difficulty/, keyed by the puzzle
+content, so each puzzle is analysed only once.
+"""
+
+import json
+import math
+import os
+
+import dataset
+import geometry
+import presolve
+
+TIERS = ["easy", "medium", "hard", "extreme"]
+# Tier of puzzles that cannot be solved (kept out of TIERS, not a difficulty)
+INVALID = "invalid"
+
+# Reference search is cut off after this many nodes (the puzzle is "extreme")
+NODE_LIMIT = 2000
+
+CACHE_DIR = os.path.join("results", "difficulty")
+
+
+# --- Reference solver (candidate bitmasks) ---
+
+
+def _search(cands, units, peers, counters, pending=None):
+    counters["nodes"] += 1
+    if counters["nodes"] > NODE_LIMIT:
+        return None
+    if not presolve.propagate_singles(cands, units, peers, pending):
+        return None
+
+    # Minimum remaining values
+    best_cell, best_count = -1, 0
+    for cell, c in enumerate(cands):
+        if c & (c - 1):
+            count = bin(c).count("1")
+            if best_cell < 0 or count < best_count:
+                best_cell, best_count = cell, count
+                if count == 2:
+                    break
+    if best_cell < 0:
+        return cands
+
+    counters["branch_points"] += 1
+    counters["branch_total"] += best_count
+    c = cands[best_cell]
+    while c:
+        bit = c & -c
+        c ^= bit
+        child = list(cands)
+        child[best_cell] = bit
+        result = _search(child, units, peers, counters, (best_cell,))
+        if result is not None:
+            return result
+        if counters["nodes"] > NODE_LIMIT:
+            return None
+    return None
+
+
+def _count(cands, units, peers, limit, found, budget, pending=None):
+    budget[0] -= 1
+    if budget[0] < 0 or not presolve.propagate_singles(cands, units, peers, pending):
+        return found
+    best_cell, best_count = -1, 0
+    for cell, c in enumerate(cands):
+        if c & (c - 1):
+            count = bin(c).count("1")
+            if best_cell < 0 or count < best_count:
+                best_cell, best_count = cell, count
+                if count == 2:
+                    break
+    if best_cell < 0:
+        return found + 1
+
+    c = cands[best_cell]
+    while c and found < limit and budget[0] >= 0:
+        bit = c & -c
+        c ^= bit
+        child = list(cands)
+        child[best_cell] = bit
+        found = _count(child, units, peers, limit, found, budget, (best_cell,))
+    return found
+
+
+def count_solutions(grid, limit=2, node_limit=None):
+    """
+    Counts the solutions of a grid (list of rows or flat N*N cells), stopping
+    as soon as `limit` are found. count_solutions(grid, 2) == 1 means the
+    puzzle has a unique solution.
+
+    With `node_limit`, returns None if the search runs out of nodes before
+    the count is settled.
+    """
+    flat = dataset.flatten(grid)
+    n = math.isqrt(len(flat))
+    geo = geometry.get(n)
+    units, peers = geo.units, geo.peers
+    cands = presolve.initial_candidates(flat, n, peers)
+    if cands is None:
+        return 0
+    budget = [node_limit if node_limit is not None else float("inf")]
+    found = _count(cands, units, peers, limit, 0, budget)
+    if budget[0] < 0 and found < limit:
+        return None
+    return found
+
+
+# --- Profiling ---
+
+
+def profile(grid):
+    """Returns the difficulty profile (a dict) of a grid (list of rows or flat N*N cells)."""
+    flat = dataset.flatten(grid)
+    n = math.isqrt(len(flat))
+    geo = geometry.get(n)
+    units, peers = geo.units, geo.peers
+
+    clues = sum(1 for v in flat if v)
+    empty = n * n - clues
+    result = {
+        "n": n,
+        "clues": clues,
+        "singles_ratio": 0.0,
+        "nodes": 0,
+        "branching": 0.0,
+        "solvable": False,
+    }
+
+    cands = presolve.initial_candidates(flat, n, peers)
+    if cands is None:
+        result["tier"] = tier(result)
+        return result
+
+    singles = list(cands)
+    if presolve.propagate_singles(singles, units, peers):
+        fixed = sum(1 for c in singles if c and c & (c - 1) == 0)
+        result["singles_ratio"] = (fixed - clues) / empty if empty else 1.0
+
+    counters = {"nodes": 0, "branch_points": 0, "branch_total": 0}
+    solution = _search(cands, units, peers, counters)
+    result["nodes"] = counters["nodes"]
+    result["solvable"] = solution is not None
+    if counters["branch_points"]:
+        result["branching"] = counters["branch_total"] / counters["branch_points"]
+    result["tier"] = tier(result)
+    return result
+
+
+def quick_features(grid):
+    """
+    Cheap subset of the profile (no search): n, clues and singles_ratio.
+    Used where a full profile would cost more than solving the puzzle.
+    """
+    flat = dataset.flatten(grid)
+    n = math.isqrt(len(flat))
+    geo = geometry.get(n)
+    units, peers = geo.units, geo.peers
+    clues = sum(1 for v in flat if v)
+    empty = n * n - clues
+    features = {"n": n, "clues": clues, "singles_ratio": 0.0}
+    cands = presolve.initial_candidates(flat, n, peers)
+    if cands is not None and presolve.propagate_singles(cands, units, peers):
+        fixed = sum(1 for c in cands if c and c & (c - 1) == 0)
+        features["singles_ratio"] = (fixed - clues) / empty if empty else 1.0
+    return features
+
+
+def tier(p):
+    """Buckets a profile into one of TIERS, or INVALID."""
+    if p["nodes"] > NODE_LIMIT:
+        return "extreme"
+    if not p["solvable"]:
+        return INVALID
+    if p["singles_ratio"] >= 1.0:
+        return "easy"
+    if p["nodes"] <= 10:
+        return "medium"
+    if p["nodes"] <= 200:
+        return "hard"
+    return "extreme"
+
+
+# --- Cache under results/ ---
+
+
+def cache_path(source, cache_dir=CACHE_DIR):
+    """JSON cache file of a dataset (puzzle directory or file) inside `cache_dir`."""
+    name = os.path.normpath(source).strip(os.sep).replace(os.sep, "_")
+    return os.path.join(cache_dir, name + ".json")
+
+
+class DifficultyIndex:
+    """
+    Lazily computed, persisted difficulty profiles for one dataset.
+    Profiles are keyed by the puzzle content (hex of its N*N cells).
+    """
+
+    def __init__(self, source, cache_dir=CACHE_DIR):
+        self.path = cache_path(source, cache_dir)
+        self.profiles = {}
+        self._dirty = False
+        if os.path.exists(self.path):
+            with open(self.path, "r") as f:
+                self.profiles = json.load(f)
+
+    def get(self, flat):
+        key = bytes(flat).hex()
+        p = self.profiles.get(key)
+        if p is None:
+            p = profile(flat)
+            self.profiles[key] = p
+            self._dirty = True
+        return p
+
+    def annotate(self, n, flat):
+        """Extra record fields for the pipeline (see pipeline.run_pipeline)."""
+        return {"tier": self.get(flat)["tier"]}
+
+    def save(self):
+        if self._dirty:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, "w") as f:
+                json.dump(self.profiles, f)
+            self._dirty = False
+
+
+if __name__ == "__main__":
+    import sys
+
+    import pipeline
+
+    source = sys.argv[1] if len(sys.argv) > 1 else os.path.join("sudokus", "9x9")
+    index = DifficultyIndex(source)
+    counts = {t: 0 for t in TIERS + [INVALID]}
+    for puzzle_id, n, flat in pipeline.iter_puzzles(source):
+        p = index.get(flat)
+        counts[p["tier"]] += 1
+        print(
+            f"{str(puzzle_id):<12} clues={p['clues']:<4} singles={p['singles_ratio']:.2f} "
+            f"nodes={p['nodes']:<6} branching={p['branching']:.2f} tier={p['tier']}"
+        )
+    index.save()
+    print(counts)
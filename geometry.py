@@ -0,0 +1,138 @@
+"""
+Precomputed board geometry shared by the solvers, the presolver and the validator.
+
+Cells are numbered row-major (cell = r * N + c). For each side N the index
+tables below are built once, cached, and never modified afterwards:
+- units: rows (0..N-1), columns (N..2N-1) and boxes (2N..3N-1),
+- peers: the 3N - 2M - 1 other cells sharing a unit with each cell,
+- row_of / col_of / box_of / cell_units: cell -> unit maps,
+- cnf_groups: the "exactly one" literal groups of the standard CNF layout,
+  where var(r, c, v) = (r * N + c) * N + v.
+
+Every table is a tuple (for Python loops) with a read-only NumPy twin
+(suffix `_array`, for vectorized code).
+"""
+
+import functools
+import math
+
+import numpy as np
+
+
+def _frozen(values, dtype=np.int32):
+    arr = np.array(values, dtype=dtype)
+    arr.setflags(write=False)
+    return arr
+
+
+class Geometry:
+    """Index tables of an N x N board (N = M * M). Use `get(n)` rather than building one."""
+
+    __slots__ = (
+        "n",
+        "m",
+        "coords",
+        "rows",
+        "cols",
+        "boxes",
+        "units",
+        "peers",
+        "peer_coords",
+        "row_of",
+        "col_of",
+        "box_of",
+        "cell_units",
+        "units_array",
+        "peers_array",
+        "box_of_array",
+        "_cnf",
+    )
+
+    def __init__(self, n):
+        m = math.isqrt(n)
+        if m * m != n:
+            raise ValueError(f"Board side must be a perfect square, got {n}")
+        cells = range(n * n)
+        rows = tuple(tuple(r * n + c for c in range(n)) for r in range(n))
+        cols = tuple(tuple(r * n + c for r in range(n)) for c in range(n))
+        boxes = tuple(
+            tuple((br + i) * n + bc + j for i in range(m) for j in range(m))
+            for br in range(0, n, m)
+            for bc in range(0, n, m)
+        )
+        box_of = tuple((cell // n // m) * m + (cell % n) // m for cell in cells)
+
+        peers = []
+        for cell in cells:
+            r, c, b = cell // n, cell % n, box_of[cell]
+            peer_set = set(rows[r]) | set(cols[c]) | set(boxes[b])
+            peer_set.discard(cell)
+            peers.append(tuple(sorted(peer_set)))
+
+        set_ = object.__setattr__
+        set_(self, "n", n)
+        set_(self, "m", m)
+        set_(self, "coords", tuple((cell // n, cell % n) for cell in cells))
+        set_(self, "rows", rows)
+        set_(self, "cols", cols)
+        set_(self, "boxes", boxes)
+        set_(self, "units", rows + cols + boxes)
+        set_(self, "peers", tuple(peers))
+        set_(self, "peer_coords", tuple(tuple((p // n, p % n) for p in ps) for ps in peers))
+        set_(self, "row_of", tuple(cell // n for cell in cells))
+        set_(self, "col_of", tuple(cell % n for cell in cells))
+        set_(self, "box_of", box_of)
+        set_(
+            self,
+            "cell_units",
+            tuple((cell // n, n + cell % n, 2 * n + box_of[cell]) for cell in cells),
+        )
+        set_(self, "units_array", _frozen(self.units))
+        set_(self, "peers_array", _frozen(peers))
+        set_(self, "box_of_array", _frozen(box_of))
+        set_(self, "_cnf", None)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Geometry tables are immutable")
+
+    def __repr__(self):
+        return f"Geometry(n={self.n})"
+
+    # --- CNF variable layout ---
+
+    def var(self, r, c, v):
+        """CNF variable of "cell (r, c) holds v" (1-based, v in 1..N)."""
+        return (r * self.n + c) * self.n + v
+
+    @property
+    def num_vars(self):
+        return self.n**3
+
+    @property
+    def cnf_groups(self):
+        """
+        The 4 * N * N "exactly one" groups of the CNF encoding, as tuples of
+        literals: every cell holds one value, then every value appears once
+        in each row, column and box. Built on first use.
+        """
+        return self._cnf_tables()[0]
+
+    @property
+    def cnf_groups_array(self):
+        return self._cnf_tables()[1]
+
+    def _cnf_tables(self):
+        if self._cnf is None:
+            n = self.n
+            groups = [tuple(cell * n + v for v in range(1, n + 1)) for cell in range(n * n)]
+            for unit in self.units:
+                groups.extend(tuple(cell * n + v for cell in unit) for v in range(1, n + 1))
+            groups = tuple(groups)
+            object.__setattr__(self, "_cnf", (groups, _frozen(groups)))
+        return self._cnf
+
+
+@functools.lru_cache(maxsize=None)
+def get(n):
+    """Returns the shared Geometry of side n (built on first request)."""
+    return Geometry(n)
@@ -1,30 +1,19 @@
-import copy
-import glob
+import itertools
 import math
 import os
 import re
-import statistics
-import sys
-import time
 
 from tqdm import tqdm
 
-# Import solvers
-try:
-    from solvers import (
-        clips_solver,
-        googleORTools_solver,
-        naive_backtracking,
-        # llm_solver,
-        picat_solver,
-        prolog_solver,
-        pysat_solver,
-        z3_solver,
-        pulp_solver
-    )
-except ImportError as e:
-    print(f"Error importing modules: {e}")
-    sys.exit(1)
+import difficulty
+import geometry
+import pipeline
+import presolve
+import profiling
+import solution_cache
+import solver_protocol
+import solver_registry
+import validator
 
 # --- Helper Functions (Reading and Validation) ---
 
@@ -63,38 +52,56 @@ def check_correct(grid):
         return False
     expected_set = set(range(1, N + 1))
 
-    # Check Rows
-    for row in grid:
-        if set(row) != expected_set:
-            return False
-
-    # Check Columns
-    for c in range(N):
-        column = [grid[r][c] for r in range(N)]
-        if set(column) != expected_set:
+    # Check Rows, Columns and Blocks (shared unit index tables)
+    cells = [value for row in grid for value in row]
+    if len(cells) != N * N:
+        return False
+    for unit in geometry.get(N).units:
+        if {cells[i] for i in unit} != expected_set:
             return False
-
-    # Check Blocks
-    for box_row_start in range(0, N, M):
-        for box_col_start in range(0, N, M):
-            block = []
-            for i in range(M):
-                for j in range(M):
-                    block.append(grid[box_row_start + i][box_col_start + j])
-            if set(block) != expected_set:
-                return False
     return True
 
 
-def validate_solution(grid):
-    """Combines filling check and logic check."""
-    if not grid:
-        return False
-    return check_filled(grid) and check_correct(grid)
+def validate_solution(grid, puzzle=None):
+    """
+    Combines filling check, logic check and (if `puzzle` is given) the check
+    that every original clue is kept. Uses the vectorized validator; the
+    pure Python checks above are the reference it is tested against.
+    """
+    return validator.validate_solution(grid, puzzle)
 
 
 # --- Benchmark Logic ---
-def run_benchmark(solvers, base_path="sudokus"):
+def run_benchmark(
+    solvers,
+    base_path="sudokus",
+    by_difficulty=False,
+    use_presolve=True,
+    in_flight=None,
+    timeout=None,
+    workers=None,
+    shared_memory=True,
+    profile_top=None,
+    batch_size=None,
+):
+    """
+    Benchmarks `solvers` on every size folder of `base_path`.
+    With `in_flight`, that many puzzles are kept in flight at once on an
+    event loop (every solver of a puzzle runs concurrently, see
+    pipeline.solve_async) and `timeout` caps each solve in seconds.
+    With `workers`, GIL-releasing backends run on that many threads and
+    GIL-bound ones on that many processes (pipeline.execution_mode), which
+    read puzzles from and write solutions to shared memory (shared_batch.py)
+    unless `shared_memory` is False.
+    With `profile_top`, that many slowest (solver, puzzle) pairs of each
+    size are re-solved under cProfile and a sampling profiler after the
+    timed run (profiling.py); files go to results/profiles/<size>/.
+    With `batch_size`, the puzzles are solved a second time that many at a
+    time through each solver's solve_many (solver_protocol.py), and the
+    amortized time per puzzle is reported next to the single-call one. The
+    batched pass is skipped for solvers behind a solution cache, whose
+    second pass would only measure cache hits.
+    """
     size_dirs = [
         d
         for d in os.listdir(base_path)
@@ -115,53 +122,147 @@ def run_benchmark(solvers, base_path="sudokus"):
             continue
 
         current_dir = os.path.join(base_path, size_label)
-        sudoku_files = glob.glob(os.path.join(current_dir, "*.txt"))
 
-        if not sudoku_files:
-            continue
+        print(f"--- Starting Benchmark for size '{size_label}' ---\n")
+
+        # Puzzles are streamed from disk and results are written as they are
+        # produced, so memory use does not grow with the number of puzzles.
+        stats_sink = pipeline.StatsSink()
+        csv_sink = pipeline.BackgroundSink(
+            pipeline.CsvSink(os.path.join("results", f"results_{size_label}.csv"))
+        )
+        sinks = [stats_sink, csv_sink]
+
+        # Optional difficulty profiles (cached under results/difficulty/) to split
+        # the results by tier
+        difficulty_index = None
+        tier_sink = None
+        if by_difficulty:
+            difficulty_index = difficulty.DifficultyIndex(current_dir)
+            tier_sink = pipeline.GroupedStatsSink("tier")
+            sinks.append(tier_sink)
+
+        # Only the slowest records are kept here; profiling happens after the run
+        slowest_sink = None
+        if profile_top:
+            slowest_sink = profiling.SlowestSink(profile_top)
+            sinks.append(slowest_sink)
+
+        total_sudokus = pipeline.run_pipeline(
+            current_dir,
+            solvers,
+            sinks,
+            progress=lambda it: tqdm(it, desc="Processing Sudokus"),
+            annotate=difficulty_index.annotate if difficulty_index else None,
+            use_presolve=use_presolve,
+            in_flight=in_flight,
+            timeout=timeout,
+            workers=workers,
+            shared_memory=shared_memory,
+        )
 
-        print(f"--- Starting Benchmark with {len(sudoku_files)} sudokus ---\n")
+        if difficulty_index:
+            difficulty_index.save()
 
-        stats = {
-            name: {"times": [], "failures": 0, "errors": 0}
-            for name, _ in solvers
-        }
+        if total_sudokus == 0:
+            continue
 
-        for file_path in tqdm(sudoku_files, desc="Processing Sudokus"):
-            base_sudoku = read_sudoku(file_path)
+        print_results_table(stats_sink.stats, total_sudokus)
+
+        batch_solvers = [
+            (name, module) for name, module in solvers
+            if not isinstance(module, solution_cache.CachedSolver)
+        ]
+        if batch_size and len(batch_solvers) < len(solvers):
+            print("Batched pass skipped for cached solvers (it would only measure cache hits)")
+        if batch_size and batch_solvers:
+            batch_sink = pipeline.StatsSink()
+            pipeline.run_pipeline(
+                current_dir,
+                batch_solvers,
+                [batch_sink],
+                progress=lambda it: tqdm(it, desc="Processing Sudokus (batched)"),
+                use_presolve=use_presolve,
+                batch_size=batch_size,
+            )
+            print_batch_table(stats_sink.stats, batch_sink.stats, batch_solvers, batch_size)
+
+        if use_presolve:
+            print_presolve_summary(stats_sink.stats, size_label)
+            # Encoding time with and without presolve, on a small sample
+            sample = itertools.islice(pipeline.iter_puzzles(current_dir), 5)
+            presolve.print_encoding_savings(presolve.encoding_savings(sample, solvers))
+
+        if tier_sink:
+            for tier in difficulty.TIERS + [difficulty.INVALID]:
+                if tier not in tier_sink.groups:
+                    continue
+                stats = tier_sink.groups[tier].stats
+                tier_total = max(data["runs"] for data in stats.values())
+                print(f"\nDifficulty tier: {tier}")
+                print_results_table(stats, tier_total)
+
+        if slowest_sink:
+            profiling.print_profile_report(
+                profiling.profile_slowest(
+                    current_dir,
+                    solvers,
+                    slowest_sink.slowest,
+                    os.path.join(profiling.DEFAULT_DIR, size_label),
+                    use_presolve,
+                )
+            )
+        solution_cache.print_cache_stats(solvers)
 
-            if not base_sudoku:
-                continue
+    solution_cache.save_caches(solvers)
 
-            for name, module in solvers:
-                # Deep copy to ensure fresh input for every solver
-                input_grid = copy.deepcopy(base_sudoku)
 
-                start_time = time.time()
-                try:
-                    # Execute solver
-                    result = module.solve(input_grid)
-                    end_time = time.time()
-                    elapsed = end_time - start_time
+def print_presolve_summary(stats, size_label):
+    data = next(iter(stats.values()), None)
+    if not data or not data["runs"]:
+        return
+    n = int(size_label.split("x")[0]) if "x" in size_label else 0
+    avg_settled = data["settled"] / data["runs"]
+    avg_time = data["presolve_time"] / data["runs"]
+    cells = f"/{n * n}" if n else ""
+    print(f"Presolve: {avg_settled:.1f}{cells} cells settled on average, {avg_time:.4f}s per puzzle")
 
-                    if result and validate_solution(result):
-                        stats[name]["times"].append(elapsed)
-                    else:
-                        stats[name]["failures"] += 1
-                except Exception:
-                    # Catch execution errors (crashes)
-                    stats[name]["errors"] += 1
-                    # print(f"  [!] Error in {name}: {e}")
 
-        print_results_table(stats, len(sudoku_files))
+def print_batch_table(single_stats, batch_stats, solvers, batch_size):
+    modules = dict(solvers)
+    print("\n" + "=" * 85)
+    print(
+        f"{'SOLVER':<20} | {'BATCH PATH':<10} | {'SINGLE (s)':<12} | {'AMORTIZED (s)':<13} | {'SPEEDUP':<8}"
+    )
+    print("=" * 85)
+    for name, single in single_stats.items():
+        if name not in modules:
+            continue
+        batch = batch_stats.get(name)
+        native = solver_protocol.has_native_batch(modules.get(name))
+        single_avg = single["total_time"] / single["solved"] if single["solved"] else None
+        batch_avg = batch["total_time"] / batch["solved"] if batch and batch["solved"] else None
+        single_str = f"{single_avg:.4f}" if single_avg is not None else "-"
+        batch_str = f"{batch_avg:.4f}" if batch_avg is not None else "-"
+        speedup = f"x{single_avg / batch_avg:.2f}" if single_avg and batch_avg else "-"
+        print(
+            f"{name:<20} | {'native' if native else 'generic':<10} | {single_str:<12} | {batch_str:<13} | {speedup:<8}"
+        )
+    print("=" * 85)
+    print(f"Amortized = batch time per solved puzzle, {batch_size} puzzles per solve_many call")
 
 
 def print_results_table(stats, total_sudokus):
-    print("\n" + "=" * 85)
+    # With presolve, "AVG TIME" is the solver alone: the solver + presolve
+    # average is shown next to it (comparable to a run without presolve)
+    with_presolve = any(data.get("presolve_time") for data in stats.values())
+    width = 102 if with_presolve else 85
+    print("\n" + "=" * width)
     print(
         f"{'RANK':<5} | {'SOLVER':<20} | {'SOLVED':<8} | {'AVG TIME (s)':<12} | {'MIN (s)':<8} | {'MAX (s)':<8}"
+        + (f" | {'+PRESOLVE (s)':<13}" if with_presolve else "")
     )
-    print("=" * 85)
+    print("=" * width)
 
     # Ranking criteria:
     # 1. Highest number of solved puzzles (descending)
@@ -169,13 +270,15 @@ def print_results_table(stats, total_sudokus):
     ranking_data = []
 
     for name, data in stats.items():
-        solved_count = len(data["times"])
+        solved_count = data["solved"]
         if solved_count > 0:
-            avg_time = statistics.mean(data["times"])
-            min_time = min(data["times"])
-            max_time = max(data["times"])
+            avg_time = data["total_time"] / solved_count
+            avg_total = data.get("total_with_presolve", data["total_time"]) / solved_count
+            min_time = data["min"]
+            max_time = data["max"]
         else:
             avg_time = float("inf")
+            avg_total = float("inf")
             min_time = 0
             max_time = 0
 
@@ -184,6 +287,7 @@ def print_results_table(stats, total_sudokus):
                 "name": name,
                 "solved": solved_count,
                 "avg": avg_time,
+                "avg_total": avg_total,
                 "min": min_time,
                 "max": max_time,
             }
@@ -197,24 +301,43 @@ def print_results_table(stats, total_sudokus):
         avg_str = f"{item['avg']:.4f}" if item["solved"] > 0 else "-"
         min_str = f"{item['min']:.4f}" if item["solved"] > 0 else "-"
         max_str = f"{item['max']:.4f}" if item["solved"] > 0 else "-"
+        total_str = f"{item['avg_total']:.4f}" if item["solved"] > 0 else "-"
 
         print(
             f"{rank:<5} | {item['name']:<20} | {solved_str:<8} | {avg_str:<12} | {min_str:<8} | {max_str:<8}"
+            + (f" | {total_str:<13}" if with_presolve else "")
         )
 
-    print("=" * 85)
+    print("=" * width)
     print(f"Total sudokus processed: {total_sudokus}")
 
 
 if __name__ == "__main__":
-    solvers = [
-        # ("CLIPS", clips_solver),
-        ("Google OR-Tools", googleORTools_solver),
-        # ("Z3 Solver", z3_solver),
-        # ("Prolog (PySwip)", prolog_solver),
-        ("Picat Solver", picat_solver),
-        # ("Naive Backtracking", naive_backtracking),
-        ("PySAT (Glucose4)", pysat_solver),
-        ("PuLP Solver", pulp_solver),
+    # Solvers are imported lazily: only the selected ones are loaded and
+    # unavailable backends are skipped instead of aborting the run.
+    selected = [
+        # "CLIPS",
+        "Google OR-Tools",
+        # "Z3 Solver",
+        # "Prolog (PySwip)",
+        "Picat Solver",
+        # "Naive Backtracking",
+        "PySAT (Glucose4)",
+        "PuLP Solver",
     ]
-    run_benchmark(solvers)
+    solvers = solver_registry.load_solvers(selected)
+    solver_registry.print_load_times()
+
+    # Optional symmetry-canonical solution cache in front of every solver,
+    # persisted under results/cache/ between runs.
+    use_solution_cache = False
+    if use_solution_cache:
+        solvers = solution_cache.cached_solvers(
+            solvers, cache_dir=os.path.join("results", "cache")
+        )
+
+    # Second pass solving the puzzles this many at a time through solve_many
+    # (batched vs single-call table), None to skip it
+    batch_size = 32
+
+    run_benchmark(solvers, by_difficulty=True, batch_size=batch_size)
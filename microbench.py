@@ -0,0 +1,306 @@
+"""
+Micro-benchmarks of the encoding hot paths, with regression thresholds.
+
+`main.py` times whole solves; here every hot path is timed on its own on the
+first puzzle of each fixture size (9x9, 16x16, 25x25):
+
+    pysat.cnf           CNF generation + loading (pysat_solver.encode)
+    ortools.model       CP-SAT model build (googleORTools_solver.encode)
+    z3.distinct         Distinct assertions (z3_solver.encode)
+    prolog.format       grid_to_prolog formatting
+    picat.template      Picat program templating
+    clips.facts         CLIPS fact assertion (clips_solver.assert_facts)
+    main.read_sudoku    text fixture parsing
+    validate_solution   vectorized solution check
+
+As with pytest-benchmark, each benchmark is calibrated to a number of loops
+per round lasting at least `min_time`, and the median, min and spread of
+the time per call over `rounds` rounds are kept. The rounds of a suite are
+interleaved across benchmarks. Benchmarks whose backend is not installed
+are skipped.
+
+Results are compared against a stored baseline (JSON, per machine): a
+benchmark regresses when its best round (min) exceeds the baseline's by more
+than the threshold (THRESHOLDS, else the default), and the run then exits
+with 1. Noise only ever adds time, so the min is far steadier than the
+median on a busy machine.
+
+    python microbench.py --save             # record the baseline
+    python microbench.py --threshold 0.25   # compare, fail on regressions
+"""
+
+import argparse
+import importlib
+import json
+import os
+import statistics
+import sys
+import time
+
+import main
+import solver_registry
+import validator
+
+FIXTURE_SIZES = ("9x9", "16x16", "25x25")
+DEFAULT_BASELINE = os.path.join("results", "microbench_baseline.json")
+DEFAULT_THRESHOLD = 0.25
+
+# Per-benchmark overrides of the allowed slowdown (noisier paths get more room)
+THRESHOLDS = {
+    "clips.facts": 0.5,
+    "main.read_sudoku": 0.5,
+}
+
+# --- Benchmarks ---
+#
+# Each benchmark takes a fixture (path, grid) and returns the zero-argument
+# callable to time; setup work (imports, solver state) stays out of it.
+
+
+def _pysat_cnf(path, grid):
+    pysat_solver = importlib.import_module("solvers.pysat_solver")
+
+    def run():
+        s, _, _ = pysat_solver.encode(grid)
+        s.delete()
+
+    return run
+
+
+def _ortools_model(path, grid):
+    ortools_solver = importlib.import_module("solvers.googleORTools_solver")
+    return lambda: ortools_solver.encode(grid)
+
+
+def _z3_distinct(path, grid):
+    z3_solver = importlib.import_module("solvers.z3_solver")
+    return lambda: z3_solver.encode(grid)
+
+
+def _prolog_format(path, grid):
+    prolog_solver = importlib.import_module("solvers.prolog_solver")
+    return lambda: prolog_solver.grid_to_prolog(grid)
+
+
+def _picat_template(path, grid):
+    picat_solver = importlib.import_module("solvers.picat_solver")
+    return lambda: picat_solver._program(grid)
+
+
+def _clips_facts(path, grid):
+    clips_solver = importlib.import_module("solvers.clips_solver")
+    import clips
+
+    env = clips.Environment()
+    clips_solver.load_rules(env)
+
+    def run():
+        env.reset()
+        clips_solver.assert_facts(env, grid)
+
+    return run
+
+
+def _read_sudoku(path, grid):
+    return lambda: main.read_sudoku(path)
+
+
+def _validate_solution(path, grid):
+    # A solution of the fixture, from the fastest backend available
+    solution = None
+    for name in ("Google OR-Tools", "PySAT (Glucose4)"):
+        module = solver_registry.load_solver(name)
+        if module is not None:
+            solution = module.solve([list(row) for row in grid])
+            break
+    if not solution:
+        raise ImportError("no backend to solve the fixture")
+    flat = bytes(cell for row in grid for cell in row)
+    return lambda: validator.validate_solution(solution, flat)
+
+
+BENCHMARKS = {
+    "pysat.cnf": _pysat_cnf,
+    "ortools.model": _ortools_model,
+    "z3.distinct": _z3_distinct,
+    "prolog.format": _prolog_format,
+    "picat.template": _picat_template,
+    "clips.facts": _clips_facts,
+    "main.read_sudoku": _read_sudoku,
+    "validate_solution": _validate_solution,
+}
+
+
+def load_fixtures(base_path="sudokus", sizes=FIXTURE_SIZES):
+    """First puzzle file of every fixture size: {size: (path, grid)}."""
+    fixtures = {}
+    for size in sizes:
+        folder = os.path.join(base_path, size)
+        if not os.path.isdir(folder):
+            continue
+        names = sorted(name for name in os.listdir(folder) if name.endswith(".txt"))
+        if names:
+            path = os.path.join(folder, names[0])
+            fixtures[size] = (path, main.read_sudoku(path))
+    return fixtures
+
+
+# --- Timing ---
+
+
+def _calibrate(fn, min_time):
+    """Loops per round so that a round lasts at least `min_time`."""
+    fn()  # warm-up
+    loops = 1
+    while True:
+        elapsed = _round(fn, loops) * loops
+        if elapsed >= min_time or loops >= 1 << 20:
+            return loops
+        loops *= 2 if elapsed == 0 else max(2, min(10, int(min_time / elapsed) + 1))
+
+
+def _round(fn, loops):
+    start_time = time.perf_counter()
+    for _ in range(loops):
+        fn()
+    return (time.perf_counter() - start_time) / loops
+
+
+def _summary(times, loops):
+    return {
+        "median": statistics.median(times),
+        "min": min(times),
+        "stdev": statistics.stdev(times) if len(times) > 1 else 0.0,
+        "loops": loops,
+        "rounds": len(times),
+    }
+
+
+def measure(fn, rounds=7, min_time=0.05):
+    """
+    Median, min and standard deviation of the time per call of `fn`, over
+    `rounds` rounds of a calibrated number of loops. Returns a result dict.
+    """
+    loops = _calibrate(fn, min_time)
+    return _summary([_round(fn, loops) for _ in range(rounds)], loops)
+
+
+def run_suite(fixtures, names=None, rounds=7, min_time=0.05):
+    """
+    Runs the selected benchmarks (default: all) on every fixture.
+    Returns {"<benchmark>[<size>]": result dict}; skipped ones map to
+    {"skipped": reason}. The rounds are interleaved across benchmarks, so a
+    slow spell of the machine hits one round of each rather than all the
+    rounds of one.
+    """
+    results = {}
+    timed = {}
+    for name in names or BENCHMARKS:
+        for size, (path, grid) in fixtures.items():
+            key = f"{name}[{size}]"
+            try:
+                fn = BENCHMARKS[name](path, [list(row) for row in grid])
+            except ImportError as e:
+                results[key] = {"skipped": str(e) or type(e).__name__}
+                continue
+            results[key] = None
+            timed[key] = (fn, _calibrate(fn, min_time), [])
+    for _ in range(rounds):
+        for fn, loops, times in timed.values():
+            times.append(_round(fn, loops))
+    for key, (_, loops, times) in timed.items():
+        results[key] = _summary(times, loops)
+    return results
+
+
+# --- Baselines ---
+
+
+def save_baseline(results, path=DEFAULT_BASELINE):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    measured = {key: r for key, r in results.items() if "skipped" not in r}
+    with open(path, "w") as f:
+        json.dump(measured, f, indent=2, sort_keys=True)
+    return path
+
+
+def load_baseline(path=DEFAULT_BASELINE):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    Ratio of every min to its baseline. Returns {key: {"ratio", "limit",
+    "regressed"}} for the benchmarks present in both.
+    """
+    comparison = {}
+    for key, result in results.items():
+        base = baseline.get(key)
+        if "skipped" in result or not base or not base.get("min"):
+            continue
+        limit = 1 + THRESHOLDS.get(key.split("[")[0], threshold)
+        ratio = result["min"] / base["min"]
+        comparison[key] = {"ratio": ratio, "limit": limit, "regressed": ratio > limit}
+    return comparison
+
+
+def print_suite_report(results, comparison=None):
+    comparison = comparison or {}
+    print("\n" + "=" * 95)
+    print(
+        f"{'BENCHMARK':<30} | {'MEDIAN (us)':<12} | {'MIN (us)':<10} | {'STDEV':<7} | {'LOOPS':<7} | {'VS BASELINE':<12}"
+    )
+    print("=" * 95)
+    for key, result in results.items():
+        if "skipped" in result:
+            print(f"{key:<30} | skipped ({result['skipped']})")
+            continue
+        rel = result["stdev"] / result["median"] if result["median"] else 0.0
+        line = (
+            f"{key:<30} | {result['median'] * 1e6:<12.1f} | {result['min'] * 1e6:<10.1f} | "
+            f"{rel:<7.1%} | {result['loops']:<7}"
+        )
+        if key in comparison:
+            entry = comparison[key]
+            verdict = "REGRESSED" if entry["regressed"] else "ok"
+            line += f" | x{entry['ratio']:.2f} {verdict}"
+        else:
+            line += f" | {'-':<12}"
+        print(line)
+    print("=" * 95)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Micro-benchmarks of the encoding hot paths")
+    parser.add_argument("--base-path", default="sudokus")
+    parser.add_argument("--only", default=None, help="Comma-separated benchmark names")
+    parser.add_argument("--rounds", type=int, default=7)
+    parser.add_argument("--min-time", type=float, default=0.05, help="Seconds per round")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--save", action="store_true", help="Store the results as the baseline")
+    args = parser.parse_args()
+
+    names = args.only.split(",") if args.only else None
+    unknown = [name for name in names or () if name not in BENCHMARKS]
+    if unknown:
+        print(f"Unknown benchmarks: {', '.join(unknown)}", file=sys.stderr)
+        sys.exit(2)
+
+    results = run_suite(load_fixtures(args.base_path), names, args.rounds, args.min_time)
+    if args.save:
+        print_suite_report(results)
+        print(f"Baseline written to {save_baseline(results, args.baseline)}")
+        sys.exit(0)
+
+    comparison = compare(results, load_baseline(args.baseline), args.threshold)
+    print_suite_report(results, comparison)
+    if not comparison:
+        print(f"No baseline at {args.baseline} (run with --save first)")
+    regressed = [key for key, entry in comparison.items() if entry["regressed"]]
+    if regressed:
+        print(f"{len(regressed)} benchmark(s) over threshold: {', '.join(regressed)}")
+        sys.exit(1)
@@ -0,0 +1,806 @@
+"""
+Streaming read -> solve -> validate pipeline.
+
+Every stage is a generator, so puzzles are pulled one at a time from disk
+and results are pushed to a sink as soon as they are produced. Memory use
+does not depend on the size of the input.
+"""
+
+import asyncio
+import collections
+import csv
+import functools
+import importlib
+import itertools
+import json
+import math
+import os
+import queue
+import threading
+import time
+import types
+import weakref
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+import board
+import dataset
+import presolve
+import shared_batch
+import solver_protocol
+import validator
+
+# --- Sources ---
+
+
+def iter_puzzles(source):
+    """
+    Lazily yields (puzzle_id, n, flat) tuples from `source`, where `flat` is
+    an immutable bytes object with the N*N cells in row-major order.
+
+    `source` can be:
+    - a directory of `.txt` files (the `sudokus/<size>/` layout),
+    - a packed dataset (`.sdkp`),
+    - a one-line-per-puzzle text file (e.g. the 81-char format).
+    """
+    if os.path.isdir(source):
+        # os.scandir is lazy: file names are not collected up front
+        with os.scandir(source) as entries:
+            for entry in entries:
+                if not entry.name.endswith(".txt") or not entry.is_file():
+                    continue
+                try:
+                    grid = dataset.read_text_grid(entry.path)
+                except (OSError, ValueError) as e:
+                    print(f"Error reading {entry.path}: {e}")
+                    continue
+                if grid:
+                    yield entry.name, len(grid), dataset.flatten(grid)
+    elif source.endswith(dataset.EXTENSION):
+        with dataset.PackedDataset(source) as ds:
+            for i in range(len(ds)):
+                yield i, ds.n, bytes(ds.raw(i))
+    else:
+        with open(source, "r") as f:
+            for line_no, line in enumerate(f, 1):
+                flat = dataset.parse_line(line)
+                if flat is not None:
+                    yield line_no, math.isqrt(len(flat)), bytes(flat)
+
+
+def to_grid(flat, n):
+    """Builds a fresh list-of-lists grid from a flat buffer (cheap replacement for deepcopy)."""
+    return [list(flat[r * n : (r + 1) * n]) for r in range(n)]
+
+
+# --- Solve & Validate ---
+
+
+def is_board(result, n):
+    """True if `result` looks like an N x N board (list/tuple of N rows of N cells, or a board.Grid)."""
+    if isinstance(result, board.Grid):
+        return result.n == n
+    return (
+        isinstance(result, (list, tuple))
+        and len(result) == n
+        and all(isinstance(row, (list, tuple)) and len(row) == n for row in result)
+    )
+
+
+# Puzzles whose results are validated together (one vectorized call per size)
+VALIDATE_CHUNK = 64
+
+
+def _result_cells(result, n):
+    """N*N cells of a solver result as bytes, or None if it is not an N x N board."""
+    if not result or not is_board(result, n):
+        return None
+    try:
+        return dataset.flatten(result)
+    except (ValueError, TypeError):
+        # Non-integer cells or values outside 0..255
+        return None
+
+
+def _validate_results(entries):
+    """
+    Validates the solver results of several puzzles at once. `entries`
+    holds (results, n, flat) per puzzle; the boards are grouped by size and
+    checked (rules and clues) with one validator.validate_batch call per
+    size. Returns one list of booleans per entry.
+    """
+    oks = [[False] * len(results) for results, _, _ in entries]
+    by_size = {}
+    for k, (results, n, flat) in enumerate(entries):
+        for i, result in enumerate(results):
+            cells = _result_cells(result, n)
+            if cells is not None:
+                by_size.setdefault(n, []).append((k, i, cells, flat))
+    for n, boards in by_size.items():
+        solutions = np.frombuffer(b"".join(b[2] for b in boards), dtype=np.uint8).reshape(-1, n, n)
+        clues = np.frombuffer(b"".join(b[3] for b in boards), dtype=np.uint8).reshape(-1, n, n)
+        for (k, i, _, _), valid in zip(boards, validator.validate_batch(solutions, clues)):
+            oks[k][i] = bool(valid)
+    return oks
+
+
+class _ChunkValidator:
+    """
+    Turns the solver outcomes of each puzzle into records. By default the
+    outcomes of up to `chunk` puzzles are buffered and validated at once
+    (_validate_results), so the per-call NumPy overhead is paid per chunk;
+    a custom `validate(result, flat)` is applied to every puzzle right away.
+    """
+
+    def __init__(self, solvers, validate=None, chunk=VALIDATE_CHUNK):
+        self.solvers = solvers
+        self.validate = validate
+        self.chunk = chunk
+        self.pending = []
+
+    def add(self, puzzle_id, n, flat, results, times, errors, reduced, extra):
+        """Returns the records ready to be emitted (possibly none yet)."""
+        if self.validate is not None:
+            valid = [bool(result) and self.validate(result, flat) for result in results]
+            return list(_records(puzzle_id, n, self.solvers, times, errors, valid, reduced, extra))
+        self.pending.append((puzzle_id, n, flat, results, times, errors, reduced, extra))
+        if len(self.pending) >= self.chunk:
+            return self.flush()
+        return []
+
+    def flush(self):
+        """Validates and returns the records of every buffered puzzle."""
+        pending, self.pending = self.pending, []
+        oks = _validate_results([(results, n, flat) for _, n, flat, results, *_ in pending])
+        records = []
+        for (puzzle_id, n, flat, _, times, errors, reduced, extra), valid in zip(pending, oks):
+            records.extend(_records(puzzle_id, n, self.solvers, times, errors, valid, reduced, extra))
+        return records
+
+
+def solve_stream(puzzles, solvers, validate=None, annotate=None, use_presolve=True):
+    """
+    Runs every solver on every puzzle coming from `puzzles` and yields one
+    result record per (puzzle, solver) pair:
+        {"puzzle", "n", "solver", "status", "time"}
+    where status is "solved", "failed" (no/invalid solution) or "error".
+
+    By default the results of all solvers on VALIDATE_CHUNK consecutive
+    puzzles are validated together (rules and original clues) with
+    `validator.validate_batch`, so records come out a chunk at a time, in
+    input order. A custom `validate(result, flat)` callable can be given
+    instead.
+
+    `annotate(n, flat)` optionally returns extra fields (e.g. the difficulty
+    tier) added to every record of that puzzle.
+
+    With `use_presolve`, every puzzle goes once through the shared presolver
+    (presolve.py) and the solvers receive the reduced grid (and the candidate
+    domains when they accept them). Records then also carry "settled" and
+    "presolve_time"; "time" is the solver time alone (StatsSink also sums
+    solver + presolve time, comparable to a run without presolve).
+    """
+    checker = _ChunkValidator(solvers, validate)
+    for puzzle_id, n, flat in puzzles:
+        extra = annotate(n, flat) if annotate is not None else None
+        reduced = presolve.presolve(flat) if use_presolve else None
+
+        results = []
+        times = []
+        errors = []
+        for name, module in solvers:
+            start_time = time.perf_counter()
+            try:
+                if reduced is not None:
+                    result = presolve.solve_presolved(module, reduced)
+                else:
+                    # Fresh input for every solver, built from the immutable flat buffer
+                    result = module.solve(board.solver_input(module, flat, n))
+                error = False
+            except Exception:
+                result = None
+                error = True
+            times.append(time.perf_counter() - start_time)
+            results.append(result)
+            errors.append(error)
+
+        yield from checker.add(puzzle_id, n, flat, results, times, errors, reduced, extra)
+    yield from checker.flush()
+
+
+def solve_stream_batched(
+    puzzles, solvers, validate=None, annotate=None, use_presolve=True, batch_size=32
+):
+    """
+    Same records as solve_stream, but every solver gets the puzzles
+    `batch_size` at a time through its solve_many (solver_protocol.py), so
+    backends with a native batch path keep their model or engine across the
+    batch. "time" is the time taken to produce each result: summed over a
+    batch it is the batch wall time, i.e. the amortized cost per puzzle.
+    With `use_presolve` the reduced grids are sent with their domains, as
+    in solve_stream.
+    """
+    puzzles = iter(puzzles)
+    while True:
+        chunk = list(itertools.islice(puzzles, batch_size))
+        if not chunk:
+            break
+        extras = [annotate(n, flat) if annotate is not None else None for _, n, flat in chunk]
+        reduced = [presolve.presolve(flat) if use_presolve else None for _, _, flat in chunk]
+        domains = [r.domains for r in reduced] if use_presolve else None
+
+        outcomes = []
+        for _, module in solvers:
+            grids = (
+                board.solver_input(module, r.flat if r is not None else flat, n)
+                for (_, n, flat), r in zip(chunk, reduced)
+            )
+            outcomes.append(solver_protocol.solve_many_timed(module, grids, domains))
+
+        # The whole chunk is validated at once
+        checker = _ChunkValidator(solvers, validate, len(chunk))
+        for k, (puzzle_id, n, flat) in enumerate(chunk):
+            results = [outcome[0][k] for outcome in outcomes]
+            times = [outcome[1][k] for outcome in outcomes]
+            errors = [outcome[2][k] for outcome in outcomes]
+            yield from checker.add(puzzle_id, n, flat, results, times, errors, reduced[k], extras[k])
+        yield from checker.flush()
+
+
+def _records(puzzle_id, n, solvers, times, errors, valid, reduced, extra):
+    """Builds the result records of one puzzle. `errors` holds False or an error status."""
+    for (name, _), elapsed, error, ok in zip(solvers, times, errors, valid):
+        if error:
+            status = error if isinstance(error, str) else "error"
+        else:
+            status = "solved" if ok else "failed"
+        record = {
+            "puzzle": puzzle_id,
+            "n": n,
+            "solver": name,
+            "status": status,
+            "time": elapsed,
+        }
+        if reduced is not None:
+            record["settled"] = reduced.settled
+            record["presolve_time"] = reduced.time
+        if extra:
+            record.update(extra)
+        yield record
+
+
+# --- Async Solve & Validate ---
+
+# Thread locks of the backends that are not THREAD_SAFE (one call at a time)
+_module_locks = {}
+_module_locks_guard = threading.Lock()
+
+# Per event loop gates, so calls to a busy backend wait in the loop rather
+# than on an executor thread
+_loop_gates = weakref.WeakKeyDictionary()
+
+
+def _module_lock(module):
+    with _module_locks_guard:
+        return _module_locks.setdefault(id(module), threading.Lock())
+
+
+def _gate(module):
+    """asyncio.Lock serializing a non thread-safe backend within the running loop."""
+    gates = _loop_gates.setdefault(asyncio.get_running_loop(), {})
+    gate = gates.get(id(module))
+    if gate is None:
+        gate = gates[id(module)] = asyncio.Lock()
+    return gate
+
+
+def _solve_in_thread(module, grid, reduced, on_start=None, abandoned=None):
+    if abandoned is not None and abandoned.is_set():
+        return None, 0.0
+    lock = None if getattr(module, "THREAD_SAFE", False) else _module_lock(module)
+    if lock is not None:
+        lock.acquire()
+    try:
+        # The clock starts once the backend is free
+        if on_start is not None:
+            on_start()
+        start_time = time.perf_counter()
+        if reduced is not None:
+            result = presolve.solve_presolved(module, reduced)
+        else:
+            result = module.solve(grid)
+    finally:
+        if lock is not None:
+            lock.release()
+    return result, time.perf_counter() - start_time
+
+
+def _set_started(started):
+    if not started.done():
+        started.set_result(None)
+
+
+def _finished(gate):
+    """Done callback of an executor call: retrieves its outcome and frees the gate."""
+
+    def callback(future):
+        if not future.cancelled():
+            future.exception()
+        if gate is not None:
+            gate.release()
+
+    return callback
+
+
+async def _timed_solve_async(module, grid, timeout=None, reduced=None, executor=None):
+    """
+    Returns (result, solve time). Raises asyncio.TimeoutError past `timeout`
+    seconds, counted from the moment the call starts running on its thread.
+    """
+    native = getattr(module, "solve_async", None)
+    if native is not None:
+        if reduced is not None:
+            grid = reduced.grid()
+        start_time = time.perf_counter()
+        result = await native(grid, timeout=timeout)
+        return result, time.perf_counter() - start_time
+
+    loop = asyncio.get_running_loop()
+    started = loop.create_future()
+    abandoned = threading.Event()
+    gate = None if getattr(module, "THREAD_SAFE", False) else _gate(module)
+    if gate is not None:
+        await gate.acquire()
+    try:
+        future = loop.run_in_executor(
+            executor,
+            _solve_in_thread,
+            module,
+            grid,
+            reduced,
+            lambda: loop.call_soon_threadsafe(_set_started, started),
+            abandoned,
+        )
+    except BaseException:
+        if gate is not None:
+            gate.release()
+        raise
+    # The gate is held until the thread is done, even after a timeout
+    future.add_done_callback(_finished(gate))
+    try:
+        await asyncio.wait({started, future}, return_when=asyncio.FIRST_COMPLETED)
+    except asyncio.CancelledError:
+        # Skipped if not started yet; the gate is freed once the thread returns
+        abandoned.set()
+        raise
+    return await asyncio.wait_for(asyncio.shield(future), timeout)
+
+
+async def solve_async(module, grid, timeout=None, executor=None):
+    """
+    Awaitable version of `module.solve(grid)` (fills `grid` IN-PLACE and returns it).
+
+    - Backends exposing their own `solve_async(grid, timeout)` (Picat through
+      an asyncio subprocess, the LLM through its async client) are awaited
+      directly; cancelling or timing out kills the underlying work.
+    - Every other backend runs `solve` in `executor` (default: the loop's
+      thread pool). Backends that do not declare `THREAD_SAFE = True` run
+      one call at a time. The timeout counts from the moment the call starts
+      running, not while it waits for a thread or for the backend. A timed
+      out call is abandoned, not interrupted: its thread finishes in the
+      background (holding its backend until then) and the result is dropped.
+
+    Raises asyncio.TimeoutError when `timeout` seconds pass.
+    """
+    result, _ = await _timed_solve_async(module, grid, timeout, None, executor)
+    return result
+
+
+async def _solve_puzzle_async(puzzle, solvers, annotate, use_presolve, timeout, executor):
+    """Solves one puzzle with every solver concurrently. Returns the arguments of _ChunkValidator.add."""
+    puzzle_id, n, flat = puzzle
+    loop = asyncio.get_running_loop()
+    extra = await loop.run_in_executor(executor, annotate, n, flat) if annotate else None
+    reduced = await loop.run_in_executor(executor, presolve.presolve, flat) if use_presolve else None
+
+    outcomes = await asyncio.gather(
+        *(
+            _timed_solve_async(module, board.solver_input(module, flat, n), timeout, reduced, executor)
+            for _, module in solvers
+        ),
+        return_exceptions=True,
+    )
+    results, times, errors = [], [], []
+    for outcome in outcomes:
+        if isinstance(outcome, BaseException):
+            if isinstance(outcome, asyncio.CancelledError):
+                raise outcome
+            results.append(None)
+            times.append(timeout if isinstance(outcome, asyncio.TimeoutError) else 0.0)
+            errors.append("timeout" if isinstance(outcome, asyncio.TimeoutError) else True)
+        else:
+            results.append(outcome[0])
+            times.append(outcome[1])
+            errors.append(False)
+    return puzzle_id, n, flat, results, times, errors, reduced, extra
+
+
+async def solve_stream_async(
+    puzzles,
+    solvers,
+    validate=None,
+    annotate=None,
+    use_presolve=True,
+    max_in_flight=16,
+    timeout=None,
+    executor=None,
+):
+    """
+    Async counterpart of solve_stream: keeps up to `max_in_flight` puzzles
+    in flight at once (every solver of a puzzle runs concurrently, see
+    solve_async) and yields the records of the puzzles as they complete
+    (validated VALIDATE_CHUNK puzzles at a time, as in solve_stream), so
+    records are not in input order. A solver exceeding `timeout` seconds
+    gets the status "timeout".
+    """
+    puzzles = iter(puzzles)
+    checker = _ChunkValidator(solvers, validate)
+    pending = set()
+    while True:
+        while len(pending) < max_in_flight:
+            puzzle = next(puzzles, None)
+            if puzzle is None:
+                break
+            pending.add(
+                asyncio.ensure_future(
+                    _solve_puzzle_async(puzzle, solvers, annotate, use_presolve, timeout, executor)
+                )
+            )
+        if not pending:
+            for record in checker.flush():
+                yield record
+            return
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        try:
+            for task in done:
+                for record in checker.add(*task.result()):
+                    yield record
+        except BaseException:
+            for task in pending:
+                task.cancel()
+            raise
+
+
+# --- Thread / process execution ---
+
+
+def execution_mode(module):
+    """
+    "thread" for backends that are THREAD_SAFE and release the GIL during
+    search (RELEASES_GIL), so they scale on threads of this interpreter;
+    "process" for GIL-bound modules, which need their own interpreters;
+    "serial" for objects that cannot be re-imported in a worker process
+    (e.g. solution_cache.CachedSolver wrappers): one thread, one call at a time.
+    """
+    if getattr(module, "THREAD_SAFE", False) and getattr(module, "RELEASES_GIL", False):
+        return "thread"
+    if isinstance(module, types.ModuleType):
+        return "process"
+    return "serial"
+
+
+def _solve_timed(module, n, flat, reduced):
+    start_time = time.perf_counter()
+    if reduced is not None:
+        result = presolve.solve_presolved(module, reduced)
+    else:
+        result = module.solve(board.solver_input(module, flat, n))
+    return result, time.perf_counter() - start_time
+
+
+def _solve_timed_by_name(module_name, n, flat, reduced):
+    """Process pool entry point: the module is imported in the worker."""
+    return _solve_timed(importlib.import_module(module_name), n, flat, reduced)
+
+
+class PoolExecutor:
+    """
+    Runs one backend on a thread or process pool.
+    `submit(n, flat, reduced)` returns a Future of (result, solve time).
+    """
+
+    def __init__(self, mode, executor, task, workers):
+        self.mode = mode
+        self.executor = executor
+        self.task = task
+        self.workers = workers
+
+    def submit(self, n, flat, reduced=None):
+        return self.executor.submit(self.task, n, flat, reduced)
+
+    def warm_up(self):
+        """Starts every worker (process pools fork lazily)."""
+        list(self.executor.map(time.sleep, [0.01] * self.workers))
+
+    def shutdown(self):
+        self.executor.shutdown(cancel_futures=True)
+
+
+def make_executor(module, workers, mode=None, shared_memory=True):
+    """
+    Returns an executor running `module` with `workers` workers in `mode`
+    (default: execution_mode). Process pools exchange puzzles and solutions
+    through shared memory slots (shared_batch.SharedSlotPool) unless
+    `shared_memory` is False, in which case they are pickled.
+    """
+    mode = mode or execution_mode(module)
+    if mode == "process":
+        if shared_memory:
+            return shared_batch.SharedSlotPool(module.__name__, workers)
+        task = functools.partial(_solve_timed_by_name, module.__name__)
+        return PoolExecutor(mode, ProcessPoolExecutor(max_workers=workers), task, workers)
+    workers = workers if mode == "thread" else 1
+    task = functools.partial(_solve_timed, module)
+    return PoolExecutor(mode, ThreadPoolExecutor(max_workers=workers), task, workers)
+
+
+def solve_stream_parallel(
+    puzzles,
+    solvers,
+    workers=4,
+    validate=None,
+    annotate=None,
+    use_presolve=True,
+    shared_memory=True,
+):
+    """
+    Like solve_stream, but every solver gets its own pool of `workers`
+    threads or processes (see execution_mode) and up to 2 * `workers`
+    puzzles are in flight. Records are yielded in input order.
+    """
+    executors = [make_executor(module, workers, None, shared_memory) for _, module in solvers]
+    checker = _ChunkValidator(solvers, validate)
+    window = collections.deque()
+    puzzles = iter(puzzles)
+
+    def submit(puzzle):
+        puzzle_id, n, flat = puzzle
+        extra = annotate(n, flat) if annotate is not None else None
+        reduced = presolve.presolve(flat) if use_presolve else None
+        futures = [executor.submit(n, flat, reduced) for executor in executors]
+        window.append((puzzle_id, n, flat, reduced, extra, futures))
+
+    try:
+        for puzzle in itertools.islice(puzzles, 2 * workers):
+            submit(puzzle)
+        while window:
+            puzzle_id, n, flat, reduced, extra, futures = window.popleft()
+            results, times, errors = [], [], []
+            for future in futures:
+                try:
+                    result, elapsed = future.result()
+                    error = False
+                except Exception:
+                    result, elapsed, error = None, 0.0, True
+                results.append(result)
+                times.append(elapsed)
+                errors.append(error)
+            next_puzzle = next(puzzles, None)
+            if next_puzzle is not None:
+                submit(next_puzzle)
+
+            yield from checker.add(puzzle_id, n, flat, results, times, errors, reduced, extra)
+        yield from checker.flush()
+    finally:
+        for executor in executors:
+            executor.shutdown()
+
+
+# --- Sinks ---
+
+
+class StatsSink:
+    """Aggregates running per-solver statistics in constant memory."""
+
+    def __init__(self):
+        self.stats = {}
+
+    def write(self, record):
+        data = self.stats.setdefault(
+            record["solver"],
+            {
+                "solved": 0,
+                "total_time": 0.0,
+                "min": float("inf"),
+                "max": 0.0,
+                "failures": 0,
+                "errors": 0,
+                "runs": 0,
+                "settled": 0,
+                "presolve_time": 0.0,
+                "total_with_presolve": 0.0,
+            },
+        )
+        data["runs"] += 1
+        data["settled"] += record.get("settled", 0)
+        data["presolve_time"] += record.get("presolve_time", 0.0)
+        if record["status"] == "solved":
+            t = record["time"]
+            data["solved"] += 1
+            data["total_time"] += t
+            data["total_with_presolve"] += t + record.get("presolve_time", 0.0)
+            data["min"] = min(data["min"], t)
+            data["max"] = max(data["max"], t)
+        elif record["status"] == "failed":
+            data["failures"] += 1
+        else:
+            data["errors"] += 1
+
+    def close(self):
+        pass
+
+
+class GroupedStatsSink:
+    """Keeps one StatsSink per value of `record[key]` (e.g. per difficulty tier)."""
+
+    def __init__(self, key):
+        self.key = key
+        self.groups = {}
+
+    def write(self, record):
+        group = record.get(self.key)
+        sink = self.groups.get(group)
+        if sink is None:
+            sink = self.groups[group] = StatsSink()
+        sink.write(record)
+
+    def close(self):
+        pass
+
+
+class CsvSink:
+    """Appends result records to a CSV file as they arrive."""
+
+    FIELDS = ["puzzle", "n", "solver", "status", "time", "settled", "presolve_time", "tier"]
+
+    def __init__(self, path):
+        self._file = open(path, "w", newline="")
+        self._writer = csv.DictWriter(self._file, fieldnames=self.FIELDS, extrasaction="ignore")
+        self._writer.writeheader()
+
+    def write(self, record):
+        self._writer.writerow(record)
+
+    def close(self):
+        self._file.close()
+
+
+class JsonlSink:
+    """Appends result records to a JSON Lines file as they arrive."""
+
+    def __init__(self, path):
+        self._file = open(path, "w")
+
+    def write(self, record):
+        self._file.write(json.dumps(record) + "\n")
+
+    def close(self):
+        self._file.close()
+
+
+class BackgroundSink:
+    """
+    Hands records to `sink` on a writer thread through a bounded queue.
+    When the writer falls behind, `write` blocks (backpressure) instead of
+    letting the backlog grow without bound.
+    """
+
+    _DONE = object()
+
+    def __init__(self, sink, maxsize=1024):
+        self.sink = sink
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._error = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            record = self._queue.get()
+            if record is self._DONE:
+                break
+            if self._error is None:
+                try:
+                    self.sink.write(record)
+                except Exception as e:
+                    self._error = e
+
+    def write(self, record):
+        if self._error is not None:
+            raise self._error
+        self._queue.put(record)
+
+    def close(self):
+        self._queue.put(self._DONE)
+        self._thread.join()
+        self.sink.close()
+        if self._error is not None:
+            raise self._error
+
+
+def run_pipeline(
+    source,
+    solvers,
+    sinks,
+    validate=None,
+    progress=None,
+    annotate=None,
+    use_presolve=True,
+    in_flight=None,
+    timeout=None,
+    workers=None,
+    shared_memory=True,
+    batch_size=None,
+):
+    """
+    Streams `source` through `solvers` and the validator, writing every result
+    record to each sink. `progress` optionally wraps the puzzle iterator
+    (e.g. tqdm); `annotate` and `use_presolve` are passed to solve_stream.
+
+    With `in_flight`, up to that many puzzles are solved concurrently on an
+    event loop (solve_stream_async) with a `timeout` per solve. With
+    `workers`, each solver runs on its own pool of threads (GIL-releasing
+    backends) or processes (GIL-bound ones), see solve_stream_parallel;
+    process pools exchange puzzles through shared memory unless
+    `shared_memory` is False. With `batch_size`, every solver gets the
+    puzzles that many at a time through solve_many (solve_stream_batched).
+    Otherwise puzzles are solved one after the other.
+    Sinks are closed at the end. Returns the number of puzzles.
+    """
+    count = 0
+
+    def counted(puzzles):
+        nonlocal count
+        for puzzle in puzzles:
+            count += 1
+            yield puzzle
+
+    puzzles = counted(iter_puzzles(source))
+    if progress is not None:
+        puzzles = progress(puzzles)
+
+    try:
+        if in_flight:
+            asyncio.run(
+                _drain_async(
+                    solve_stream_async(
+                        puzzles, solvers, validate, annotate, use_presolve, in_flight, timeout
+                    ),
+                    sinks,
+                )
+            )
+        else:
+            if batch_size:
+                records = solve_stream_batched(
+                    puzzles, solvers, validate, annotate, use_presolve, batch_size
+                )
+            elif workers:
+                records = solve_stream_parallel(
+                    puzzles, solvers, workers, validate, annotate, use_presolve, shared_memory
+                )
+            else:
+                records = solve_stream(puzzles, solvers, validate, annotate, use_presolve)
+            for record in records:
+                for sink in sinks:
+                    sink.write(record)
+    finally:
+        for sink in sinks:
+            sink.close()
+    return count
+
+
+async def _drain_async(records, sinks):
+    async for record in records:
+        for sink in sinks:
+            sink.write(record)
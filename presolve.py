@@ -0,0 +1,304 @@
+"""
+Shared propagation presolver applied before any backend.
+
+Each cell keeps a bitmask of candidates (bit v-1 set if v is still possible).
+The presolver applies, until nothing changes:
+- naked singles (a settled cell removes its value from its peers),
+- hidden singles (a value with one place left in a unit),
+- locked candidates (pointing and claiming between boxes and lines),
+- naked pairs (two cells of a unit sharing the same two candidates).
+
+The result is a reduced grid (settled cells filled in) plus the candidate
+domain of every cell. Backends whose `solve` accepts a `domains` argument
+encode only the remaining candidates; the others get the reduced grid.
+"""
+
+import functools
+import inspect
+import math
+import time
+
+import board
+import dataset
+import geometry
+
+# --- Candidate propagation ---
+
+
+def initial_candidates(flat, n, peers):
+    """Candidate bitmasks after removing the clues from their peers (None if clues clash)."""
+    full = (1 << n) - 1
+    cands = [full] * (n * n)
+    for cell, v in enumerate(flat):
+        if v:
+            bit = 1 << (v - 1)
+            if not cands[cell] & bit:
+                return None
+            cands[cell] = bit
+            for p in peers[cell]:
+                cands[p] &= ~bit
+    for cell, v in enumerate(flat):
+        if v and cands[cell] != 1 << (v - 1):
+            return None
+    return cands
+
+
+def propagate_singles(cands, units, peers, pending=None):
+    """
+    Applies naked and hidden singles until nothing changes.
+    Returns False on contradiction. Modifies `cands` in place.
+
+    `pending` lists the single cells whose value may still sit in their
+    peers' candidates. By default every single cell is propagated and every
+    unit scanned; a search branching on a fixpoint only needs to pass the
+    cell it just set (only the units it changes are scanned again).
+    """
+    if 0 in cands:
+        return False
+    cell_units = geometry.get(math.isqrt(len(cands))).cell_units
+    if pending is None:
+        queue = [cell for cell, c in enumerate(cands) if c & (c - 1) == 0]
+        dirty = set(range(len(units)))
+    else:
+        queue = list(pending)
+        dirty = set()
+        for cell in queue:
+            dirty.update(cell_units[cell])
+    while True:
+        # Naked singles: eliminate fixed values from peers
+        while queue:
+            cell = queue.pop()
+            c = cands[cell]
+            for p in peers[cell]:
+                pc = cands[p]
+                if pc & c:
+                    pc &= ~c
+                    if pc == 0:
+                        return False
+                    cands[p] = pc
+                    dirty.update(cell_units[p])
+                    if pc & (pc - 1) == 0:
+                        queue.append(p)
+        # Hidden singles: a value with a single place left in a unit
+        # (only in the units whose candidates changed)
+        scan, dirty = dirty, set()
+        for u in scan:
+            unit = units[u]
+            seen_once = 0
+            seen_twice = 0
+            for cell in unit:
+                c = cands[cell]
+                seen_twice |= seen_once & c
+                seen_once |= c
+            if seen_once != (1 << len(unit)) - 1:
+                # Some value has no place left in this unit
+                return False
+            only = seen_once & ~seen_twice
+            for cell in unit:
+                hit = cands[cell] & only
+                if hit and cands[cell] != hit:
+                    if hit & (hit - 1):
+                        return False
+                    cands[cell] = hit
+                    dirty.update(cell_units[cell])
+                    queue.append(cell)
+        if not queue:
+            return True
+
+
+def _eliminate(cands, cells, mask, keep):
+    """Removes `mask` from `cells` not in `keep`. Returns True if anything changed."""
+    changed = False
+    for cell in cells:
+        if cell not in keep and cands[cell] & mask:
+            cands[cell] &= ~mask
+            changed = True
+    return changed
+
+
+def locked_candidates(cands, geo):
+    """
+    Pointing: if a value of a box only fits in one row/column, remove it from
+    the rest of that line. Claiming: if a value of a line only fits in one
+    box, remove it from the rest of that box. Returns True if anything changed.
+    """
+    n, units = geo.n, geo.units
+    changed = False
+    for b in range(n):
+        box = units[2 * n + b]
+        box_cells = set(box)
+        for v in range(n):
+            bit = 1 << v
+            cells = [cell for cell in box if cands[cell] & bit]
+            if len(cells) < 2:
+                continue
+            rows = {geo.row_of[cell] for cell in cells}
+            if len(rows) == 1:
+                changed |= _eliminate(cands, units[rows.pop()], bit, box_cells)
+            cols = {geo.col_of[cell] for cell in cells}
+            if len(cols) == 1:
+                changed |= _eliminate(cands, units[n + cols.pop()], bit, box_cells)
+    for line in range(2 * n):
+        unit = units[line]
+        for v in range(n):
+            bit = 1 << v
+            cells = [cell for cell in unit if cands[cell] & bit]
+            if len(cells) < 2:
+                continue
+            boxes = {geo.box_of[cell] for cell in cells}
+            if len(boxes) == 1:
+                changed |= _eliminate(cands, units[2 * n + boxes.pop()], bit, set(unit))
+    return changed
+
+
+def naked_pairs(cands, units):
+    """Two cells of a unit with the same two candidates remove them from the rest of the unit."""
+    changed = False
+    for unit in units:
+        pairs = {}
+        for cell in unit:
+            c = cands[cell]
+            if bin(c).count("1") == 2:
+                pairs.setdefault(c, []).append(cell)
+        for mask, cells in pairs.items():
+            if len(cells) == 2:
+                changed |= _eliminate(cands, unit, mask, set(cells))
+    return changed
+
+
+def reduce_candidates(cands, n):
+    """Runs every technique to a fixpoint. Returns False on contradiction."""
+    geo = geometry.get(n)
+    units, peers = geo.units, geo.peers
+    while True:
+        if not propagate_singles(cands, units, peers):
+            return False
+        if locked_candidates(cands, geo):
+            continue
+        if naked_pairs(cands, units):
+            continue
+        return all(cands)
+
+
+# --- Presolve stage ---
+
+
+class Presolved:
+    """
+    Output of the presolve stage for one puzzle:
+    - flat: N*N cells (bytes) with the settled cells filled in,
+    - domains: candidate bitmask of every cell (None on contradiction),
+    - settled: number of cells settled by the presolve (clues excluded),
+    - time: presolve time in seconds.
+    """
+
+    __slots__ = ("n", "flat", "domains", "settled", "time")
+
+    def __init__(self, n, flat, domains, settled, elapsed):
+        self.n = n
+        self.flat = flat
+        self.domains = domains
+        self.settled = settled
+        self.time = elapsed
+
+    @property
+    def contradiction(self):
+        return self.domains is None
+
+    def grid(self):
+        n = self.n
+        return [list(self.flat[r * n : (r + 1) * n]) for r in range(n)]
+
+
+def presolve(grid):
+    """Presolves a grid (list of rows or flat N*N cells)."""
+    start_time = time.perf_counter()
+    flat = dataset.flatten(grid)
+    n = math.isqrt(len(flat))
+    cands = initial_candidates(flat, n, geometry.get(n).peers)
+    if cands is None or not reduce_candidates(cands, n):
+        return Presolved(n, flat, None, 0, time.perf_counter() - start_time)
+
+    reduced = bytearray(flat)
+    settled = 0
+    for cell, c in enumerate(cands):
+        if not reduced[cell] and c & (c - 1) == 0:
+            reduced[cell] = c.bit_length()
+            settled += 1
+    return Presolved(n, bytes(reduced), cands, settled, time.perf_counter() - start_time)
+
+
+def domain_values(mask):
+    """Values (1-based) allowed by a candidate bitmask."""
+    values = []
+    v = 1
+    while mask:
+        if mask & 1:
+            values.append(v)
+        mask >>= 1
+        v += 1
+    return values
+
+
+@functools.lru_cache(maxsize=None)
+def _accepts_domains(solve_fn):
+    try:
+        return "domains" in inspect.signature(solve_fn).parameters
+    except (TypeError, ValueError):
+        return False
+
+
+def accepts_domains(module, method="solve"):
+    """True if `module.solve` (or another `method`) takes a `domains` argument."""
+    return _accepts_domains(getattr(module, method))
+
+
+def solve_presolved(module, presolved):
+    """Calls `module.solve` on a presolved puzzle, passing the domains when supported."""
+    input_grid = board.solver_input(module, presolved.flat, presolved.n)
+    if presolved.domains is not None and accepts_domains(module):
+        return module.solve(input_grid, domains=presolved.domains)
+    return module.solve(input_grid)
+
+
+# --- Encoding savings report ---
+
+
+def encoding_savings(puzzles, solvers, repeat=3):
+    """
+    For the solvers exposing `encode(grid, domains=None)`, measures the
+    encoding time on the raw grid and on the presolved grid + domains.
+    `puzzles` yields (puzzle_id, n, flat). Returns {name: {"raw", "presolved", "puzzles"}}.
+    """
+    encoders = [(name, module) for name, module in solvers if hasattr(module, "encode")]
+    savings = {name: {"raw": 0.0, "presolved": 0.0, "puzzles": 0} for name, _ in encoders}
+    for _, n, flat in puzzles:
+        result = presolve(flat)
+        if result.contradiction:
+            continue
+        raw_grid = [list(flat[r * n : (r + 1) * n]) for r in range(n)]
+        for name, module in encoders:
+            for label, grid, domains in (
+                ("raw", raw_grid, None),
+                ("presolved", result.grid(), result.domains),
+            ):
+                best = float("inf")
+                for _ in range(repeat):
+                    start_time = time.perf_counter()
+                    module.encode(grid, domains=domains)
+                    best = min(best, time.perf_counter() - start_time)
+                savings[name][label] += best
+            savings[name]["puzzles"] += 1
+    return savings
+
+
+def print_encoding_savings(savings):
+    if not savings:
+        return
+    print(f"{'SOLVER':<20} | {'ENCODE RAW (s)':<14} | {'PRESOLVED (s)':<14} | {'SAVED':<8}")
+    for name, data in savings.items():
+        count = data["puzzles"] or 1
+        raw = data["raw"] / count
+        reduced = data["presolved"] / count
+        saved = 1 - reduced / raw if raw else 0.0
+        print(f"{name:<20} | {raw:<14.5f} | {reduced:<14.5f} | {saved:<8.1%}")
@@ -0,0 +1,317 @@
+"""
+On-demand profiling of the slowest solves.
+
+Profiling never runs on the timed path: `SlowestSink` only remembers the
+top-K slowest (solver, puzzle) records of a normal run, and
+`profile_slowest` re-solves exactly those pairs afterwards under
+- cProfile: `<pair>.prof` (pstats dump) and `<pair>.txt` (top functions by
+  cumulative time),
+- a sampling profiler (a thread snapshotting the solving thread's Python
+  stack): `<pair>.collapsed` (one "frame;frame;... count" line per stack,
+  the input of flamegraph.pl / speedscope) and `<pair>.svg` (flame graph).
+Time spent in native code (CP-SAT, Glucose, CBC...) is attributed to the
+Python frame that called into it.
+
+Fast solves are repeated until they last `min_duration` seconds so that the
+sampler gets enough stacks. Files go to results/profiles/ by default.
+
+    python profiling.py sudokus/16x16 --solvers "PySAT (Glucose4),PuLP Solver" --top 5
+"""
+
+import argparse
+import cProfile
+import hashlib
+import heapq
+import html
+import itertools
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+
+import pipeline
+import presolve
+import solver_registry
+
+DEFAULT_DIR = os.path.join("results", "profiles")
+
+# --- Slowest pairs ---
+
+
+class SlowestSink:
+    """Pipeline sink keeping the `k` slowest result records (constant memory)."""
+
+    def __init__(self, k=5):
+        self.k = k
+        self._heap = []
+        self._seq = itertools.count()
+
+    def write(self, record):
+        entry = (record["time"], next(self._seq), record)
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+        elif entry[0] > self._heap[0][0]:
+            heapq.heapreplace(self._heap, entry)
+
+    def close(self):
+        pass
+
+    @property
+    def slowest(self):
+        """Records sorted from the slowest."""
+        return [record for _, _, record in sorted(self._heap, key=lambda e: (-e[0], e[1]))]
+
+
+# --- Sampling profiler ---
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    label = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+    # ';' separates the frames in the collapsed format
+    return label.replace(";", ",")
+
+
+class StackSampler:
+    """
+    Samples the Python stack of one thread every `interval` seconds.
+    `stacks` maps "root;...;leaf" to the number of samples. With `root` (a
+    code object), stacks start at that function and samples taken outside
+    of it are dropped.
+    """
+
+    def __init__(self, thread_id=None, interval=0.001, root=None):
+        self.thread_id = thread_id or threading.get_ident()
+        self.interval = interval
+        self.root = root
+        self.stacks = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            labels = []
+            while frame is not None:
+                labels.append(_frame_label(frame))
+                if frame.f_code is self.root:
+                    break
+                frame = frame.f_back
+            if self.root is not None and frame is None:
+                continue
+            stack = ";".join(reversed(labels))
+            self.stacks[stack] = self.stacks.get(stack, 0) + 1
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def write_collapsed(stacks, path):
+    with open(path, "w") as f:
+        for stack, count in sorted(stacks.items()):
+            f.write(f"{stack} {count}\n")
+    return path
+
+
+# --- Flame graph ---
+
+_ROW = 16
+_WIDTH = 1200
+
+
+def _color(name):
+    h = int(hashlib.md5(name.encode()).hexdigest()[:6], 16)
+    return f"rgb({205 + h % 50},{(h >> 8) % 180},{(h >> 16) % 55})"
+
+
+def write_flamegraph(stacks, path, title="Flame graph"):
+    """Renders collapsed stacks as a standalone SVG flame graph (root at the bottom)."""
+    # Merge the stacks into a tree: name -> [samples, children]
+    root = [0, {}]
+    for stack, count in stacks.items():
+        node = root
+        node[0] += count
+        for name in stack.split(";"):
+            node = node[1].setdefault(name, [0, {}])
+            node[0] += count
+
+    def depth(node):
+        return 1 + max((depth(child) for child in node[1].values()), default=0)
+
+    rows = depth(root)
+    height = (rows + 2) * _ROW
+    total = root[0] or 1
+    scale = _WIDTH / total
+    rects = []
+
+    def layout(node, name, x, level):
+        width = node[0] * scale
+        if width < 0.1:
+            return
+        y = height - (level + 1) * _ROW
+        label = html.escape(name)
+        share = node[0] / total
+        fits = width > 7 * len(name)
+        text = label if fits else html.escape(name[: max(0, int(width / 7) - 2)]) + ".."
+        rects.append(
+            f'<g><title>{label} ({node[0]} samples, {share:.1%})</title>'
+            f'<rect x="{x:.2f}" y="{y}" width="{width:.2f}" height="{_ROW - 1}" fill="{_color(name)}"/>'
+            + (f'<text x="{x + 3:.2f}" y="{y + _ROW - 4}">{text}</text>' if width > 21 else "")
+            + "</g>"
+        )
+        for child_name, child in sorted(node[1].items()):
+            layout(child, child_name, x, level + 1)
+            x += child[0] * scale
+
+    layout(root, "all", 0.0, 0)
+    with open(path, "w") as f:
+        f.write(
+            f'<svg xmlns="http://www.w3.org/2000/svg" width="{_WIDTH}" height="{height}" '
+            f'font-family="monospace" font-size="11">\n'
+            f'<text x="{_WIDTH / 2}" y="{_ROW}" text-anchor="middle" font-size="14">'
+            f"{html.escape(title)}</text>\n"
+        )
+        f.write("\n".join(rects))
+        f.write("\n</svg>\n")
+    return path
+
+
+# --- Profiled re-runs ---
+
+
+def _slug(text):
+    return re.sub(r"[^A-Za-z0-9]+", "_", str(text)).strip("_")
+
+
+def _repeat(solve, min_duration, max_runs=1000):
+    """Calls `solve` until `min_duration` seconds have passed. Returns the number of runs."""
+    runs = 0
+    start_time = time.perf_counter()
+    while runs < max_runs:
+        solve()
+        runs += 1
+        if time.perf_counter() - start_time >= min_duration:
+            break
+    return runs
+
+
+def profile_solve(module, n, flat, use_presolve=True, interval=0.001, min_duration=0.5):
+    """
+    Profiles `module` on one puzzle, presolve excluded (as in the timed run).
+    Returns (pstats.Stats, collapsed stacks, runs).
+    """
+    reduced = presolve.presolve(flat) if use_presolve else None
+
+    def solve():
+        if reduced is not None:
+            presolve.solve_presolved(module, reduced)
+        else:
+            module.solve(pipeline.to_grid(flat, n))
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        runs = _repeat(solve, min_duration)
+    finally:
+        profiler.disable()
+
+    with StackSampler(interval=interval, root=solve.__code__) as sampler:
+        _repeat(solve, min_duration)
+    return pstats.Stats(profiler), sampler.stacks, runs
+
+
+def profile_slowest(source, solvers, slowest, out_dir=DEFAULT_DIR, use_presolve=True, **kwargs):
+    """
+    Re-solves the (solver, puzzle) pairs of `slowest` (records, e.g.
+    SlowestSink.slowest) from `source` under both profilers and writes
+    their files to `out_dir`. Returns one entry per profiled pair.
+    """
+    wanted = {record["puzzle"] for record in slowest}
+    flats = {}
+    for puzzle_id, n, flat in pipeline.iter_puzzles(source):
+        if puzzle_id in wanted:
+            flats[puzzle_id] = (n, flat)
+            if len(flats) == len(wanted):
+                break
+
+    modules = dict(solvers)
+    os.makedirs(out_dir, exist_ok=True)
+    report = []
+    for rank, record in enumerate(slowest, 1):
+        module = modules.get(record["solver"])
+        if module is None or record["puzzle"] not in flats:
+            continue
+        n, flat = flats[record["puzzle"]]
+        try:
+            stats, stacks, runs = profile_solve(module, n, flat, use_presolve, **kwargs)
+        except Exception as e:
+            print(f"Profiling {record['solver']} on {record['puzzle']} failed: {e}", file=sys.stderr)
+            continue
+
+        base = os.path.join(out_dir, f"{rank:02d}_{_slug(record['solver'])}_{_slug(record['puzzle'])}")
+        stats.dump_stats(base + ".prof")
+        with open(base + ".txt", "w") as f:
+            stats.stream = f
+            stats.sort_stats("cumulative").print_stats(30)
+        write_collapsed(stacks, base + ".collapsed")
+        write_flamegraph(stacks, base + ".svg", f"{record['solver']} on {record['puzzle']}")
+        report.append(
+            {
+                "rank": rank,
+                "solver": record["solver"],
+                "puzzle": record["puzzle"],
+                "time": record["time"],
+                "runs": runs,
+                "samples": sum(stacks.values()),
+                "files": base,
+            }
+        )
+    return report
+
+
+def print_profile_report(report):
+    print("\n" + "=" * 100)
+    print(
+        f"{'RANK':<5} | {'SOLVER':<20} | {'PUZZLE':<12} | {'TIME (s)':<9} | {'RUNS':<5} | {'SAMPLES':<7} | FILES"
+    )
+    print("=" * 100)
+    for entry in report:
+        print(
+            f"{entry['rank']:<5} | {entry['solver']:<20} | {str(entry['puzzle']):<12} | "
+            f"{entry['time']:<9.4f} | {entry['runs']:<5} | {entry['samples']:<7} | {entry['files']}.*"
+        )
+    print("=" * 100)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Profile the slowest (solver, puzzle) pairs")
+    parser.add_argument("source", nargs="?", default=os.path.join("sudokus", "9x9"))
+    parser.add_argument("--solvers", default="Google OR-Tools,PySAT (Glucose4),Naive Backtracking")
+    parser.add_argument("--top", type=int, default=5, help="Number of slowest pairs to profile")
+    parser.add_argument("--out", default=DEFAULT_DIR)
+    parser.add_argument("--interval", type=float, default=0.001, help="Sampling interval (s)")
+    parser.add_argument("--no-presolve", action="store_true")
+    args = parser.parse_args()
+
+    solvers = solver_registry.load_solvers(args.solvers.split(","))
+    slowest_sink = SlowestSink(args.top)
+    pipeline.run_pipeline(args.source, solvers, [slowest_sink], use_presolve=not args.no_presolve)
+    report = profile_slowest(
+        args.source,
+        solvers,
+        slowest_sink.slowest,
+        args.out,
+        not args.no_presolve,
+        interval=args.interval,
+    )
+    print_profile_report(report)
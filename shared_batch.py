@@ -0,0 +1,403 @@
+"""
+Zero-copy shared-memory puzzle batches for multiprocess solving.
+
+A batch of B puzzles of side N lives in one `multiprocessing.shared_memory`
+segment, laid out as flat arrays:
+
+    times      B float64    solve time of each puzzle (seconds)
+    domains    B * N * N    optional presolve candidate bitmasks, uint64
+                            (all zero for a puzzle sent without domains)
+    puzzles    B * N * N    input cells, uint8 row-major (0 = empty)
+    solutions  B * N * N    output cells, uint8, written in place by workers
+    status     B uint8      PENDING, SOLVED, FAILED or ERROR
+
+Workers attach to a segment by name and only receive (start, stop) ranges,
+detaching when the range is done (the slots of the streaming pool stay
+attached until its processes exit); solutions are written back in place, so no grid is
+pickled in either direction. `solve_shared` is the batch API,
+`SharedSlotPool` the streaming executor used by pipeline.run_pipeline for
+process-mode backends, and `compare_throughput` measures both against the
+pickling path:
+
+    python shared_batch.py sudokus/25x25 --solver "Naive Backtracking" --workers 4
+"""
+
+import argparse
+import importlib
+import os
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+import pipeline
+import presolve
+import solver_registry
+import validator
+
+PENDING, SOLVED, FAILED, ERROR = 0, 1, 2, 3
+
+
+class SharedBatch:
+    """
+    B puzzles of side N in one shared memory segment (see the module docstring).
+    Created by the parent (`SharedBatch(n, count)`), attached by workers
+    (`SharedBatch(n, count, name)`), both with the same `domains` flag. Use
+    as a context manager or call close(); the creator also unlinks the
+    segment.
+    """
+
+    def __init__(self, n, count, name=None, domains=False):
+        self.n = n
+        self.count = count
+        cells = n * n
+        size = max(1, count * (8 + (8 * cells if domains else 0) + 2 * cells + 1))
+        self.owner = name is None
+        if self.owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.name = self.shm.name
+
+        buf = self.shm.buf
+        offset = 0
+        self.times = np.ndarray((count,), dtype=np.float64, buffer=buf, offset=offset)
+        offset += 8 * count
+        self.domains = None
+        if domains:
+            self.domains = np.ndarray((count, cells), dtype=np.uint64, buffer=buf, offset=offset)
+            offset += 8 * count * cells
+        self.puzzles = np.ndarray((count, n, n), dtype=np.uint8, buffer=buf, offset=offset)
+        offset += count * cells
+        self.solutions = np.ndarray((count, n, n), dtype=np.uint8, buffer=buf, offset=offset)
+        offset += count * cells
+        self.status = np.ndarray((count,), dtype=np.uint8, buffer=buf, offset=offset)
+
+    @classmethod
+    def from_puzzles(cls, flats, n):
+        """Creates a batch holding the given flat puzzles (bytes of N*N cells)."""
+        batch = cls(n, len(flats))
+        for i, flat in enumerate(flats):
+            batch.puzzles[i].reshape(-1)[:] = np.frombuffer(flat, dtype=np.uint8)
+        batch.status[:] = PENDING
+        return batch
+
+    def close(self):
+        # Views must be dropped before the mapping can be closed
+        self.times = self.domains = self.puzzles = self.solutions = self.status = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def process_pool(workers):
+    """
+    ProcessPoolExecutor whose workers share this process's resource tracker,
+    so a worker attaching a segment does not unlink it when it exits (the
+    tracker must be running before the workers are started).
+    """
+    resource_tracker.ensure_running()
+    return ProcessPoolExecutor(max_workers=workers)
+
+
+# --- Worker side ---
+
+# Per worker process: segments kept attached and imported backends
+_attached = {}
+_modules = {}
+
+
+def _attach(name, n, count, keep, domains=False):
+    """Attaches a segment; with `keep` it stays attached for the life of the process."""
+    batch = _attached.get(name)
+    if batch is None:
+        batch = SharedBatch(n, count, name, domains)
+        if keep:
+            _attached[name] = batch
+    return batch
+
+
+def _module(module_name):
+    module = _modules.get(module_name)
+    if module is None:
+        module = _modules[module_name] = importlib.import_module(module_name)
+    return module
+
+
+def _solve_range(name, n, count, start, stop, module_name, use_presolve, keep=False, domains=False):
+    """
+    Solves puzzles [start, stop) of a shared batch in place. Returns the
+    number solved. The segment is detached afterwards unless `keep`.
+    With `domains`, the segment carries the candidate bitmasks of presolved
+    puzzles, passed on to the backend as on the in-process paths.
+    """
+    batch = _attach(name, n, count, keep, domains)
+    try:
+        return _solve_attached(batch, start, stop, _module(module_name), use_presolve)
+    finally:
+        if name not in _attached:
+            batch.close()
+
+
+def _solve_attached(batch, start, stop, module, use_presolve):
+    solved = 0
+    for i in range(start, stop):
+        flat = batch.puzzles[i].tobytes()
+        start_time = time.perf_counter()
+        try:
+            if use_presolve:
+                result = presolve.solve_presolved(module, presolve.presolve(flat))
+            elif batch.domains is not None and batch.domains[i].any():
+                reduced = presolve.Presolved(batch.n, flat, batch.domains[i].tolist(), 0, 0.0)
+                result = presolve.solve_presolved(module, reduced)
+            else:
+                result = module.solve(batch.puzzles[i].tolist())
+            if result:
+                batch.solutions[i] = result
+                batch.status[i] = SOLVED
+                solved += 1
+            else:
+                batch.status[i] = FAILED
+        except Exception:
+            batch.status[i] = ERROR
+        batch.times[i] = time.perf_counter() - start_time
+    return solved
+
+
+def _warm_up(module_name):
+    _module(module_name)
+
+
+def _solve_pickled(module_name, grid):
+    start_time = time.perf_counter()
+    result = _module(module_name).solve(grid)
+    return result, time.perf_counter() - start_time
+
+
+# --- Batch API ---
+
+
+def _module_name(solver):
+    """Accepts a registry name ("Naive Backtracking") or a module path."""
+    return solver_registry.BUILTIN_SOLVERS.get(solver, solver)
+
+
+def solve_shared(flats, n, solver, workers=None, chunk=None, use_presolve=False, executor=None):
+    """
+    Solves a batch of flat puzzles with `solver` on a process pool through
+    shared memory. Returns (solutions (B, N, N) uint8, status (B,), times (B,)).
+    Solutions are copied out of the segment before it is released.
+    """
+    module_name = _module_name(solver)
+    workers = workers or os.cpu_count() or 1
+    chunk = chunk or max(1, len(flats) // (4 * workers))
+    own_executor = executor is None
+    if own_executor:
+        executor = process_pool(workers)
+    try:
+        with SharedBatch.from_puzzles(flats, n) as batch:
+            futures = [
+                executor.submit(
+                    _solve_range,
+                    batch.name,
+                    n,
+                    batch.count,
+                    start,
+                    min(start + chunk, batch.count),
+                    module_name,
+                    use_presolve,
+                )
+                for start in range(0, batch.count, chunk)
+            ]
+            for future in futures:
+                future.result()
+            return batch.solutions.copy(), batch.status.copy(), batch.times.copy()
+    finally:
+        if own_executor:
+            executor.shutdown()
+
+
+def solve_pickled(flats, n, solver, workers=None, chunk=None, executor=None):
+    """Same as solve_shared, but grids and solutions are pickled to and from the workers."""
+    module_name = _module_name(solver)
+    workers = workers or os.cpu_count() or 1
+    chunk = chunk or max(1, len(flats) // (4 * workers))
+    own_executor = executor is None
+    if own_executor:
+        executor = process_pool(workers)
+    try:
+        grids = [[list(flat[r * n : (r + 1) * n]) for r in range(n)] for flat in flats]
+        solutions = np.zeros((len(flats), n, n), dtype=np.uint8)
+        status = np.full(len(flats), FAILED, dtype=np.uint8)
+        times = np.zeros(len(flats))
+        tasks = executor.map(_solve_pickled, [module_name] * len(grids), grids, chunksize=chunk)
+        for i, (result, elapsed) in enumerate(tasks):
+            times[i] = elapsed
+            if result:
+                solutions[i] = result
+                status[i] = SOLVED
+        return solutions, status, times
+    finally:
+        if own_executor:
+            executor.shutdown()
+
+
+# --- Streaming executor (pipeline process mode) ---
+
+
+class SharedSlotPool:
+    """
+    Process pool executor for one backend whose inputs and outputs go
+    through shared memory slots instead of pickles. `submit(n, flat, reduced)`
+    returns a Future of (solution grid or None, solve time), like the other
+    pipeline executors. With `reduced`, the presolved grid and its candidate
+    domains are sent, so backends taking domains (Z3) get the same encoding
+    as on the other paths.
+    """
+
+    mode = "process"
+
+    def __init__(self, module_name, workers, slots=None):
+        self.module_name = module_name
+        self.workers = workers
+        self.slots = slots or 2 * workers + 1
+        self.executor = process_pool(workers)
+        self._batches = {}
+        self._free = {}
+        self._lock = threading.Lock()
+
+    def _batch(self, n):
+        with self._lock:
+            if n not in self._batches:
+                self._batches[n] = SharedBatch(n, self.slots, domains=True)
+                free = self._free[n] = queue.Queue()
+                for slot in range(self.slots):
+                    free.put(slot)
+            return self._batches[n], self._free[n]
+
+    def warm_up(self):
+        list(self.executor.map(time.sleep, [0.01] * self.workers))
+
+    def submit(self, n, flat, reduced=None):
+        batch, free = self._batch(n)
+        slot = free.get()
+        cells = reduced.flat if reduced is not None else flat
+        batch.puzzles[slot].reshape(-1)[:] = np.frombuffer(cells, dtype=np.uint8)
+        if reduced is not None and reduced.domains is not None:
+            batch.domains[slot] = reduced.domains
+        else:
+            batch.domains[slot] = 0
+        batch.status[slot] = PENDING
+
+        outer = Future()
+        inner = self.executor.submit(
+            _solve_range,
+            batch.name,
+            n,
+            batch.count,
+            slot,
+            slot + 1,
+            self.module_name,
+            False,
+            True,
+            True,
+        )
+
+        def done(future):
+            try:
+                future.result()
+                status = batch.status[slot]
+                elapsed = float(batch.times[slot])
+                if status == ERROR:
+                    raise RuntimeError(f"{self.module_name} raised on slot {slot}")
+                result = batch.solutions[slot].tolist() if status == SOLVED else None
+            except BaseException as e:
+                free.put(slot)
+                outer.set_exception(e)
+                return
+            free.put(slot)
+            outer.set_result((result, elapsed))
+
+        inner.add_done_callback(done)
+        return outer
+
+    def shutdown(self):
+        self.executor.shutdown(cancel_futures=True)
+        for batch in self._batches.values():
+            batch.close()
+        self._batches.clear()
+
+
+# --- Throughput comparison ---
+
+
+def compare_throughput(source, solver, workers=None, limit=None, repeat=3):
+    """
+    Solves the puzzles of `source` through shared memory and through the
+    pickling path on the same warm pool. Returns {mode: {"puzzles",
+    "wall", "solved"}} with the best wall time over `repeat` runs.
+    """
+    flats = []
+    n = None
+    for _, size, flat in pipeline.iter_puzzles(source):
+        if n is None:
+            n = size
+        if size == n:
+            flats.append(flat)
+        if limit and len(flats) >= limit:
+            break
+    if not flats:
+        raise ValueError(f"No puzzles in {source}")
+
+    workers = workers or os.cpu_count() or 1
+    report = {}
+    with process_pool(workers) as executor:
+        list(executor.map(_warm_up, [_module_name(solver)] * workers))
+        for mode, run in (("pickle", solve_pickled), ("shared memory", solve_shared)):
+            best = float("inf")
+            for _ in range(repeat):
+                start_time = time.perf_counter()
+                solutions, status, _ = run(flats, n, solver, workers, executor=executor)
+                best = min(best, time.perf_counter() - start_time)
+            clues = np.stack([np.frombuffer(f, dtype=np.uint8).reshape(n, n) for f in flats])
+            valid = validator.validate_batch(solutions.astype(np.int64), clues) & (status == SOLVED)
+            report[mode] = {"puzzles": len(flats), "wall": best, "solved": int(valid.sum())}
+    return report
+
+
+def print_throughput_table(report):
+    print("\n" + "=" * 70)
+    print(f"{'MODE':<15} | {'PUZZLES':<8} | {'SOLVED':<8} | {'WALL (s)':<10} | {'PUZZLES/S':<10}")
+    print("=" * 70)
+    for mode, data in report.items():
+        rate = data["puzzles"] / data["wall"] if data["wall"] else 0.0
+        print(
+            f"{mode:<15} | {data['puzzles']:<8} | {data['solved']:<8} | {data['wall']:<10.4f} | {rate:<10.1f}"
+        )
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Shared memory vs pickling for multiprocess solving")
+    parser.add_argument("source", nargs="?", default=os.path.join("sudokus", "9x9"))
+    parser.add_argument("--solver", default="Naive Backtracking")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    try:
+        report = compare_throughput(args.source, args.solver, args.workers, args.limit, args.repeat)
+    except (ImportError, ValueError) as e:
+        print(f"Comparison failed: {e}", file=sys.stderr)
+        sys.exit(1)
+    print_throughput_table(report)
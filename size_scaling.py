@@ -0,0 +1,230 @@
+"""
+Scaling curve of every backend against the grid side N.
+
+For each N in SIZES (9, 16, 25, 36, 49, 64), `count` puzzles are generated
+with a controlled clue density (fraction of given cells; uniqueness is not
+enforced, which would dominate the cost at large N) or loaded from
+`sudokus/<N>x<N>` with `load=True`. Each (backend, N) run happens in its own
+worker process, so that:
+- the time budget is enforced by terminating the worker,
+- memory is the worker's peak RSS (native solver memory included), reported
+  both raw and above the worker's baseline after importing the backend.
+
+A backend that exceeds the budget (or fails a puzzle) at some N is dropped
+for all larger sizes. Time and memory are then fitted on a log-log scale,
+time ~ a * N^k, and the exponent k is reported with the raw curve (also
+written to results/size_scaling.csv).
+
+    python size_scaling.py --solvers "Google OR-Tools,PySAT (Glucose4)" --budget 60
+"""
+
+import argparse
+import csv
+import itertools
+import math
+import multiprocessing as mp
+import os
+import random
+import resource
+import statistics
+import time
+
+import numpy as np
+
+import dataset
+import pipeline
+import solver_registry
+import sudoku_generator
+import validator
+
+SIZES = (9, 16, 25, 36, 49, 64)
+
+# Fraction of the cells given as clues
+DEFAULT_DENSITY = 0.45
+
+
+def make_puzzles(n, count, density=DEFAULT_DENSITY, seed=0):
+    """Generates `count` flat puzzles of side n keeping `density` of the cells."""
+    base = math.isqrt(n)
+    rng = random.Random(seed * 1000 + n)
+    clues = round(density * n * n)
+    puzzles = []
+    for _ in range(count):
+        flat = bytearray(dataset.flatten(sudoku_generator.generate_solution(base, rng)))
+        for cell in rng.sample(range(n * n), n * n - clues):
+            flat[cell] = 0
+        puzzles.append(bytes(flat))
+    return puzzles
+
+
+def load_puzzles(n, count, base_path="sudokus"):
+    """First `count` puzzles of `sudokus/<N>x<N>`, or None if the folder does not exist."""
+    path = os.path.join(base_path, f"{n}x{n}")
+    if not os.path.isdir(path):
+        return None
+    return [flat for _, _, flat in itertools.islice(pipeline.iter_puzzles(path), count)]
+
+
+def _peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _worker(name, n, puzzles, results):
+    module = solver_registry.load_solver(name)
+    if module is None:
+        results.put({"error": solver_registry.get_unavailable().get(name, "unavailable")})
+        return
+    baseline = _peak_rss_mb()
+    times = []
+    for flat in puzzles:
+        start_time = time.perf_counter()
+        try:
+            solution = module.solve(pipeline.to_grid(flat, n))
+        except Exception as e:
+            results.put({"error": f"{type(e).__name__}: {e}"})
+            return
+        times.append(time.perf_counter() - start_time)
+        if not solution or not validator.validate_solution(solution, flat):
+            results.put({"error": "invalid solution"})
+            return
+    peak = _peak_rss_mb()
+    results.put({"times": times, "peak_mb": peak, "memory_mb": peak - baseline})
+
+
+def run_size(name, n, puzzles, budget):
+    """
+    Solves `puzzles` with backend `name` in a fresh process, within `budget`
+    seconds in total. Returns a result dict with "status" ("ok", "budget",
+    "error") and, when ok, "time" (median per puzzle), "peak_mb" and "memory_mb".
+    """
+    ctx = mp.get_context("spawn")
+    results = ctx.Queue()
+    process = ctx.Process(target=_worker, args=(name, n, puzzles, results), daemon=True)
+    start_time = time.perf_counter()
+    process.start()
+    try:
+        outcome = results.get(timeout=budget)
+    except Exception:
+        outcome = None
+    finally:
+        if process.is_alive():
+            process.terminate()
+        process.join()
+    wall = time.perf_counter() - start_time
+
+    if outcome is None:
+        return {"status": "budget", "wall": wall}
+    if "error" in outcome:
+        return {"status": "error", "wall": wall, "error": outcome["error"]}
+    return {
+        "status": "ok",
+        "wall": wall,
+        "time": statistics.median(outcome["times"]),
+        "peak_mb": outcome["peak_mb"],
+        "memory_mb": outcome["memory_mb"],
+    }
+
+
+def fit_exponent(sizes, values):
+    """Slope k of log(value) = k * log(N) + c (None with fewer than 2 usable points)."""
+    points = [(n, v) for n, v in zip(sizes, values) if v and v > 0]
+    if len(points) < 2:
+        return None
+    x = np.log([n for n, _ in points])
+    y = np.log([v for _, v in points])
+    slope, _ = np.polyfit(x, y, 1)
+    return float(slope)
+
+
+def scaling_benchmark(
+    names, sizes=SIZES, count=3, density=DEFAULT_DENSITY, budget=60.0, load=False, seed=0
+):
+    """
+    Runs every backend on every size until it exceeds the budget.
+    Returns {name: {n: result dict}} (see run_size); dropped sizes are absent.
+    """
+    report = {name: {} for name in names}
+    active = list(names)
+    for n in sizes:
+        puzzles = load_puzzles(n, count) if load else None
+        if not puzzles:
+            puzzles = make_puzzles(n, count, density, seed)
+        for name in list(active):
+            result = run_size(name, n, puzzles, budget)
+            report[name][n] = result
+            if result["status"] == "ok":
+                print(f"{name} N={n}: {result['time']:.4f}s/puzzle, {result['peak_mb']:.0f} MB peak")
+            else:
+                reason = result.get("error", f"over the {budget:.0f}s budget")
+                print(f"{name} N={n}: dropped ({reason})")
+                active.remove(name)
+    return report
+
+
+def print_scaling_report(report, sizes=SIZES):
+    width = 32 + 12 * len(sizes) + 24
+    print("\n" + "=" * width)
+    header = f"{'SOLVER':<20} | {'METRIC':<7}"
+    for n in sizes:
+        header += f" | {f'N={n}':<9}"
+    print(header + f" | {'FIT (log-log)':<20}")
+    print("=" * width)
+    for name, results in report.items():
+        ok = {n: r for n, r in results.items() if r["status"] == "ok"}
+        for metric, key, fmt in (("time s", "time", "{:.4f}"), ("mem MB", "memory_mb", "{:.1f}")):
+            line = f"{name if key == 'time' else '':<20} | {metric:<7}"
+            for n in sizes:
+                if n in ok:
+                    cell = fmt.format(ok[n][key])
+                elif n in results:
+                    cell = "dropped"
+                else:
+                    cell = "-"
+                line += f" | {cell:<9}"
+            exponent = fit_exponent(list(ok), [ok[n][key] for n in ok])
+            fit = f"~ N^{exponent:.2f}" if exponent is not None else "-"
+            print(line + f" | {fit:<20}")
+    print("=" * width)
+
+
+def save_scaling_csv(report, path=os.path.join("results", "size_scaling.csv")):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["solver", "n", "status", "time", "peak_mb", "memory_mb", "log_n", "log_time"])
+        for name, results in report.items():
+            for n, r in results.items():
+                ok = r["status"] == "ok"
+                writer.writerow(
+                    [
+                        name,
+                        n,
+                        r["status"],
+                        r.get("time", ""),
+                        r.get("peak_mb", ""),
+                        r.get("memory_mb", ""),
+                        math.log(n),
+                        math.log(r["time"]) if ok and r["time"] > 0 else "",
+                    ]
+                )
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backend scaling curve against the grid side N")
+    parser.add_argument("--solvers", default="Google OR-Tools,PySAT (Glucose4),Z3 Solver")
+    parser.add_argument("--sizes", default=",".join(map(str, SIZES)))
+    parser.add_argument("--count", type=int, default=3, help="Puzzles per size")
+    parser.add_argument("--density", type=float, default=DEFAULT_DENSITY, help="Fraction of clues")
+    parser.add_argument("--budget", type=float, default=60.0, help="Seconds per backend and size")
+    parser.add_argument("--load", action="store_true", help="Use sudokus/<N>x<N> when it exists")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    sizes = tuple(int(n) for n in args.sizes.split(","))
+    report = scaling_benchmark(
+        args.solvers.split(","), sizes, args.count, args.density, args.budget, args.load, args.seed
+    )
+    print_scaling_report(report, sizes)
+    print(f"Curve written to {save_scaling_csv(report)}")
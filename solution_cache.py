@@ -0,0 +1,271 @@
+"""
+Symmetry-canonical solution cache.
+
+Two puzzles that differ only by a Sudoku symmetry (band/stack permutations,
+row/column permutations inside a band/stack, transposition and digit
+relabelling) have the same solution up to that symmetry. `canonicalize`
+maps a grid to a canonical form plus the transform that produced it, so a
+solution found for one of them can be mapped back to any other.
+
+Canonical form:
+1. Rows are ordered by a label-free invariant (clue count plus the clue
+   counts of the columns they hit); bands are ordered by the sorted keys of
+   their rows. Columns and stacks likewise.
+2. Orderings that tie on those keys are enumerated (up to `limit`) and the
+   lexicographically smallest grid wins, after relabelling digits in order
+   of first appearance. Both orientations (grid and transpose) are tried.
+
+If the tie enumeration is truncated, equivalent puzzles may get different
+keys (a cache miss), but the stored transform is always exact, so a hit
+always returns a correct solution.
+"""
+
+import itertools
+import math
+import os
+import pickle
+from collections import OrderedDict
+
+
+# --- Canonicalization ---
+
+
+class Transform:
+    """
+    Maps an original grid G to its canonical form C:
+        H = transpose(G) if transposed else G
+        C[i][j] = digit_map[H[rows[i]][cols[j]]]
+    """
+
+    __slots__ = ("transposed", "rows", "cols", "digit_map")
+
+    def __init__(self, transposed, rows, cols, digit_map):
+        self.transposed = transposed
+        self.rows = rows
+        self.cols = cols
+        self.digit_map = digit_map
+
+    def apply(self, grid):
+        h = _transpose(grid) if self.transposed else grid
+        dm = self.digit_map
+        return [[dm[h[r][c]] for c in self.cols] for r in self.rows]
+
+    def invert(self, canonical_grid):
+        """Maps a canonical (solved) grid back to the original frame."""
+        n = len(canonical_grid)
+        inverse_digits = [0] * (n + 1)
+        for original, canonical in enumerate(self.digit_map):
+            inverse_digits[canonical] = original
+
+        h = [[0] * n for _ in range(n)]
+        for i, r in enumerate(self.rows):
+            row = canonical_grid[i]
+            for j, c in enumerate(self.cols):
+                h[r][c] = inverse_digits[row[j]]
+        return _transpose(h) if self.transposed else h
+
+
+def _transpose(grid):
+    return [list(col) for col in zip(*grid)]
+
+
+def _line_orderings(keys, m, limit):
+    """
+    Yields up to `limit` line orderings (band by band) consistent with sorting
+    lines by `keys` inside each band and bands by their sorted line keys.
+    """
+    bands = [list(range(b * m, (b + 1) * m)) for b in range(m)]
+    band_keys = [tuple(sorted(keys[i] for i in band)) for band in bands]
+
+    def tie_permutations(items, key):
+        # Sort, then every permutation of each group of equal keys
+        items = sorted(items, key=key)
+        groups = [list(g) for _, g in itertools.groupby(items, key=key)]
+        for choice in itertools.product(*(itertools.permutations(g) for g in groups)):
+            yield [x for part in choice for x in part]
+
+    band_orders = tie_permutations(range(m), lambda b: band_keys[b])
+    line_orders = [list(itertools.islice(tie_permutations(band, lambda i: keys[i]), limit)) for band in bands]
+
+    count = 0
+    for band_order in band_orders:
+        for choice in itertools.product(*(line_orders[b] for b in band_order)):
+            yield [i for part in choice for i in part]
+            count += 1
+            if count >= limit:
+                return
+
+
+def _relabel(grid_rows):
+    """
+    Relabels digits in order of first appearance. Returns (grid, digit_map).
+    Digits absent from the grid get the remaining labels in increasing order;
+    they are interchangeable in any solution, so the choice is free.
+    """
+    n = len(grid_rows)
+    digit_map = [0] * (n + 1)
+    next_label = 1
+    out = []
+    for row in grid_rows:
+        new_row = []
+        for v in row:
+            if v and not digit_map[v]:
+                digit_map[v] = next_label
+                next_label += 1
+            new_row.append(digit_map[v])
+        out.append(new_row)
+    for v in range(1, n + 1):
+        if not digit_map[v]:
+            digit_map[v] = next_label
+            next_label += 1
+    return out, digit_map
+
+
+def canonicalize(grid, limit=16):
+    """
+    Returns (canonical_key, transform) for `grid`.
+    canonical_key is a bytes object (N*N cells of the canonical grid).
+    """
+    n = len(grid)
+    m = math.isqrt(n)
+    best = None
+
+    for transposed in (False, True):
+        h = _transpose(grid) if transposed else grid
+        row_counts = [sum(1 for v in row if v) for row in h]
+        col_counts = [sum(1 for r in range(n) if h[r][c]) for c in range(n)]
+        row_keys = [
+            (row_counts[r], tuple(sorted(col_counts[c] for c in range(n) if h[r][c])))
+            for r in range(n)
+        ]
+        col_keys = [
+            (col_counts[c], tuple(sorted(row_counts[r] for r in range(n) if h[r][c])))
+            for c in range(n)
+        ]
+
+        col_orders = list(_line_orderings(col_keys, m, limit))
+        for rows in _line_orderings(row_keys, m, limit):
+            for cols in col_orders:
+                candidate, digit_map = _relabel([[h[r][c] for c in cols] for r in rows])
+                if best is None or candidate < best[0]:
+                    best = (candidate, Transform(transposed, rows, cols, digit_map))
+
+    canonical, transform = best
+    return bytes(v for row in canonical for v in row), transform
+
+
+# --- Cache ---
+
+
+class SolutionCache:
+    """
+    Bounded LRU cache of canonical puzzle -> canonical solution.
+    If `path` is given, the cache is loaded from / saved to that file, so it
+    persists across runs.
+    """
+
+    def __init__(self, maxsize=10000, path=None, limit=16):
+        self.maxsize = maxsize
+        self.path = path
+        self.limit = limit
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        if path and os.path.exists(path):
+            with open(path, "rb") as f:
+                self._data.update(pickle.load(f))
+            while len(self._data) > maxsize:
+                self._data.popitem(last=False)
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key):
+        solution = self._data.get(key)
+        if solution is None:
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return solution
+
+    def put(self, key, solution):
+        self._data[key] = solution
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def save(self):
+        if self.path:
+            with open(self.path, "wb") as f:
+                pickle.dump(self._data, f)
+
+
+class CachedSolver:
+    """
+    Puts a SolutionCache in front of any solver module exposing `solve(grid)`.
+    Like the wrapped modules, `solve` fills the grid IN-PLACE and returns it.
+    """
+
+    def __init__(self, module, cache=None):
+        self.module = module
+        self.cache = cache if cache is not None else SolutionCache()
+
+    def solve(self, grid):
+        n = len(grid)
+        key, transform = canonicalize(grid, self.cache.limit)
+        key = (n, key)
+
+        cached = self.cache.get(key)
+        if cached is not None:
+            canonical_solution = [list(cached[r * n : (r + 1) * n]) for r in range(n)]
+            solution = transform.invert(canonical_solution)
+        else:
+            solution = self.module.solve(grid)
+            if not solution:
+                return None
+            canonical_solution = transform.apply(solution)
+            self.cache.put(key, bytes(v for row in canonical_solution for v in row))
+
+        for r in range(n):
+            grid[r][:] = solution[r]
+        return grid
+
+
+def cached_solvers(solvers, maxsize=10000, cache_dir=None):
+    """
+    Wraps a list of (name, module) pairs with one cache per solver.
+    With `cache_dir`, each solver's cache is persisted to `<cache_dir>/<name>.pkl`.
+    """
+    wrapped = []
+    for name, module in solvers:
+        path = None
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+            safe = "".join(ch if ch.isalnum() else "_" for ch in name)
+            path = os.path.join(cache_dir, f"{safe}.pkl")
+        wrapped.append((name, CachedSolver(module, SolutionCache(maxsize, path))))
+    return wrapped
+
+
+def print_cache_stats(solvers):
+    """Prints the hit rate of every cached solver in `solvers` (if any)."""
+    cached = [(name, s.cache) for name, s in solvers if isinstance(s, CachedSolver)]
+    if not cached:
+        return
+    print(f"{'SOLVER':<20} | {'HITS':<8} | {'MISSES':<8} | {'HIT RATE':<8}")
+    for name, cache in cached:
+        print(
+            f"{name:<20} | {cache.hits:<8} | {cache.misses:<8} | {cache.hit_rate():<8.1%}"
+        )
+
+
+def save_caches(solvers):
+    """Persists the caches of the cached solvers that have a path."""
+    for _, s in solvers:
+        if isinstance(s, CachedSolver):
+            s.cache.save()
@@ -0,0 +1,142 @@
+"""
+The contract of a solver module (or object, e.g. solution_cache.CachedSolver).
+
+Required:
+    solve(grid)
+        Solves an N x N list-of-lists grid (0 = empty) in place and returns
+        it, or returns None when no solution is found.
+
+Optional (looked up with getattr, every caller has a fallback):
+    solve_many(grids, domains=None)
+        Lazily solves an iterable of grids: returns an iterator yielding one
+        result per grid, in order, with the same meaning as solve(grid). An
+        exception ends the iteration. Native implementations keep state
+        across puzzles (models, engines, processes) to pay the fixed costs
+        once; the generic fallback below calls solve once per grid and
+        yields a (falsy) Raised marker for a grid whose solve raised. The
+        `domains` argument (an iterable of candidate bitmasks or None, one
+        per grid) is only passed when solve itself accepts domains.
+    solve(grid, domains=None)
+        Candidate bitmasks from the presolver (presolve.solve_presolved).
+    encode(grid, domains=None)
+        Model construction alone (presolve.encoding_savings).
+    solve_async(grid, timeout=None)
+        Coroutine version of solve (pipeline.solve_async).
+    count_solutions(grid, limit=2)
+        Stops once `limit` solutions are found (uniqueness.py).
+    THREAD_SAFE, RELEASES_GIL
+        Concurrency declarations (pipeline.execution_mode).
+    GRID_INPUT
+        solve accepts a board.Grid (grid[r][c] reads and writes) instead of
+        a list of lists (board.solver_input).
+"""
+
+import itertools
+import time
+
+import presolve
+
+
+def has_native_batch(module):
+    """True if `module` implements solve_many itself."""
+    return callable(getattr(module, "solve_many", None))
+
+
+class Raised:
+    """Result of a grid whose solve raised `error` (generic solve_many)."""
+
+    __slots__ = ("error",)
+
+    def __init__(self, error):
+        self.error = error
+
+    def __bool__(self):
+        return False
+
+    def __repr__(self):
+        return f"Raised({self.error!r})"
+
+
+def _solve_each(module, grids, domains=None):
+    # One failing grid does not end the batch
+    if domains is None:
+        domains = itertools.repeat(None)
+    for grid, cell_domains in zip(grids, domains):
+        try:
+            if cell_domains is None:
+                yield module.solve(grid)
+            else:
+                yield module.solve(grid, domains=cell_domains)
+        except Exception as e:
+            yield Raised(e)
+
+
+def solve_many(module, grids, domains=None):
+    """
+    Iterator of the results of `module` on `grids` (native batch path when
+    available). `domains` optionally holds the presolve candidate bitmasks
+    of every grid (None for a grid without); they are dropped for modules
+    whose solve does not take them, as in presolve.solve_presolved.
+    """
+    if domains is not None and not presolve.accepts_domains(module):
+        domains = None
+    if has_native_batch(module):
+        if domains is None:
+            return iter(module.solve_many(grids))
+        if presolve.accepts_domains(module, "solve_many"):
+            return iter(module.solve_many(grids, domains=domains))
+    return _solve_each(module, grids, domains)
+
+
+def _timed(iterator, results, times, errors, start):
+    """
+    Fills the slots from `start` on with timed results. Returns the next
+    unfilled slot: it stops after a slot that raised or at the end of
+    `iterator`.
+    """
+    i = start
+    try:
+        while i < len(results):
+            start_time = time.perf_counter()
+            try:
+                result = next(iterator)
+            except StopIteration:
+                break
+            except Exception:
+                times[i] = time.perf_counter() - start_time
+                errors[i] = True
+                return i + 1
+            times[i] = time.perf_counter() - start_time
+            if isinstance(result, Raised):
+                errors[i] = True
+            else:
+                results[i] = result
+            i += 1
+    finally:
+        if hasattr(iterator, "close"):
+            iterator.close()
+    return i
+
+
+def solve_many_timed(module, grids, domains=None):
+    """
+    Drives solve_many over `grids`, timing every result (the time to
+    produce it, so setup costs land on the first one). Returns (results,
+    times, errors). A grid whose solve raised is an error on its own: when
+    a native solve_many raises or stops early, the grids after it are
+    solved one at a time.
+    """
+    grids = list(grids)
+    if domains is not None:
+        domains = list(domains)
+        if not presolve.accepts_domains(module):
+            domains = None
+    count = len(grids)
+    results = [None] * count
+    times = [0.0] * count
+    errors = [False] * count
+    done = _timed(solve_many(module, grids, domains), results, times, errors, 0)
+    if done < count:
+        rest = _solve_each(module, grids[done:], domains[done:] if domains is not None else None)
+        _timed(rest, results, times, errors, done)
+    return results, times, errors
@@ -0,0 +1,146 @@
+import importlib
+import sys
+import time
+from importlib import metadata
+
+# Entry point group used by third-party packages to register extra solvers.
+# A package exposes a solver by declaring, e.g. in its pyproject.toml:
+#
+#   [project.entry-points."sudoku_solvers"]
+#   "My Solver" = "my_package.my_solver"
+#
+# The target must be a module (or object) with a `solve(grid)` function.
+ENTRY_POINT_GROUP = "sudoku_solvers"
+
+# Built-in solvers: display name -> module path. Nothing is imported here.
+BUILTIN_SOLVERS = {
+    "CLIPS": "solvers.clips_solver",
+    "Google OR-Tools": "solvers.googleORTools_solver",
+    "Z3 Solver": "solvers.z3_solver",
+    "Prolog (PySwip)": "solvers.prolog_solver",
+    "Picat Solver": "solvers.picat_solver",
+    "Naive Backtracking": "solvers.naive_backtracking",
+    "PySAT (Glucose4)": "solvers.pysat_solver",
+    "PuLP Solver": "solvers.pulp_solver",
+    "LLM (Gemini)": "solvers.llm_solver",
+    "Portfolio": "solvers.portfolio_solver",
+}
+
+# Loaded solvers and their cold-start cost, filled on demand.
+_loaded = {}
+_load_times = {}
+_unavailable = {}
+
+
+def _entry_point_solvers():
+    """Returns the entry points registered under ENTRY_POINT_GROUP."""
+    try:
+        return {ep.name: ep for ep in metadata.entry_points(group=ENTRY_POINT_GROUP)}
+    except Exception:
+        return {}
+
+
+def available_solvers():
+    """Returns the names of every known solver (built-in and plugins), without importing them."""
+    names = list(BUILTIN_SOLVERS)
+    names.extend(n for n in _entry_point_solvers() if n not in BUILTIN_SOLVERS)
+    return names
+
+
+def register_solver(name, target):
+    """
+    Registers a solver at runtime.
+    `target` is either a module path (imported lazily) or an already
+    imported object exposing `solve(grid)`.
+    """
+    if isinstance(target, str):
+        BUILTIN_SOLVERS[name] = target
+    else:
+        _loaded[name] = target
+        _load_times[name] = {"import": 0.0, "init": 0.0}
+    _unavailable.pop(name, None)
+
+
+def load_solver(name):
+    """
+    Imports (and initializes) the solver `name` on first use.
+    Returns the solver module, or None if the backend is not available.
+
+    Import and initialization are timed separately. A module may expose an
+    optional `init()` function for expensive one-off set-up (engines, JVMs...),
+    so that cost is not folded into the first solve.
+    """
+    if name in _loaded:
+        return _loaded[name]
+    if name in _unavailable:
+        return None
+
+    # 1. Import
+    start_time = time.perf_counter()
+    try:
+        if name in BUILTIN_SOLVERS:
+            module = importlib.import_module(BUILTIN_SOLVERS[name])
+        else:
+            entry_point = _entry_point_solvers().get(name)
+            if entry_point is None:
+                raise KeyError(f"Unknown solver '{name}'")
+            module = entry_point.load()
+    except Exception as e:
+        # ImportError for missing libraries, but also any error raised at import time
+        _unavailable[name] = str(e)
+        return None
+    import_time = time.perf_counter() - start_time
+
+    # 2. Initialization
+    start_time = time.perf_counter()
+    init = getattr(module, "init", None)
+    if callable(init):
+        try:
+            init()
+        except Exception as e:
+            _unavailable[name] = f"init failed: {e}"
+            return None
+    init_time = time.perf_counter() - start_time
+
+    _loaded[name] = module
+    _load_times[name] = {"import": import_time, "init": init_time}
+    return module
+
+
+def load_solvers(names):
+    """
+    Loads the selected solvers and returns a list of (name, module) pairs,
+    skipping (with a warning) those whose backend is not available.
+    """
+    solvers = []
+    for name in names:
+        module = load_solver(name)
+        if module is None:
+            print(f"Skipping solver '{name}': {_unavailable[name]}", file=sys.stderr)
+            continue
+        solvers.append((name, module))
+    return solvers
+
+
+def get_load_times():
+    """Returns {name: {"import": seconds, "init": seconds}} for the loaded solvers."""
+    return dict(_load_times)
+
+
+def get_unavailable():
+    """Returns {name: reason} for the solvers that could not be loaded."""
+    return dict(_unavailable)
+
+
+def print_load_times():
+    print("\n" + "=" * 60)
+    print(f"{'SOLVER':<20} | {'IMPORT (s)':<10} | {'INIT (s)':<10} | {'TOTAL (s)':<10}")
+    print("=" * 60)
+    for name, times in _load_times.items():
+        total = times["import"] + times["init"]
+        print(
+            f"{name:<20} | {times['import']:<10.4f} | {times['init']:<10.4f} | {total:<10.4f}"
+        )
+    for name in _unavailable:
+        print(f"{name:<20} | {'-':<10} | {'-':<10} | {'unavailable':<10}")
+    print("=" * 60)
@@ -0,0 +1,482 @@
+"""
+Long-lived local solver service.
+
+The selected backends are loaded (and initialized) once at start-up and stay
+warm. Each backend has a single worker thread fed by a queue: concurrent
+requests for the same backend are drained together and solved as one batch
+(the batch is presolved, solved and validated in one go), so engines that
+are not thread-safe are never entered twice.
+
+API (HTTP/1.1 over TCP or a Unix socket):
+
+    GET  /solvers                   -> {"solvers": [names]}
+    POST /solve?solver=NAME         -> solve one or more puzzles
+
+A /solve body is either
+- JSON (`Content-Type: application/json`): {"grid": [[...]]} or
+  {"puzzles": [grid or one-line string, ...]}. The response holds one
+  {"status", "solution", "queue_time", "solve_time", "batch_size"} per puzzle;
+- binary (`Content-Type: application/octet-stream`): an in-memory packed
+  dataset (dataset.pack). The response is a packed dataset with the
+  solutions (all zeros when unsolved); statuses and timings are returned in
+  the X-Status, X-Queue-Time and X-Solve-Time headers (comma separated).
+
+    python solver_service.py serve --solvers "Google OR-Tools,PySAT (Glucose4)"
+    python solver_service.py load sudokus/9x9 --solver "Google OR-Tools" --concurrency 8
+"""
+
+import argparse
+import http.client
+import json
+import math
+import os
+import queue
+import socket
+import socketserver
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, urlparse
+
+import numpy as np
+
+import board
+import dataset
+import pipeline
+import presolve
+import solver_protocol
+import solver_registry
+import validator
+
+DEFAULT_PORT = 8765
+
+# A worker takes at most this many queued requests per batch
+MAX_BATCH = 32
+
+BINARY_TYPE = "application/octet-stream"
+JSON_TYPE = "application/json"
+
+
+# --- Warm backend pools ---
+
+
+class BackendWorker:
+    """
+    Owns one warm backend module and the thread that runs it.
+    `submit(n, flat)` returns a Future resolved with a result dict:
+    {"status", "solution" (flat bytes or None), "queue_time", "solve_time", "batch_size"}.
+    """
+
+    def __init__(self, name, module, max_batch=MAX_BATCH, use_presolve=True):
+        self.name = name
+        self.module = module
+        self.max_batch = max_batch
+        self.use_presolve = use_presolve
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name=f"solver-{name}", daemon=True)
+        self._thread.start()
+
+    def submit(self, n, flat):
+        future = Future()
+        self._queue.put((n, bytes(flat), time.perf_counter(), future))
+        return future
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            # Drain whatever arrived meanwhile into the same batch
+            batch = [item]
+            while len(batch) < self.max_batch:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._queue.put(None)
+                    break
+                batch.append(item)
+            self._solve_batch(batch)
+
+    def _solve_batch(self, batch):
+        # The drained requests go through solve_many as one batch
+        start_time = time.perf_counter()
+        if self.use_presolve:
+            reduced = [presolve.presolve(flat) for _, flat, _, _ in batch]
+            domains = [r.domains for r in reduced]
+        else:
+            reduced = [None] * len(batch)
+            domains = None
+        grids = (
+            board.solver_input(self.module, r.flat if r is not None else flat, n)
+            for (n, flat, _, _), r in zip(batch, reduced)
+        )
+        results, times, errors = solver_protocol.solve_many_timed(self.module, grids, domains)
+        outcomes = []
+        for i, (_, _, queued, _) in enumerate(batch):
+            result, elapsed, r = results[i], times[i], reduced[i]
+            if r is not None:
+                elapsed += r.time
+            if errors[i]:
+                status = "error"
+            else:
+                status = "solved" if result else "failed"
+            outcomes.append((result, status, start_time - queued, elapsed))
+
+        # Validate the whole batch at once (grouped by size)
+        by_size = {}
+        for i, ((n, flat, _, _), (result, status, _, _)) in enumerate(zip(batch, outcomes)):
+            if status == "solved" and pipeline.is_board(result, n):
+                by_size.setdefault(n, []).append(i)
+            elif status == "solved":
+                outcomes[i] = (None, "failed") + outcomes[i][2:]
+        for n, indices in by_size.items():
+            try:
+                solutions = np.array([outcomes[i][0] for i in indices], dtype=np.int64)
+                clues = np.stack(
+                    [np.frombuffer(batch[i][1], dtype=np.uint8).reshape(n, n) for i in indices]
+                )
+                valid = validator.validate_batch(solutions, clues)
+            except (ValueError, TypeError):
+                valid = [False] * len(indices)
+            for i, ok in zip(indices, valid):
+                if not ok:
+                    outcomes[i] = (None, "failed") + outcomes[i][2:]
+
+        for (n, flat, queued, future), (result, status, waited, elapsed) in zip(batch, outcomes):
+            future.set_result(
+                {
+                    "status": status,
+                    "solution": dataset.flatten(result) if status == "solved" else None,
+                    "queue_time": waited,
+                    "solve_time": elapsed,
+                    "batch_size": len(batch),
+                }
+            )
+
+
+class SolverPool:
+    """Loads the selected solvers once and keeps one warm worker per backend."""
+
+    def __init__(self, names, max_batch=MAX_BATCH, use_presolve=True):
+        self.workers = {
+            name: BackendWorker(name, module, max_batch, use_presolve)
+            for name, module in solver_registry.load_solvers(names)
+        }
+
+    def submit(self, solver, n, flat):
+        if solver not in self.workers:
+            raise KeyError(solver)
+        return self.workers[solver].submit(n, flat)
+
+    def close(self):
+        for worker in self.workers.values():
+            worker.close()
+
+
+# --- HTTP front-end ---
+
+
+def _parse_json_puzzles(body):
+    payload = json.loads(body)
+    items = [payload["grid"]] if "grid" in payload else payload.get("puzzles", [])
+    puzzles = []
+    for item in items:
+        flat = dataset.parse_line(item) if isinstance(item, str) else dataset.flatten(item)
+        if flat is None:
+            raise ValueError("Empty puzzle")
+        flat = bytes(flat)
+        n = math.isqrt(len(flat))
+        if n * n != len(flat):
+            raise ValueError(f"Puzzle of {len(flat)} cells is not a square grid")
+        puzzles.append((n, flat))
+    return puzzles, payload.get("solver")
+
+
+class SolverRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def address_string(self):
+        # Unix socket clients have no (host, port) address
+        return self.client_address[0] if isinstance(self.client_address, tuple) else "unix"
+
+    def _reply(self, code, body, content_type=JSON_TYPE, headers=None):
+        if not isinstance(body, bytes):
+            body = json.dumps(body).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if urlparse(self.path).path == "/solvers":
+            self._reply(200, {"solvers": list(self.server.pool.workers)})
+        else:
+            self._reply(404, {"error": "not found"})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != "/solve":
+            self._reply(404, {"error": "not found"})
+            return
+        start_time = time.perf_counter()
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        binary = self.headers.get("Content-Type", "").startswith(BINARY_TYPE)
+        solver = parse_qs(url.query).get("solver", [None])[0]
+
+        try:
+            if binary:
+                n, flats = dataset.unpack(body)
+                puzzles = [(n, flat) for flat in flats]
+            else:
+                puzzles, body_solver = _parse_json_puzzles(body)
+                solver = solver or body_solver
+        except (ValueError, KeyError, TypeError) as e:
+            self._reply(400, {"error": f"bad request: {e}"})
+            return
+        solver = solver or next(iter(self.server.pool.workers), None)
+
+        try:
+            futures = [self.server.pool.submit(solver, n, flat) for n, flat in puzzles]
+        except KeyError:
+            self._reply(404, {"error": f"unknown solver '{solver}'"})
+            return
+        results = [future.result() for future in futures]
+        elapsed = time.perf_counter() - start_time
+
+        if binary:
+            n = puzzles[0][0] if puzzles else 0
+            solutions = [r["solution"] or bytes(n * n) for r in results]
+            headers = {
+                "X-Solver": solver,
+                "X-Status": ",".join(r["status"] for r in results),
+                "X-Queue-Time": ",".join(f"{r['queue_time']:.6f}" for r in results),
+                "X-Solve-Time": ",".join(f"{r['solve_time']:.6f}" for r in results),
+                "X-Request-Time": f"{elapsed:.6f}",
+            }
+            self._reply(200, dataset.pack(solutions, n) if n else b"", BINARY_TYPE, headers)
+            return
+
+        for (n, _), r in zip(puzzles, results):
+            if r["solution"] is not None:
+                r["solution"] = pipeline.to_grid(r["solution"], n)
+        self._reply(200, {"solver": solver, "results": results, "time": elapsed})
+
+
+class UnixHTTPServer(ThreadingHTTPServer):
+    address_family = socket.AF_UNIX
+
+    def server_bind(self):
+        socketserver.TCPServer.server_bind(self)
+        self.server_name = "localhost"
+        self.server_port = 0
+
+
+def serve(solvers, host="127.0.0.1", port=DEFAULT_PORT, unix_socket=None, max_batch=MAX_BATCH):
+    """Runs the service until interrupted."""
+    pool = SolverPool(solvers, max_batch)
+    solver_registry.print_load_times()
+    if unix_socket:
+        if os.path.exists(unix_socket):
+            os.unlink(unix_socket)
+        server = UnixHTTPServer(unix_socket, SolverRequestHandler)
+        where = unix_socket
+    else:
+        server = ThreadingHTTPServer((host, port), SolverRequestHandler)
+        where = f"http://{host}:{port}"
+    server.daemon_threads = True
+    server.pool = pool
+    print(f"Serving {list(pool.workers)} on {where}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        pool.close()
+        if unix_socket and os.path.exists(unix_socket):
+            os.unlink(unix_socket)
+
+
+# --- Client & load generator ---
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path, timeout=None):
+        super().__init__("localhost", timeout=timeout)
+        self.unix_path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if self.timeout is not None:
+            self.sock.settimeout(self.timeout)
+        self.sock.connect(self.unix_path)
+
+
+class SolverClient:
+    """Keep-alive client for the service (`address` is "host:port" or a Unix socket path)."""
+
+    def __init__(self, address=f"127.0.0.1:{DEFAULT_PORT}", timeout=None):
+        if os.sep in address or not address.rpartition(":")[2].isdigit():
+            self.conn = _UnixHTTPConnection(address, timeout)
+        else:
+            host, _, port = address.rpartition(":")
+            self.conn = http.client.HTTPConnection(host, int(port), timeout=timeout)
+
+    def _request(self, method, path, body=None, content_type=JSON_TYPE):
+        headers = {"Content-Type": content_type} if body is not None else {}
+        self.conn.request(method, path, body=body, headers=headers)
+        response = self.conn.getresponse()
+        return response, response.read()
+
+    def solvers(self):
+        _, data = self._request("GET", "/solvers")
+        return json.loads(data)["solvers"]
+
+    def solve(self, grids, solver=None):
+        """JSON request. Returns the list of per-puzzle result dicts."""
+        body = json.dumps({"puzzles": [list(map(list, g)) for g in grids], "solver": solver})
+        response, data = self._request("POST", "/solve", body.encode())
+        payload = json.loads(data)
+        if response.status != 200:
+            raise RuntimeError(payload.get("error"))
+        return payload["results"]
+
+    def solve_packed(self, flats, n, solver=None):
+        """Binary request. Returns (statuses, solution flats, solve times)."""
+        path = "/solve" + (f"?solver={quote(solver)}" if solver else "")
+        response, data = self._request("POST", path, dataset.pack(flats, n), BINARY_TYPE)
+        if response.status != 200:
+            raise RuntimeError(json.loads(data).get("error"))
+        statuses = response.getheader("X-Status", "").split(",")
+        times = [float(t) for t in response.getheader("X-Solve-Time", "").split(",") if t]
+        _, solutions = dataset.unpack(data) if data else (n, [])
+        return statuses, solutions, times
+
+    def close(self):
+        self.conn.close()
+
+
+def load_test(address, source, solver=None, concurrency=8, requests=200, binary=True, batch=1):
+    """
+    Sends `requests` requests of `batch` puzzles each (cycling over `source`)
+    from `concurrency` keep-alive clients. Returns a stats dict with the
+    latencies, per-puzzle solve times, statuses and throughput.
+    """
+    puzzles = list(pipeline.iter_puzzles(source))
+    if not puzzles:
+        raise ValueError(f"No puzzles in {source}")
+    latencies = []
+    solve_times = []
+    statuses = {}
+    lock = threading.Lock()
+    local = threading.local()
+
+    def one(i):
+        client = getattr(local, "client", None)
+        if client is None:
+            client = local.client = SolverClient(address)
+        chunk = [puzzles[(i * batch + k) % len(puzzles)] for k in range(batch)]
+        start_time = time.perf_counter()
+        if binary:
+            status, _, times = client.solve_packed([f for _, _, f in chunk], chunk[0][1], solver)
+        else:
+            results = client.solve([pipeline.to_grid(f, n) for _, n, f in chunk], solver)
+            status = [r["status"] for r in results]
+            times = [r["solve_time"] for r in results]
+        elapsed = time.perf_counter() - start_time
+        with lock:
+            latencies.append(elapsed)
+            solve_times.extend(times)
+            for s in status:
+                statuses[s] = statuses.get(s, 0) + 1
+
+    start_time = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(one, range(requests)))
+    wall = time.perf_counter() - start_time
+    return {
+        "requests": requests,
+        "puzzles": requests * batch,
+        "wall": wall,
+        "latencies": latencies,
+        "solve_times": solve_times,
+        "statuses": statuses,
+    }
+
+
+def _percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def print_load_report(stats):
+    latencies = stats["latencies"]
+    print("\n" + "=" * 85)
+    print(
+        f"{'REQUESTS':<9} | {'PUZZLES/S':<10} | {'P50 (ms)':<9} | {'P99 (ms)':<9} | "
+        f"{'MAX (ms)':<9} | {'SOLVE AVG (ms)':<14} | {'STATUS':<12}"
+    )
+    print("=" * 85)
+    solve_avg = statistics.mean(stats["solve_times"]) * 1000 if stats["solve_times"] else 0.0
+    status = ", ".join(f"{k}: {v}" for k, v in sorted(stats["statuses"].items()))
+    print(
+        f"{stats['requests']:<9} | {stats['puzzles'] / stats['wall']:<10.1f} | "
+        f"{_percentile(latencies, 0.5) * 1000:<9.2f} | {_percentile(latencies, 0.99) * 1000:<9.2f} | "
+        f"{max(latencies) * 1000:<9.2f} | {solve_avg:<14.2f} | {status:<12}"
+    )
+    print("=" * 85)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local Sudoku solver service")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_serve = sub.add_parser("serve", help="Run the service")
+    p_serve.add_argument("--solvers", default="Google OR-Tools,PySAT (Glucose4)")
+    p_serve.add_argument("--host", default="127.0.0.1")
+    p_serve.add_argument("--port", type=int, default=DEFAULT_PORT)
+    p_serve.add_argument("--unix", default=None, help="Listen on a Unix socket instead")
+    p_serve.add_argument("--max-batch", type=int, default=MAX_BATCH)
+
+    p_load = sub.add_parser("load", help="Load-test a running service")
+    p_load.add_argument("source", nargs="?", default=os.path.join("sudokus", "9x9"))
+    p_load.add_argument("--address", default=f"127.0.0.1:{DEFAULT_PORT}")
+    p_load.add_argument("--solver", default=None)
+    p_load.add_argument("--concurrency", type=int, default=8)
+    p_load.add_argument("--requests", type=int, default=200)
+    p_load.add_argument("--batch", type=int, default=1, help="Puzzles per request")
+    p_load.add_argument("--json", action="store_true", help="Use JSON instead of the binary encoding")
+
+    args = parser.parse_args()
+    if args.command == "serve":
+        serve(args.solvers.split(","), args.host, args.port, args.unix, args.max_batch)
+    else:
+        try:
+            stats = load_test(
+                args.address,
+                args.source,
+                args.solver,
+                args.concurrency,
+                args.requests,
+                not args.json,
+                args.batch,
+            )
+        except (OSError, RuntimeError) as e:
+            print(f"Load test failed: {e}", file=sys.stderr)
+            sys.exit(1)
+        print_load_report(stats)
@@ -71,24 +71,32 @@ CLIPS_SOURCE = """
 """
 
 
-def solve(grid):
-    """
-    Attempts to solve a Sudoku (N x N) using CLIPS Expert System rules.
-    Returns the modified grid IN-PLACE.
-    """
+def assert_facts(env, grid):
+    """Asserts the grid-info fact and one cell fact per cell of `grid` into `env`."""
     N = len(grid)
     M = int(math.sqrt(N))
+    env.assert_string(f"(grid-info (n {N}) (m {M}))")
 
-    # Validation
-    if M * M != N:
-        print(f"CLIPS Error: Grid size {N}x{N} is not a perfect square.")
-        return None
+    for i in range(N):
+        for j in range(N):
+            val = grid[i][j]
+            row_idx = i + 1
+            col_idx = j + 1
+
+            # Calculate Box ID
+            box_r = (row_idx - 1) // M
+            box_c = (col_idx - 1) // M
+            box_id = (box_r * M) + box_c + 1
+
+            env.assert_string(
+                f"(cell (row {row_idx}) (col {col_idx}) (box {box_id}) (val {val}))"
+            )
 
-    env = clips.Environment()
-    temp_file_path = ""
 
+def load_rules(env):
+    """Loads CLIPS_SOURCE (templates and rules) into `env`."""
+    temp_file_path = ""
     try:
-        # 1. Write CLIPS rules to a temporary file
         # We use 'delete=False' so we can close it and let CLIPS open it by name
         with tempfile.NamedTemporaryFile(
             mode="w+", suffix=".clp", delete=False
@@ -96,51 +104,70 @@ def solve(grid):
             tmp.write(CLIPS_SOURCE)
             temp_file_path = tmp.name
 
-        # 2. Load the rules from the file
         # This handles multiple rules/templates correctly
         env.load(temp_file_path)
+    finally:
+        # Cleanup
+        if os.path.exists(temp_file_path):
+            os.remove(temp_file_path)
 
-        # 3. Assert Initial Facts
-        env.assert_string(f"(grid-info (n {N}) (m {M}))")
-
-        for i in range(N):
-            for j in range(N):
-                val = grid[i][j]
-                row_idx = i + 1
-                col_idx = j + 1
-
-                # Calculate Box ID
-                box_r = (row_idx - 1) // M
-                box_c = (col_idx - 1) // M
-                box_id = (box_r * M) + box_c + 1
-
-                env.assert_string(
-                    f"(cell (row {row_idx}) (col {col_idx}) (box {box_id}) (val {val}))"
-                )
-
-        # 4. Run the engine
-        env.run()
-
-        # 5. Retrieve Results
-        solved_count = 0
-        for fact in env.facts():
-            if fact.template.name == "cell":
-                r = fact["row"] - 1
-                c = fact["col"] - 1
-                v = fact["val"]
-
-                grid[r][c] = v  # Update IN-PLACE
-
-                if v != 0:
-                    solved_count += 1
-
-        if solved_count == N * N:
-            return grid
-        else:
-            print(
-                f"Warning: CLIPS stuck. Solved cells: {solved_count}/{N * N}"
-            )
-            return grid
+
+def _run(env, grid):
+    """Asserts `grid` into `env` (rules loaded, no cell facts), runs it and reads the cells back."""
+    N = len(grid)
+
+    # Assert Initial Facts
+    assert_facts(env, grid)
+
+    # Run the engine
+    env.run()
+
+    # Retrieve Results
+    solved_count = 0
+    for fact in env.facts():
+        if fact.template.name == "cell":
+            r = fact["row"] - 1
+            c = fact["col"] - 1
+            v = fact["val"]
+
+            grid[r][c] = v  # Update IN-PLACE
+
+            if v != 0:
+                solved_count += 1
+
+    if solved_count != N * N:
+        print(
+            f"Warning: CLIPS stuck. Solved cells: {solved_count}/{N * N}"
+        )
+    return grid
+
+
+def _check_size(grid):
+    N = len(grid)
+    M = int(math.sqrt(N))
+    if M * M != N:
+        print(f"CLIPS Error: Grid size {N}x{N} is not a perfect square.")
+        return False
+    return True
+
+
+def solve(grid):
+    """
+    Attempts to solve a Sudoku (N x N) using CLIPS Expert System rules.
+    Returns the modified grid IN-PLACE.
+    """
+    # Validation
+    if not _check_size(grid):
+        return None
+
+    env = clips.Environment()
+
+    try:
+        # 1. Load the rules
+        load_rules(env)
+
+        # 2. Assert the facts, run and retrieve the results
+        return _run(env, grid)
 
     except clips.CLIPSError as e:
         print(f"CLIPS Error: {e}")
@@ -148,7 +175,30 @@ def solve(grid):
     except Exception as e:
         print(f"General Error: {e}")
         return None
-    finally:
-        # Cleanup
-        if os.path.exists(temp_file_path):
-            os.remove(temp_file_path)
+
+
+def solve_many(grids):
+    """
+    Lazily solves `grids` (same results as solve, one per grid). The rules
+    are loaded once into one environment, which is reset between puzzles.
+    """
+    env = None
+    for grid in grids:
+        if not _check_size(grid):
+            yield None
+            continue
+        try:
+            if env is None:
+                fresh = clips.Environment()
+                load_rules(fresh)
+                env = fresh
+            else:
+                env.reset()
+            result = _run(env, grid)
+        except clips.CLIPSError as e:
+            print(f"CLIPS Error: {e}")
+            result = None
+        except Exception as e:
+            print(f"General Error: {e}")
+            result = None
+        yield result
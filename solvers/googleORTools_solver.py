@@ -1,48 +1,69 @@
 from ortools.sat.python import cp_model
 
+import geometry
 
-def solve(grid):
-    """
-    Receives a Sudoku matrix (N x N) and solves it IN-PLACE using Google OR-Tools CP-SAT Solver.
-    Returns the same matrix reference with the solved values.
+# Every call builds its own model and solver: safe to run from several threads
+THREAD_SAFE = True
+# CP-SAT searches in native code with the GIL released
+RELEASES_GIL = True
+# The pipeline may pass a board.Grid: clues are read by iterating the rows
+# (no copy) and the solution is written as grid[r][c]
+GRID_INPUT = True
 
-    If no solution is found, returns None.
-    """
 
+def encode(grid, domains=None):
+    """
+    Builds the CP-SAT model for `grid`. Returns (model, grid_vars).
+    `domains` optionally holds a candidate bitmask per cell (row-major, bit
+    v-1 for value v), e.g. from the presolver; each variable then only gets
+    its remaining candidates.
+    """
     N = len(grid)
-    M = int(N**0.5)
+    geo = geometry.get(N)
 
     model = cp_model.CpModel()
 
     # 1. Create variables
     grid_vars = {}
-    for i in range(N):
-        for j in range(N):
+    for i, row in enumerate(grid):
+        for j, value in enumerate(row):
             # Use 'grid' directly to read initial values
-            if grid[i][j] != 0:
+            if value != 0:
                 # Constant value
-                grid_vars[i, j] = model.NewIntVar(grid[i][j], grid[i][j], f"cell_{i}_{j}")
+                grid_vars[i, j] = model.NewIntVar(value, value, f"cell_{i}_{j}")
+            elif domains is not None:
+                mask = domains[i * N + j]
+                values = [v for v in range(1, N + 1) if mask >> (v - 1) & 1]
+                if values[-1] - values[0] + 1 == len(values):
+                    # Contiguous candidates: a plain interval is cheaper to build
+                    grid_vars[i, j] = model.NewIntVar(values[0], values[-1], f"cell_{i}_{j}")
+                else:
+                    grid_vars[i, j] = model.NewIntVarFromDomain(
+                        cp_model.Domain.FromValues(values), f"cell_{i}_{j}"
+                    )
             else:
                 grid_vars[i, j] = model.NewIntVar(1, N, f"cell_{i}_{j}")
 
     # 2. Constraints
+    # Rows, columns and M x M blocks: All different (shared unit tables)
+    cells = [grid_vars[rc] for rc in geo.coords]
+    for unit in geo.units:
+        model.AddAllDifferent([cells[cell] for cell in unit])
+
+    return model, grid_vars
 
-    # a) Rows: All different
-    for i in range(N):
-        model.AddAllDifferent([grid_vars[i, j] for j in range(N)])
 
-    # b) Columns: All different
-    for j in range(N):
-        model.AddAllDifferent([grid_vars[i, j] for i in range(N)])
+def solve(grid, domains=None):
+    """
+    Receives a Sudoku matrix (N x N) and solves it IN-PLACE using Google OR-Tools CP-SAT Solver.
+    Returns the same matrix reference with the solved values.
+    `domains` optionally restricts the candidates of each cell (see encode).
+
+    If no solution is found, returns None.
+    """
 
-    # c) Blocks M x M: All different
-    for box_row in range(0, N, M):
-        for box_col in range(0, N, M):
-            box_vars = []
-            for i in range(M):
-                for j in range(M):
-                    box_vars.append(grid_vars[box_row + i, box_col + j])
-            model.AddAllDifferent(box_vars)
+    N = len(grid)
+    model, grid_vars = encode(grid, domains)
 
     # 3. Solve
     solver = cp_model.CpSolver()
@@ -57,3 +78,84 @@ def solve(grid):
     else:
         return None
 
+
+def _intervals(mask):
+    # Candidate bitmask -> flat [lo, hi, lo, hi, ...] proto domain
+    bounds = []
+    v = 1
+    while mask:
+        if mask & 1:
+            if bounds and bounds[-1] == v - 1:
+                bounds[-1] = v
+            else:
+                bounds += [v, v]
+        mask >>= 1
+        v += 1
+    return bounds
+
+
+def solve_many(grids, domains=None):
+    """
+    Lazily solves `grids` (same results as solve, one per grid). One model
+    per grid size is built once; each puzzle only pins the domains of its
+    clues (and its remaining candidates, with `domains`) in the model proto,
+    which are restored after the search.
+    """
+    models = {}
+    solver = cp_model.CpSolver()
+    domains = iter(domains) if domains is not None else None
+    for grid in grids:
+        N = len(grid)
+        if N not in models:
+            models[N] = encode([[0] * N for _ in range(N)])
+        model, grid_vars = models[N]
+        variables = model.Proto().variables
+
+        # Variables are created in row-major order: proto index = i * N + j
+        pins = [(i * N + j, [v, v]) for i, row in enumerate(grid) for j, v in enumerate(row) if v != 0]
+        cell_domains = next(domains) if domains is not None else None
+        if cell_domains is not None:
+            full = (1 << N) - 1
+            pins = [(index, _intervals(mask)) for index, mask in enumerate(cell_domains) if mask != full]
+        for index, bounds in pins:
+            variables[index].domain.clear()
+            variables[index].domain.extend(bounds)
+        try:
+            status = solver.Solve(model)
+        finally:
+            for index, _ in pins:
+                variables[index].domain.clear()
+                variables[index].domain.extend([1, N])
+
+        if status == cp_model.OPTIMAL or status == cp_model.FEASIBLE:
+            for i in range(N):
+                for j in range(N):
+                    grid[i][j] = solver.Value(grid_vars[i, j])
+            yield grid
+        else:
+            yield None
+
+
+class _SolutionCounter(cp_model.CpSolverSolutionCallback):
+    """Counts solutions and stops the search once `limit` are found."""
+
+    def __init__(self, limit):
+        super().__init__()
+        self.limit = limit
+        self.count = 0
+
+    def on_solution_callback(self):
+        self.count += 1
+        if self.count >= self.limit:
+            self.StopSearch()
+
+
+def count_solutions(grid, limit=2):
+    """Counts the solutions of `grid` (up to `limit`) with a CP-SAT solution callback."""
+    model, _ = encode(grid)
+
+    solver = cp_model.CpSolver()
+    solver.parameters.enumerate_all_solutions = True
+    counter = _SolutionCounter(limit)
+    solver.Solve(model, counter)
+    return min(counter.count, limit)
@@ -1,3 +1,4 @@
+import asyncio
 import os
 from typing import List
 
@@ -17,9 +18,7 @@ class SudokuResponse(BaseModel):
     )
 
 
-def solve(grid):
-    n = len(grid)
-
+def _chain():
     parser = PydanticOutputParser(pydantic_object=SudokuResponse)
     model = ChatGoogleGenerativeAI(
         model="models/gemini-2.5-flash", temperature=0
@@ -35,7 +34,26 @@ def solve(grid):
 
     prompt = ChatPromptTemplate.from_template(prompt_text)
 
-    chain = prompt | model | parser
+    return prompt | model | parser, parser
+
+
+def _apply(ans, grid):
+    n = len(grid)
+    sol_ia = ans.solution
+
+    if len(sol_ia) == n and all(len(row) == n for row in sol_ia):
+        for i in range(n):
+            for j in range(n):
+                grid[i][j] = sol_ia[i][j]
+        return grid
+    else:
+        # print("Incorrect solution format received from LLM.")
+        return None
+
+
+def solve(grid):
+    n = len(grid)
+    chain, parser = _chain()
 
     try:
         ans = chain.invoke(
@@ -45,18 +63,32 @@ def solve(grid):
                 "format_instructions": parser.get_format_instructions(),
             }
         )
+        return _apply(ans, grid)
+
+    except Exception:
+        # print(f"LLM Error: {e}")
+        return None
 
-        sol_ia = ans.solution
 
-        if len(sol_ia) == n and all(len(row) == n for row in sol_ia):
-            for i in range(n):
-                for j in range(n):
-                    grid[i][j] = sol_ia[i][j]
-            return grid
-        else:
-            # print("Incorrect solution format received from LLM.")
-            return None
+async def solve_async(grid, timeout=None):
+    """Same as solve, awaiting the model call instead of blocking on it."""
+    n = len(grid)
+    chain, parser = _chain()
 
+    try:
+        ans = await asyncio.wait_for(
+            chain.ainvoke(
+                {
+                    "n": n,
+                    "grid": grid,
+                    "format_instructions": parser.get_format_instructions(),
+                }
+            ),
+            timeout,
+        )
+        return _apply(ans, grid)
+
+    except asyncio.TimeoutError:
+        raise
     except Exception:
-        # print(f"LLM Error: {e}")
         return None
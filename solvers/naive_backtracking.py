@@ -1,25 +1,14 @@
+import geometry
+
+
 def is_valid(grid, row, col, num):
     N = len(grid)
-    M = int(N**0.5)
-
-    # Check row
-    for x in range(N):
-        if grid[row][x] == num:
-            return False
 
-    # Check column
-    for x in range(N):
-        if grid[x][col] == num:
+    # Check row, column and subgrid at once: the peers of (row, col)
+    for r, c in geometry.get(N).peer_coords[row * N + col]:
+        if grid[r][c] == num:
             return False
 
-    # Check subgrid
-    start_row = row - row % M
-    start_col = col - col % M
-    for i in range(M):
-        for j in range(M):
-            if grid[i + start_row][j + start_col] == num:
-                return False
-
     return True
 
 
@@ -58,3 +47,49 @@ def solve(grid):
             grid[row][col] = 0  # Backtrack
 
     return None  # Trigger backtracking
+
+
+def count_solutions(grid, limit=2, node_limit=None):
+    """
+    Counts the solutions of `grid` with the same backtracking search,
+    stopping as soon as `limit` solutions are found.
+    The grid is restored before returning.
+
+    With `node_limit`, returns None if the search runs out of nodes before
+    the count is settled.
+    """
+    budget = [node_limit if node_limit is not None else float("inf")]
+    count = _count(grid, limit, budget)
+    if budget[0] < 0 and count < limit:
+        return None
+    return count
+
+
+def _count(grid, limit, budget):
+    budget[0] -= 1
+    if budget[0] < 0:
+        return 0
+
+    N = len(grid)
+
+    row, col = -1, -1
+    for i in range(N):
+        for j in range(N):
+            if grid[i][j] == 0:
+                row, col = i, j
+                break
+        if row >= 0:
+            break
+
+    if row < 0:
+        return 1  # Filled: one solution
+
+    count = 0
+    for num in range(1, N + 1):
+        if is_valid(grid, row, col, num):
+            grid[row][col] = num
+            count += _count(grid, limit - count, budget)
+            grid[row][col] = 0  # Backtrack
+            if count >= limit or budget[0] < 0:
+                break
+    return count
@@ -1,15 +1,26 @@
 import ast
+import asyncio
+import itertools
 import math
 import os
 import subprocess
+import tempfile
 
+# One temporary program per call, searched in a separate Picat process:
+# safe to run from several threads, and the GIL is free while waiting
+THREAD_SAFE = True
+RELEASES_GIL = True
 
-def solve(grid):
+# Puzzles solved by one Picat process in solve_many
+BATCH_SIZE = 32
+
+
+def _program(grid):
     n = len(grid)
     sub_n = int(math.sqrt(n))
     grid_str = str(grid)
 
-    picat_code = f"""
+    return f"""
 import cp.
 
 main =>
@@ -42,28 +53,155 @@ main =>
         printf("FAIL")
     end.
 """
-    filename = "temp_solver.pi"
-    with open(filename, "w") as f:
-        f.write(picat_code)
 
+
+def _batch_program(grids):
+    # Same model as _program, as a predicate run on every grid (all of side N)
+    n = len(grids[0])
+    sub_n = int(math.sqrt(n))
+    grids_str = str(grids)
+
+    return f"""
+import cp.
+
+main =>
+    N = {n},
+    SubN = {sub_n},
+    foreach(Input in {grids_str})
+        % Clashing clues make solve_sudoku fail: print FAIL and go on
+        (solve_sudoku(Input, N, SubN) -> true ; printf("FAIL")),
+        nl
+    end.
+
+solve_sudoku(Input, N, SubN) =>
+    Sol = [new_list(N) : _ in 1..N],
+    SolVars = vars(Sol),
+    SolVars :: 1..N,
+
+    foreach(R in 1..N, C in 1..N)
+        if Input[R,C] > 0 then
+            Sol[R,C] #= Input[R,C]
+        end
+    end,
+
+    % Constraints
+    foreach(Row in Sol) all_different(Row) end,
+    foreach(C in 1..N) all_different([Sol[R,C] : R in 1..N]) end,
+    foreach(R in 1..SubN..N, C in 1..SubN..N)
+        all_different([Sol[I,J] : I in R..R+SubN-1, J in C..C+SubN-1])
+    end,
+
+    % Heuristic: first-fail
+    if solve([ff], SolVars) then
+        printf("%w", Sol)
+    else
+        printf("FAIL")
+    end.
+"""
+
+
+def _write_program(grid):
+    # One file per call, so concurrent solves never share a program
+    fd, filename = tempfile.mkstemp(prefix="picat_", suffix=".pi")
+    with os.fdopen(fd, "w") as f:
+        f.write(_program(grid))
+    return filename
+
+
+def _apply(output, returncode, grid):
+    output = output.strip()
+    if not output or "FAIL" in output or returncode != 0:
+        return None
+
+    solved_grid = ast.literal_eval(output)
+
+    n = len(grid)
+    for i in range(n):
+        for j in range(n):
+            grid[i][j] = solved_grid[i][j]
+    return grid
+
+
+def solve(grid):
+    filename = _write_program(grid)
     try:
         result = subprocess.run(
             ["picat", filename], capture_output=True, text=True
         )
-        output = result.stdout.strip()
+        return _apply(result.stdout, result.returncode, grid)
 
-        if not output or "FAIL" in output or result.returncode != 0:
-            return None
+    except Exception:
+        return None
+    finally:
+        if os.path.exists(filename):
+            os.remove(filename)
+
+
+def _solve_chunk(grids):
+    """Solves grids of the same side in one Picat process (one output line per grid)."""
+    fd, filename = tempfile.mkstemp(prefix="picat_", suffix=".pi")
+    with os.fdopen(fd, "w") as f:
+        f.write(_batch_program(grids))
+    try:
+        result = subprocess.run(
+            ["picat", filename], capture_output=True, text=True
+        )
+    except Exception:
+        return [None] * len(grids)
+    finally:
+        if os.path.exists(filename):
+            os.remove(filename)
 
-        solved_grid = ast.literal_eval(output)
+    lines = result.stdout.strip().splitlines()
+    results = []
+    for i, grid in enumerate(grids):
+        try:
+            output = lines[i] if i < len(lines) else ""
+            results.append(_apply(output, result.returncode, grid))
+        except Exception:
+            results.append(None)
+    return results
 
-        for i in range(n):
-            for j in range(n):
-                grid[i][j] = solved_grid[i][j]
-        return grid
 
+def solve_many(grids):
+    """
+    Lazily solves `grids` (same results as solve, one per grid). Grids are
+    sent BATCH_SIZE at a time (consecutive grids of the same side) to one
+    Picat process, so the process start and program compilation are paid
+    once per batch instead of once per puzzle.
+    """
+    for _, same_size in itertools.groupby(grids, key=len):
+        while True:
+            chunk = list(itertools.islice(same_size, BATCH_SIZE))
+            if not chunk:
+                break
+            yield from _solve_chunk(chunk)
+
+
+async def solve_async(grid, timeout=None):
+    """
+    Same as solve, but drives Picat through an asyncio subprocess so that
+    many puzzles can be in flight at once. On timeout or cancellation the
+    Picat process is killed (asyncio.TimeoutError / CancelledError propagate).
+    """
+    filename = _write_program(grid)
+    process = None
+    try:
+        process = await asyncio.create_subprocess_exec(
+            "picat",
+            filename,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        stdout, _ = await asyncio.wait_for(process.communicate(), timeout)
+        return _apply(stdout.decode(), process.returncode, grid)
+    except (asyncio.TimeoutError, asyncio.CancelledError):
+        raise
     except Exception:
         return None
     finally:
+        if process is not None and process.returncode is None:
+            process.kill()
+            await process.wait()
         if os.path.exists(filename):
             os.remove(filename)
@@ -0,0 +1,237 @@
+import importlib
+import json
+import multiprocessing as mp
+import os
+import queue
+import random
+import time
+
+import difficulty
+import validator
+
+# Backends raced by the portfolio: name -> (module path, extra solve() kwargs)
+BACKENDS = {
+    "cp-sat": ("solvers.googleORTools_solver", {}),
+    "glucose": ("solvers.pysat_solver", {"sat_solver": "g4"}),
+    "cadical": ("solvers.pysat_solver", {"sat_solver": "cd195"}),
+    "z3": ("solvers.z3_solver", {}),
+    "picat": ("solvers.picat_solver", {}),
+}
+
+# Current configuration (see configure())
+config = {
+    "backends": list(BACKENDS),
+    # "race": run all backends in parallel and keep the first valid solution
+    # "learned": run only the backend expected to be fastest from history
+    "mode": "race",
+    # Share of learned-mode puzzles that are raced anyway, so every backend
+    # keeps being measured
+    "explore": 0.1,
+    "timeout": 60.0,
+    "history_path": os.path.join("results", "portfolio_history.jsonl"),
+}
+
+_history = None
+
+
+def configure(**options):
+    """Updates the portfolio configuration (backends, mode, explore, timeout, history_path)."""
+    global _history
+    unknown = set(options) - set(config)
+    if unknown:
+        raise ValueError(f"Unknown portfolio options: {sorted(unknown)}")
+    config.update(options)
+    for name in config["backends"]:
+        if name not in BACKENDS:
+            raise ValueError(f"Unknown portfolio backend '{name}'")
+    if "history_path" in options:
+        _history = None
+
+
+def init():
+    """
+    Imports the available backends in this process, so forked workers start
+    warm, and drops the ones whose library is missing.
+    """
+    available = []
+    for name in config["backends"]:
+        try:
+            importlib.import_module(BACKENDS[name][0])
+            available.append(name)
+        except ImportError:
+            continue
+    config["backends"] = available
+
+
+# --- History (learned mode) ---
+
+
+def _bucket(features):
+    """Coarse feature bucket: (N, clue density band, singles band)."""
+    n = features["n"]
+    density = round(features["clues"] / (n * n), 1)
+    singles = round(features["singles_ratio"], 1)
+    return (n, density, singles)
+
+
+class History:
+    """
+    Recorded (features, backend, time) observations, persisted as JSON Lines.
+    Predicts the expected-fastest backend for a feature bucket, falling back
+    to the same N and then to all observations.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.records = []
+        if path and os.path.exists(path):
+            with open(path, "r") as f:
+                self.records = [json.loads(line) for line in f if line.strip()]
+
+    def record(self, features, backend, elapsed):
+        rec = dict(features, backend=backend, time=elapsed)
+        self.records.append(rec)
+        if self.path:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "a") as f:
+                f.write(json.dumps(rec) + "\n")
+
+    def best_backend(self, features, candidates):
+        bucket = _bucket(features)
+        selectors = [
+            lambda r: _bucket(r) == bucket,
+            lambda r: r["n"] == features["n"],
+            lambda r: True,
+        ]
+        for selector in selectors:
+            times = {}
+            for r in self.records:
+                if r["backend"] in candidates and selector(r):
+                    times.setdefault(r["backend"], []).append(r["time"])
+            if times:
+                return min(times, key=lambda b: sum(times[b]) / len(times[b]))
+        return None
+
+
+def get_history():
+    global _history
+    if _history is None:
+        _history = History(config["history_path"])
+    return _history
+
+
+# --- Execution ---
+
+
+def _run_backend(name, grid):
+    module_path, kwargs = BACKENDS[name]
+    module = importlib.import_module(module_path)
+    return module.solve([row[:] for row in grid], **kwargs)
+
+
+def _worker(name, grid, results):
+    start_time = time.perf_counter()
+    try:
+        solution = _run_backend(name, grid)
+    except Exception:
+        solution = None
+    results.put((name, solution, time.perf_counter() - start_time))
+
+
+def race(grid, backends=None, timeout=None, features=None):
+    """
+    Starts every backend in its own process and returns (backend, solution,
+    elapsed) for the first validated solution, terminating the others.
+    `elapsed` is the winner's own solve time (process start-up excluded).
+    Returns (None, None, None) if no backend succeeds in time.
+
+    With `features`, every backend is recorded in the history: the time of
+    those that finished, the time they were stopped at for the losers still
+    running, and the timeout for those that failed or ran out of time.
+    """
+    backends = backends or config["backends"]
+    timeout = config["timeout"] if timeout is None else timeout
+    results = mp.Queue()
+    workers = {
+        name: mp.Process(target=_worker, args=(name, grid, results), daemon=True)
+        for name in backends
+    }
+
+    start_time = time.perf_counter()
+    for worker in workers.values():
+        worker.start()
+
+    winner = (None, None, None)
+    observed = {}
+    pending = len(workers)
+    try:
+        while pending:
+            remaining = timeout - (time.perf_counter() - start_time)
+            if remaining <= 0:
+                break
+            try:
+                name, solution, elapsed = results.get(timeout=remaining)
+            except queue.Empty:
+                break
+            pending -= 1
+            if solution and validator.validate_solution(solution, grid):
+                observed[name] = elapsed
+                winner = (name, solution, elapsed)
+                break
+            observed[name] = timeout
+    finally:
+        stopped_at = min(time.perf_counter() - start_time, timeout)
+        # Kill the losers
+        for worker in workers.values():
+            if worker.is_alive():
+                worker.terminate()
+        for worker in workers.values():
+            worker.join()
+        results.close()
+
+    if features is not None:
+        history = get_history()
+        for name in backends:
+            # A loser stopped by the winner took at least as long as the race ran
+            elapsed = observed.get(name, stopped_at if winner[0] else timeout)
+            history.record(features, name, elapsed)
+    return winner
+
+
+def solve(grid):
+    """
+    Receives a Sudoku matrix (N x N) and solves it IN-PLACE with a portfolio
+    of backends. In "race" mode all backends run in parallel and the first
+    valid solution wins; in "learned" mode only the backend predicted fastest
+    for the puzzle's features runs (racing when there is no history yet, and
+    for a share `explore` of the puzzles). Races record every backend.
+
+    If no solution is found, returns None.
+    """
+    features = difficulty.quick_features(grid)
+    history = get_history()
+
+    backend = None
+    if config["mode"] == "learned" and random.random() >= config["explore"]:
+        backend = history.best_backend(features, config["backends"])
+
+    if backend is not None:
+        start_time = time.perf_counter()
+        try:
+            solution = _run_backend(backend, grid)
+        except Exception:
+            solution = None
+        elapsed = time.perf_counter() - start_time
+        if not (solution and validator.validate_solution(solution, grid)):
+            solution = None
+            elapsed = config["timeout"]
+        history.record(features, backend, elapsed)
+    else:
+        backend, solution, elapsed = race(grid, features=features)
+
+    if solution is None:
+        return None
+
+    for i, row in enumerate(solution):
+        grid[i][:] = row
+    return grid
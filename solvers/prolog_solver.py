@@ -48,28 +48,41 @@ split_k(K, Row, Head, Tail) :-
     append(Head, Tail, Row).
 """
 
-# Initialize a global Prolog instance
-prolog = Prolog()
+# Global Prolog instance, created on first use (see init()) so that
+# importing this module does not start the SWI-Prolog engine.
+prolog = None
 
-# Disable redefine warnings to keep the output clean
-list(prolog.query("set_prolog_flag(redefine_warnings, off)"))
 
-# Create a temporary file to load the Prolog logic
-temp_file_path = ""
-try:
-    with tempfile.NamedTemporaryFile(
-        mode="w+", suffix=".pl", delete=False
-    ) as temp_pl:
-        temp_pl.write(PROLOG_CODE)
-        temp_file_path = temp_pl.name
+def init():
+    """Starts the Prolog engine and consults the Sudoku logic (only once)."""
+    global prolog
+    if prolog is not None:
+        return prolog
 
-    # Consult (load) the Prolog logic into memory
-    prolog.consult(temp_file_path.replace("\\", "/"))
+    engine = Prolog()
 
-finally:
-    # Once loaded into memory, we can safely delete the temporary file
-    if os.path.exists(temp_file_path):
-        os.remove(temp_file_path)
+    # Disable redefine warnings to keep the output clean
+    list(engine.query("set_prolog_flag(redefine_warnings, off)"))
+
+    # Create a temporary file to load the Prolog logic
+    temp_file_path = ""
+    try:
+        with tempfile.NamedTemporaryFile(
+            mode="w+", suffix=".pl", delete=False
+        ) as temp_pl:
+            temp_pl.write(PROLOG_CODE)
+            temp_file_path = temp_pl.name
+
+        # Consult (load) the Prolog logic into memory
+        engine.consult(temp_file_path.replace("\\", "/"))
+
+    finally:
+        # Once loaded into memory, we can safely delete the temporary file
+        if os.path.exists(temp_file_path):
+            os.remove(temp_file_path)
+
+    prolog = engine
+    return prolog
 
 
 def solve(grid):
@@ -89,7 +102,7 @@ def solve(grid):
     query_string = f"Rows = {sudoku_str}, sudoku_solve(Rows, {K})"
 
     try:
-        solutions = list(prolog.query(query_string))
+        solutions = list(init().query(query_string))
         if not solutions:
             return None
 
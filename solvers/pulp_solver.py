@@ -1,6 +1,14 @@
 import math
 import pulp
 
+import geometry
+
+# Every call builds its own problem and CBC uses unique temporary files:
+# safe to run from several threads (the CBC subprocesses then overlap)
+THREAD_SAFE = True
+# The search runs in the CBC process: the GIL is free while waiting for it
+RELEASES_GIL = True
+
 
 
 @staticmethod
@@ -16,6 +24,7 @@ def solve(grid):
 
     if k * k != N:
         raise ValueError("El tamaño del sudoku debe ser un cuadrado perfecto (N = k^2)")
+    geo = geometry.get(N)
 
     # Crear problema
     prob = pulp.LpProblem("Sudoku", pulp.LpStatusOptimal)
@@ -28,29 +37,14 @@ def solve(grid):
     )
 
     # Cada celda tiene exactamente un número
-    for r in range(N):
-        for c in range(N):
-            prob += pulp.lpSum(x[r][c][n] for n in range(1, N + 1)) == 1
+    for r, c in geo.coords:
+        prob += pulp.lpSum(x[r][c][n] for n in range(1, N + 1)) == 1
 
-    # Restricción de filas
-    for r in range(N):
+    # Restricciones de filas, columnas y bloques k×k (tablas compartidas)
+    for unit in geo.units:
+        cells = [geo.coords[cell] for cell in unit]
         for n in range(1, N + 1):
-            prob += pulp.lpSum(x[r][c][n] for c in range(N)) == 1
-
-    # Restricción de columnas
-    for c in range(N):
-        for n in range(1, N + 1):
-            prob += pulp.lpSum(x[r][c][n] for r in range(N)) == 1
-
-    # Restricción de bloques k×k
-    for br in range(k):
-        for bc in range(k):
-            for n in range(1, N + 1):
-                prob += pulp.lpSum(
-                    x[r][c][n]
-                    for r in range(br * k, br * k + k)
-                    for c in range(bc * k, bc * k + k)
-                ) == 1
+            prob += pulp.lpSum(x[r][c][n] for r, c in cells) == 1
 
     # Celdas fijas
     for r in range(N):
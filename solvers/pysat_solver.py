@@ -1,88 +1,165 @@
 from pysat.card import CardEnc
 from pysat.solvers import Solver
 
+import geometry
 
-def solve(grid):
+# Every call builds its own solver instance: safe to run from several threads
+THREAD_SAFE = True
+# solve_limited(expect_interrupt=True) runs the C solver without the GIL
+RELEASES_GIL = True
+# The pipeline may pass a board.Grid: clues are read by iterating the rows
+# (no copy) and the solution is written as grid[r][c]
+GRID_INPUT = True
+
+
+def encode(grid, domains=None, sat_solver="g4"):
     """
-    Receives a Sudoku matrix (N x N) and solves it IN-PLACE using PySAT.
+    Builds a PySAT solver loaded with the Sudoku CNF for `grid`.
+    Returns (solver, var, allowed): var(r, c, v) is the cell variable mapping
+    and allowed(r, c, v) tells whether v is still a candidate of (r, c).
+
+    `domains` optionally holds a candidate bitmask per cell (row-major, bit
+    v-1 for value v), e.g. from the presolver. Only the literals of the
+    remaining candidates are then encoded.
 
     CORRECTION: Now manages 'top_id' to prevent variable collision if
     the encoding generates auxiliary variables.
     """
     N = len(grid)
-    M = int(N**0.5)
+    geo = geometry.get(N)
 
-    # 1. Variable Mapping
+    # 1. Variable Mapping (shared layout, see geometry.py)
     # r, c in 0..N-1, v in 1..N
-    var = lambda r, c, v: (r * N * N) + (c * N) + v
+    var = geo.var
 
-    # Max variable used by our grid logic
-    max_id = N * N * N
+    if domains is None:
+        allowed = lambda r, c, v: True
+    else:
+        allowed = lambda r, c, v: domains[r * N + c] >> (v - 1) & 1
 
-    # Current top variable ID (starts at max_id)
+    # Current top variable ID (starts after the N^3 cell variables)
     # We will update this every time we add a constraint that might need new vars
-    current_top = max_id
-
-    with Solver(name="g4") as s:
-        # --- 2. CONSTRAINTS ---
-
-        # Helper to add constraints safely updating top_id
-        def add_exactly_one(literals):
-            nonlocal current_top
-            # We allow PySAT to choose the best encoding (default) or force one.
-            # Passing top_id is crucial to avoid clashes.
-            cnf = CardEnc.equals(lits=literals, bound=1, top_id=current_top)
-
-            s.append_formula(cnf)
-            # Update the known top variable count from the generated CNF
-            current_top = cnf.nv
-
-        # A) Cells
-        for r in range(N):
-            for c in range(N):
-                literals = [var(r, c, v) for v in range(1, N + 1)]
-                add_exactly_one(literals)
-
-        # B) Rows
-        for r in range(N):
-            for v in range(1, N + 1):
-                literals = [var(r, c, v) for c in range(N)]
-                add_exactly_one(literals)
-
-        # C) Columns
-        for c in range(N):
-            for v in range(1, N + 1):
-                literals = [var(r, c, v) for r in range(N)]
-                add_exactly_one(literals)
-
-        # D) Blocks
-        for box_r in range(0, N, M):
-            for box_c in range(0, N, M):
-                for v in range(1, N + 1):
-                    literals = []
-                    for i in range(M):
-                        for j in range(M):
-                            literals.append(var(box_r + i, box_c + j, v))
-                    add_exactly_one(literals)
-
-        # --- 3. FIXED VALUES ---
-        for r in range(N):
-            for c in range(N):
-                if grid[r][c] != 0:
-                    val = grid[r][c]
-                    s.add_clause([var(r, c, val)])
+    current_top = geo.num_vars
+
+    s = Solver(name=sat_solver)
+
+    # --- 2. CONSTRAINTS ---
+
+    # Helper to add constraints safely updating top_id
+    def add_exactly_one(literals):
+        nonlocal current_top
+        # We allow PySAT to choose the best encoding (default) or force one.
+        # Passing top_id is crucial to avoid clashes.
+        cnf = CardEnc.equals(lits=literals, bound=1, top_id=current_top)
+
+        s.append_formula(cnf)
+        # Update the known top variable count from the generated CNF
+        current_top = cnf.nv
+
+    # Cells, rows, columns and blocks: precomputed "exactly one" groups
+    if domains is None:
+        for group in geo.cnf_groups:
+            add_exactly_one(group)
+    else:
+        # Literal lit = cell * N + v is kept if v is still a candidate of cell
+        for group in geo.cnf_groups:
+            add_exactly_one(
+                [lit for lit in group if domains[(lit - 1) // N] >> ((lit - 1) % N) & 1]
+            )
+
+    # --- 3. FIXED VALUES ---
+    for r, row in enumerate(grid):
+        for c, val in enumerate(row):
+            if val != 0:
+                s.add_clause([var(r, c, val)])
+
+    return s, var, allowed
+
+
+def solve(grid, sat_solver="g4", domains=None):
+    """
+    Receives a Sudoku matrix (N x N) and solves it IN-PLACE using PySAT.
+    `sat_solver` selects the PySAT backend (Glucose4 by default, e.g. "cd195"
+    for CaDiCaL). `domains` optionally restricts the candidates of each cell
+    (see encode).
+    """
+    N = len(grid)
+
+    s, var, allowed = encode(grid, domains, sat_solver)
+    with s:
 
         # --- 4. SOLVE ---
-        if s.solve():
+        # (plain solve() keeps the GIL; this call releases it during search)
+        if s.solve_limited(expect_interrupt=True):
             model = s.get_model()
-            model_set = set(model)
-
-            for r in range(N):
-                for c in range(N):
-                    for v in range(1, N + 1):
-                        if var(r, c, v) in model_set:
-                            grid[r][c] = v
-                            break
+
+            # Cell variables come first: lit = (r * N + c) * N + v
+            for lit in model[: N * N * N]:
+                if lit > 0:
+                    cell, v = divmod(lit - 1, N)
+                    r, c = divmod(cell, N)
+                    if allowed(r, c, v + 1):
+                        grid[r][c] = v + 1
             return grid
         else:
             return None
+
+
+def solve_many(grids, sat_solver="g4", domains=None):
+    """
+    Lazily solves `grids` (same results as solve, one per grid). One
+    incremental solver per grid size holds the rules CNF; the clues of each
+    puzzle (and, with `domains`, its eliminated candidates) are passed as
+    assumptions, so clauses learned on one puzzle are kept for the next ones.
+    """
+    solvers = {}
+    domains = iter(domains) if domains is not None else None
+    try:
+        for grid in grids:
+            N = len(grid)
+            if N not in solvers:
+                solvers[N], _, _ = encode([[0] * N for _ in range(N)], sat_solver=sat_solver)
+            s = solvers[N]
+            var = geometry.get(N).var
+
+            clues = [var(r, c, v) for r, row in enumerate(grid) for c, v in enumerate(row) if v != 0]
+            cell_domains = next(domains) if domains is not None else None
+            if cell_domains is not None:
+                clues += [
+                    -var(cell // N, cell % N, v)
+                    for cell, mask in enumerate(cell_domains)
+                    if mask & (mask - 1)
+                    for v in range(1, N + 1)
+                    if not mask >> (v - 1) & 1
+                ]
+            if s.solve_limited(assumptions=clues, expect_interrupt=True):
+                model = s.get_model()
+                for lit in model[: N * N * N]:
+                    if lit > 0:
+                        cell, v = divmod(lit - 1, N)
+                        r, c = divmod(cell, N)
+                        grid[r][c] = v + 1
+                yield grid
+            else:
+                yield None
+    finally:
+        for s in solvers.values():
+            s.delete()
+
+
+def count_solutions(grid, limit=2, sat_solver="g4"):
+    """
+    Counts the solutions of `grid` (up to `limit`) by adding, after every
+    model, a blocking clause that forbids its cell assignment.
+    """
+    cell_vars = geometry.get(len(grid)).num_vars
+
+    s, _, _ = encode(grid, sat_solver=sat_solver)
+    with s:
+        count = 0
+        while count < limit and s.solve_limited(expect_interrupt=True):
+            count += 1
+            model = s.get_model()
+            # Only the cell variables identify a solution (aux vars are free)
+            s.add_clause([-lit for lit in model[:cell_vars] if lit > 0])
+        return count
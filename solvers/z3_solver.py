@@ -1,53 +1,64 @@
 from z3 import *
 
+import geometry
 
-def solve(grid):
-    """
-    Receives a Sudoku matrix (N x N) and solves it IN-PLACE using Z3 (SMT Solver).
-    Returns the same matrix reference with the solved values.
+# The pipeline may pass a board.Grid: clues are read by iterating the rows
+# (no copy) and the solution is written as grid[r][c]
+GRID_INPUT = True
 
-    If no solution is found, returns None.
+
+def encode(grid, domains=None):
+    """
+    Builds the Z3 solver for `grid`. Returns (solver, X) with X the cell variables.
+    `domains` optionally holds a candidate bitmask per cell (row-major, bit
+    v-1 for value v), e.g. from the presolver.
     """
     # Dynamic size calculation
     N = len(grid)
-    M = int(N**0.5)
+    geo = geometry.get(N)
 
     # 1. Create Z3 variables matrix
     # X[i][j] represents the cell at row i, column j
     X = [[Int(f"x_{i}_{j}") for j in range(N)] for i in range(N)]
+    cells = [x for row in X for x in row]
 
     s = Solver()
 
-    # 2. Basic Constraints: Range 1 to N
-    for i in range(N):
-        for j in range(N):
-            s.add(X[i][j] >= 1, X[i][j] <= N)
+    # 2. Basic Constraints: Range 1 to N (or the remaining candidates)
+    for cell, x in enumerate(cells):
+        if domains is None:
+            s.add(x >= 1, x <= N)
+            continue
+        mask = domains[cell]
+        values = [v for v in range(1, N + 1) if mask >> (v - 1) & 1]
+        if len(values) == 1:
+            s.add(x == values[0])
+        else:
+            s.add(Or([x == v for v in values]))
 
-    # 3. Sudoku Rules
+    # 3. Sudoku Rules: rows, columns and M x M blocks all distinct
+    for unit in geo.units:
+        s.add(Distinct([cells[cell] for cell in unit]))
 
-    # a) Rows: All distinct
-    for i in range(N):
-        s.add(Distinct(X[i]))
+    # 4. Initial Constraints (Input values)
+    for i, row in enumerate(grid):
+        for j, value in enumerate(row):
+            if value != 0:
+                s.add(X[i][j] == value)
 
-    # b) Columns: All distinct
-    for j in range(N):
-        col = [X[i][j] for i in range(N)]
-        s.add(Distinct(col))
+    return s, X
 
-    # c) Blocks M x M: All distinct
-    for box_row in range(0, N, M):
-        for box_col in range(0, N, M):
-            box_vars = []
-            for i in range(M):
-                for j in range(M):
-                    box_vars.append(X[box_row + i][box_col + j])
-            s.add(Distinct(box_vars))
 
-    # 4. Initial Constraints (Input values)
-    for i in range(N):
-        for j in range(N):
-            if grid[i][j] != 0:
-                s.add(X[i][j] == grid[i][j])
+def solve(grid, domains=None):
+    """
+    Receives a Sudoku matrix (N x N) and solves it IN-PLACE using Z3 (SMT Solver).
+    Returns the same matrix reference with the solved values.
+    `domains` optionally restricts the candidates of each cell (see encode).
+
+    If no solution is found, returns None.
+    """
+    N = len(grid)
+    s, X = encode(grid, domains)
 
     # 5. Solve
     if s.check() == sat:
@@ -60,3 +71,59 @@ def solve(grid):
         return grid
     else:
         return None
+
+
+def solve_many(grids, domains=None):
+    """
+    Lazily solves `grids` (same results as solve, one per grid). The range
+    and Distinct terms are built once per grid size and added to a fresh
+    solver per puzzle with its clues and, with `domains`, its remaining
+    candidates (push/pop would switch Z3 to its incremental core, which is
+    slower on these puzzles).
+    """
+    rules = {}
+    domains = iter(domains) if domains is not None else None
+    for grid in grids:
+        N = len(grid)
+        if N not in rules:
+            base, X = encode([[0] * N for _ in range(N)])
+            rules[N] = (base.assertions(), X)
+        assertions, X = rules[N]
+
+        s = Solver()
+        s.add(assertions)
+        for i, row in enumerate(grid):
+            for j, value in enumerate(row):
+                if value != 0:
+                    s.add(X[i][j] == value)
+        cell_domains = next(domains) if domains is not None else None
+        if cell_domains is not None:
+            full = (1 << N) - 1
+            for cell, mask in enumerate(cell_domains):
+                if mask != full and mask & (mask - 1):
+                    x = X[cell // N][cell % N]
+                    s.add(Or([x == v for v in range(1, N + 1) if mask >> (v - 1) & 1]))
+        if s.check() == sat:
+            m = s.model()
+            for i in range(N):
+                for j in range(N):
+                    grid[i][j] = m[X[i][j]].as_long()
+            yield grid
+        else:
+            yield None
+
+
+def count_solutions(grid, limit=2):
+    """
+    Counts the solutions of `grid` (up to `limit`) by asserting, after every
+    model, a blocking clause that excludes it.
+    """
+    N = len(grid)
+    s, X = encode(grid)
+
+    count = 0
+    while count < limit and s.check() == sat:
+        count += 1
+        m = s.model()
+        s.add(Or([X[i][j] != m[X[i][j]] for i in range(N) for j in range(N)]))
+    return count
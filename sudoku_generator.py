@@ -1,57 +1,201 @@
+import argparse
 import os
 import random
+from concurrent.futures import ProcessPoolExecutor
 
+import dataset
+import difficulty
+import uniqueness
 
-def generate_sudoku_16x16():
-    base = 5
+
+def generate_solution(base, rng=random):
+    """Returns a random complete N x N board (N = base * base)."""
     side = base * base
 
     def pattern(r, c):
         return (base * (r % base) + r // base + c) % side
 
     def shuffle(s):
-        return random.sample(s, len(s))
+        return rng.sample(s, len(s))
 
     r_base = range(base)
     rows = [g * base + r for g in shuffle(r_base) for r in shuffle(r_base)]
     cols = [g * base + c for g in shuffle(r_base) for c in shuffle(r_base)]
     nums = shuffle(range(1, side + 1))
 
-    board = [[nums[pattern(r, c)] for c in cols] for r in rows]
+    return [[nums[pattern(r, c)] for c in cols] for r in rows]
 
-    total_cells = side * side
-    cells_to_keep = random.randint(
-        int(total_cells * 0.35), int(total_cells * 0.45)
-    )
 
-    indices = list(range(total_cells))
-    random.shuffle(indices)
-    cells_to_remove = indices[: (total_cells - cells_to_keep)]
+# Search budget of one uniqueness check. A removal whose check runs out of
+# budget is undone, so uniqueness is never assumed without proof. Measured
+# on "hard" targets: no 9x9 check reaches it, and on 16x16 raising it to
+# 2000 settles more checks but keeps about the same number of clues
+# (~100/256) at twice the time.
+UNIQUENESS_NODE_LIMIT = 200
 
-    for idx in cells_to_remove:
-        r, c = divmod(idx, side)
-        board[r][c] = 0
 
-    return board
+def _carve(base, target, min_clues, rng, uniqueness_backend):
+    side = base * base
+    board = generate_solution(base, rng)
+    flat = bytearray(dataset.flatten(board))
+    target_rank = difficulty.TIERS.index(target)
+    min_clues = min_clues or 0
+
+    clues = side * side
+    cells = list(range(side * side))
+    rng.shuffle(cells)
+    for k, cell in enumerate(cells):
+        if clues <= min_clues:
+            break
+        value = flat[cell]
+        flat[cell] = 0
+
+        if target == "easy":
+            keep = difficulty.quick_features(flat)["singles_ratio"] >= 1.0
+        elif uniqueness_backend == "native":
+            keep = difficulty.count_solutions(flat, 2, UNIQUENESS_NODE_LIMIT) == 1
+        else:
+            rows = [list(flat[r * side : (r + 1) * side]) for r in range(side)]
+            keep = uniqueness.is_unique(rows, uniqueness_backend)
+        if not keep:
+            flat[cell] = value
+            continue
+        clues -= 1
+
+        # Checking the tier needs a search: only do it every `side` removals
+        if target != "easy" and target_rank > 0 and k % side == 0:
+            if difficulty.TIERS.index(difficulty.profile(flat)["tier"]) >= target_rank:
+                break
+
+    return flat
+
+
+def generate_sudoku(
+    base=3, target="hard", min_clues=None, rng=random, attempts=5, uniqueness_backend="native"
+):
+    """
+    Generates an N x N puzzle (N = base * base) with a unique solution.
+
+    Clues are removed one by one in random order; a removal is kept only if
+    the puzzle still has exactly one solution (checked with a solution
+    counter that stops at 2). `target` is the difficulty knob (one of
+    difficulty.TIERS):
+    - "easy": only removals that keep the puzzle solvable by naked/hidden
+      singles alone are kept (which also guarantees uniqueness),
+    - harder tiers: removal continues while the puzzle stays unique and
+      stops once the profile reaches the target tier. If the tier is not
+      reached, up to `attempts` boards are tried and the hardest is kept.
+    `min_clues` stops removal early (defaults to 0, i.e. as sparse as possible).
+    `uniqueness_backend` selects the solution counter (see uniqueness.COUNTERS).
+    """
+    if target not in difficulty.TIERS:
+        raise ValueError(f"Unknown difficulty '{target}', expected one of {difficulty.TIERS}")
+    side = base * base
+    target_rank = difficulty.TIERS.index(target)
 
+    best, best_rank = None, -1
+    for _ in range(attempts if target_rank > 0 else 1):
+        flat = _carve(base, target, min_clues, rng, uniqueness_backend)
+        rank = difficulty.TIERS.index(difficulty.profile(flat)["tier"]) if target_rank > 0 else 0
+        if rank > best_rank:
+            best, best_rank = flat, rank
+        if rank >= target_rank:
+            break
 
-def save_sudokus(count=5, directory="solvers/16x16"):
-    if not os.path.exists(directory):
-        os.makedirs(directory)
+    return [list(best[r * side : (r + 1) * side]) for r in range(side)]
 
-    for i in range(1, count + 1):
-        filename = f"in{str(i).zfill(2)}.txt"
-        filepath = os.path.join(directory, filename)
 
-        board = generate_sudoku_16x16()
+def generate_sudoku_16x16():
+    return generate_sudoku(base=4)
 
-        with open(filepath, "w") as f:
-            for row in board:
-                line = " ".join(map(str, row))
-                f.write(line + "\n")
 
-    print(f"{count} Sudoku puzzles saved in '{directory}' directory.")
+def _generate_task(args):
+    base, target, min_clues, seed, uniqueness_backend = args
+    return generate_sudoku(
+        base, target, min_clues, random.Random(seed), uniqueness_backend=uniqueness_backend
+    )
+
+
+def generate_many(
+    count, base=3, target="hard", min_clues=None, workers=None, seed=None, uniqueness_backend="native"
+):
+    """
+    Lazily yields `count` puzzles, generated in parallel on a process pool.
+    Every puzzle gets its own seed, so a given `seed` reproduces the corpus.
+    """
+    seeder = random.Random(seed)
+    tasks = (
+        (base, target, min_clues, seeder.getrandbits(64), uniqueness_backend)
+        for _ in range(count)
+    )
+    if workers == 1:
+        yield from map(_generate_task, tasks)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(_generate_task, tasks, chunksize=max(1, min(64, count // 64)))
+
+
+def save_sudokus(
+    count=5,
+    directory=None,
+    base=4,
+    target="hard",
+    min_clues=None,
+    workers=None,
+    seed=None,
+    uniqueness_backend="native",
+):
+    """
+    Generates `count` puzzles and streams them to disk as they are produced:
+    - into a packed dataset if `directory` ends with `.sdkp`,
+    - otherwise as `inNN.txt` files (default `sudokus/<N>x<N>`).
+    """
+    side = base * base
+    if directory is None:
+        directory = os.path.join("sudokus", f"{side}x{side}")
+    puzzles = generate_many(count, base, target, min_clues, workers, seed, uniqueness_backend)
+
+    if directory.endswith(dataset.EXTENSION):
+        parent = os.path.dirname(directory)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        with dataset.PackedWriter(directory, side) as writer:
+            for board in puzzles:
+                writer.write(board)
+    else:
+        os.makedirs(directory, exist_ok=True)
+        width = max(2, len(str(count)))
+        for i, board in enumerate(puzzles, 1):
+            filename = f"in{str(i).zfill(width)}.txt"
+            filepath = os.path.join(directory, filename)
+            with open(filepath, "w") as f:
+                for row in board:
+                    line = " ".join(map(str, row))
+                    f.write(line + "\n")
+
+    print(f"{count} Sudoku puzzles saved in '{directory}'.")
 
 
 if __name__ == "__main__":
-    save_sudokus(count=5, directory="sudokus/25x25")
+    parser = argparse.ArgumentParser(description="Generate Sudoku puzzles with a unique solution")
+    parser.add_argument("--base", type=int, default=4, help="Box size (N = base * base)")
+    parser.add_argument("--count", type=int, default=5)
+    parser.add_argument("--out", default=None, help="Output directory or .sdkp file")
+    parser.add_argument("--difficulty", default="hard", choices=difficulty.TIERS)
+    parser.add_argument("--min-clues", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument(
+        "--uniqueness-backend", default="native", choices=list(uniqueness.COUNTERS)
+    )
+    args = parser.parse_args()
+    save_sudokus(
+        args.count,
+        args.out,
+        args.base,
+        args.difficulty,
+        args.min_clues,
+        args.workers,
+        args.seed,
+        args.uniqueness_backend,
+    )
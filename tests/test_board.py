@@ -0,0 +1,59 @@
+import copy
+
+import numpy as np
+
+import board
+
+
+def _grid():
+    return board.Grid(bytes(range(1, 10)) * 9, 9)
+
+
+def test_reads_do_not_copy_the_buffer():
+    flat = bytes(range(1, 10)) * 9
+    g = board.Grid(flat, 9)
+    assert [g[r][c] for r in range(9) for c in range(9)] == list(flat)
+    assert list(g[-1]) == list(range(1, 10))
+    assert g._cells is flat
+
+
+def test_row_access_keeps_no_row_objects():
+    g = board.Grid(bytes(625), 25)
+    size = g.nbytes()
+    assert sum(g[r][c] for r in range(25) for c in range(25)) == 0
+    assert g.nbytes() == size
+
+
+def test_first_write_copies():
+    flat = bytes(81)
+    g = board.Grid(flat, 9)
+    g[2][3] = 7
+    assert g[2, 3] == 7
+    assert flat == bytes(81)
+
+
+def test_clone_isolation_with_rows_held():
+    g = _grid()
+    row = g[0]
+    h = g.clone()
+    row[1] = 7
+    assert g[0, 1] == 7
+    assert h[0, 1] == 2
+    h[0][0] = 9
+    assert g[0, 0] == 1
+
+
+def test_clone_isolation_with_writable_view_held():
+    g = _grid()
+    view = g.array(writable=True)
+    h = copy.copy(g)
+    view[0, 1] = 7
+    assert g[0, 1] == 7
+    assert h[0, 1] == 2
+
+
+def test_numpy_interop():
+    g = _grid()
+    assert np.array_equal(np.asarray(g), np.tile(np.arange(1, 10, dtype=np.uint8), (9, 1)))
+    assert g.box(4).shape == (3, 3)
+    assert board.as_rows(g) == [list(range(1, 10))] * 9
@@ -0,0 +1,54 @@
+import os
+
+import pytest
+
+import dataset
+import difficulty
+import geometry
+import main
+import presolve
+
+FIXTURES = os.path.join("sudokus", "9x9")
+
+
+def _flat(name):
+    return dataset.flatten(main.read_sudoku(os.path.join(FIXTURES, name)))
+
+
+def test_propagate_singles_prunes_preset_singles():
+    # A branch decision (a cell set to one value before the call) must be
+    # removed from its peers
+    geo = geometry.get(9)
+    cands = [(1 << 9) - 1] * 81
+    cands[0] = 1
+    assert presolve.propagate_singles(cands, geo.units, geo.peers)
+    assert all(not cands[p] & 1 for p in geo.peers[0])
+
+
+@pytest.mark.parametrize("name", ["in03.txt", "in13.txt", "in15.txt", "in30.txt", "in45.txt"])
+def test_singles_only_puzzles_are_easy(name):
+    p = difficulty.profile(_flat(name))
+    assert p["singles_ratio"] == 1.0
+    assert p["nodes"] == 1
+    assert p["tier"] == "easy"
+
+
+@pytest.mark.parametrize("name, nodes", [("in43.txt", 2), ("in10.txt", 7), ("in49.txt", 3)])
+def test_search_nodes(name, nodes):
+    p = difficulty.profile(_flat(name))
+    assert p["nodes"] == nodes
+    assert p["tier"] == "medium"
+
+
+def test_clashing_clues_are_invalid():
+    flat = bytearray(_flat("in01.txt"))
+    empty = [cell for cell, v in enumerate(flat) if not v]
+    row = empty[0] // 9
+    value = next(v for v in flat[row * 9 : row * 9 + 9] if v)
+    flat[empty[0]] = value
+    assert difficulty.profile(bytes(flat))["tier"] == difficulty.INVALID
+
+
+def test_count_solutions_settles_quickly():
+    flat = _flat("in01.txt")
+    assert difficulty.count_solutions(flat, 2, node_limit=1000) == 1
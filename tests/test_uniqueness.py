@@ -0,0 +1,26 @@
+import os
+
+import main
+import uniqueness
+
+
+def _grid(name="in01.txt"):
+    return main.read_sudoku(os.path.join("sudokus", "9x9", name))
+
+
+def _without_clues(grid, count):
+    grid = [list(row) for row in grid]
+    cells = [(r, c) for r, row in enumerate(grid) for c, v in enumerate(row) if v][:count]
+    for r, c in cells:
+        grid[r][c] = 0
+    return grid
+
+
+def test_native_counter_settles_multi_solution_puzzle():
+    assert uniqueness.count_solutions(_without_clues(_grid(), 12), 5, "native", node_limit=10_000) == 5
+
+
+def test_backtracking_counter_stops_at_budget():
+    empty = [[0] * 9 for _ in range(9)]
+    assert uniqueness.count_solutions(empty, 2, "backtracking", node_limit=50) is None
+    assert uniqueness.count_solutions(_grid(), 2, "backtracking") == 1
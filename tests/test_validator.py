@@ -0,0 +1,46 @@
+import random
+
+import numpy as np
+
+import main
+import validator
+
+
+def _solved(n):
+    m = int(n**0.5)
+    return [[(m * (r % m) + r // m + c) % n + 1 for c in range(n)] for r in range(n)]
+
+
+def _variants(n, rng):
+    """A valid board and corrupted copies (swaps, zeros, out-of-range values)."""
+    board = _solved(n)
+    yield board
+    for _ in range(20):
+        bad = [list(row) for row in board]
+        r, c, r2, c2 = (rng.randrange(n) for _ in range(4))
+        kind = rng.randrange(3)
+        if kind == 0:
+            bad[r][c], bad[r2][c2] = bad[r2][c2], bad[r][c]
+        elif kind == 1:
+            bad[r][c] = 0
+        else:
+            bad[r][c] = n + 1
+        yield bad
+
+
+def test_batch_validator_matches_reference():
+    rng = random.Random(7)
+    for n in (4, 9, 16, 25):
+        boards = list(_variants(n, rng))
+        expected = [main.check_filled(b) and main.check_correct(b) for b in boards]
+        assert list(validator.validate_batch(np.array(boards))) == expected
+        assert expected[0]
+
+
+def test_clues_must_be_kept():
+    board = _solved(9)
+    puzzle = bytearray(81)
+    puzzle[0] = board[0][0]
+    assert validator.validate_solution(board, bytes(puzzle))
+    puzzle[0] = board[0][0] % 9 + 1
+    assert not validator.validate_solution(board, bytes(puzzle))
@@ -0,0 +1,140 @@
+"""
+Scaling efficiency of each backend under the thread/process execution modes.
+
+Every backend solves the same puzzles with 1, 2, 4, 8 and 16 workers, in
+its execution mode (pipeline.execution_mode: threads for the GIL-releasing
+backends, processes for the GIL-bound ones). For k workers:
+
+    speedup(k)    = wall(1) / wall(k)
+    efficiency(k) = speedup(k) / k
+
+An efficiency close to 1 means the backend scales linearly; GIL-bound code
+forced onto threads stays near 1/k. `probe_gil` checks a RELEASES_GIL
+declaration empirically: a pure Python ticker thread keeps its full rate
+while a GIL-releasing solve runs on another core, and about half of it
+against GIL-bound code.
+
+    python thread_scaling.py sudokus/16x16 --solvers "Google OR-Tools,PySAT (Glucose4)"
+"""
+
+import argparse
+import itertools
+import os
+import threading
+import time
+
+import pipeline
+import solver_registry
+
+THREAD_COUNTS = (1, 2, 4, 8, 16)
+
+
+def probe_gil(module, grids, interval=0.2):
+    """
+    Ratio of a Python ticker thread's rate while `module` solves `grids`
+    to its idle rate (about 1.0: GIL released, about 0.5: GIL held).
+    Returns None on a single core, where the two cannot be told apart.
+    """
+    if (os.cpu_count() or 1) < 2:
+        return None
+
+    def ticker_rate(work):
+        stop = threading.Event()
+        ticks = [0]
+
+        def tick():
+            while not stop.is_set():
+                ticks[0] += 1
+
+        thread = threading.Thread(target=tick, daemon=True)
+        thread.start()
+        start_time = time.perf_counter()
+        work()
+        elapsed = time.perf_counter() - start_time
+        stop.set()
+        thread.join()
+        return ticks[0] / elapsed
+
+    idle = ticker_rate(lambda: time.sleep(interval))
+    busy = ticker_rate(lambda: [module.solve([list(row) for row in grid]) for grid in grids])
+    return busy / idle if idle else None
+
+
+def _run(module, puzzles, workers, mode):
+    executor = pipeline.make_executor(module, workers, mode)
+    try:
+        # Start every worker before timing
+        executor.warm_up()
+        start_time = time.perf_counter()
+        futures = [executor.submit(n, flat) for _, n, flat in puzzles]
+        solved = sum(1 for f in futures if f.result()[0])
+        return time.perf_counter() - start_time, solved
+    finally:
+        executor.shutdown()
+
+
+def scaling_efficiency(source, solvers, thread_counts=THREAD_COUNTS, limit=32, mode=None):
+    """
+    Times every solver on the first `limit` puzzles of `source` for each
+    worker count. `mode` forces "thread" or "process" for all solvers
+    (default: each solver's execution mode).
+    Returns {name: {"mode", "walls": {k: seconds}, "solved": {k: count}}}.
+    """
+    puzzles = list(itertools.islice(pipeline.iter_puzzles(source), limit))
+    report = {}
+    for name, module in solvers:
+        solver_mode = mode or pipeline.execution_mode(module)
+        entry = report[name] = {"mode": solver_mode, "walls": {}, "solved": {}}
+        for k in thread_counts:
+            wall, solved = _run(module, puzzles, k, solver_mode)
+            entry["walls"][k] = wall
+            entry["solved"][k] = solved
+    return report
+
+
+def print_scaling_table(report, thread_counts=THREAD_COUNTS):
+    width = 30 + 16 * len(thread_counts)
+    print("\n" + "=" * width)
+    header = f"{'SOLVER':<20} | {'MODE':<7}"
+    for k in thread_counts:
+        header += f" | {f'{k} WORKERS':<13}"
+    print(header)
+    print("=" * width)
+    for name, entry in report.items():
+        walls = entry["walls"]
+        base = walls.get(thread_counts[0])
+        line = f"{name:<20} | {entry['mode']:<7}"
+        for k in thread_counts:
+            if k not in walls or not walls[k] or not base:
+                line += f" | {'-':<13}"
+                continue
+            speedup = base / walls[k] * thread_counts[0]
+            line += f" | {f'{speedup / k:.0%} (x{speedup:.1f})':<13}"
+        print(line)
+    print("=" * width)
+    print("Efficiency = speedup / workers (speedup in parentheses)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Thread/process scaling efficiency per backend")
+    parser.add_argument("source", nargs="?", default=os.path.join("sudokus", "9x9"))
+    parser.add_argument("--solvers", default="Google OR-Tools,PySAT (Glucose4),Naive Backtracking")
+    parser.add_argument("--threads", default=",".join(map(str, THREAD_COUNTS)))
+    parser.add_argument("--limit", type=int, default=32, help="Puzzles per run")
+    parser.add_argument("--mode", choices=["thread", "process"], default=None)
+    parser.add_argument("--probe", action="store_true", help="Check RELEASES_GIL empirically")
+    args = parser.parse_args()
+
+    solvers = solver_registry.load_solvers(args.solvers.split(","))
+    counts = tuple(int(k) for k in args.threads.split(","))
+    if args.probe:
+        grids = [
+            pipeline.to_grid(flat, n)
+            for _, n, flat in itertools.islice(pipeline.iter_puzzles(args.source), 3)
+        ]
+        for name, module in solvers:
+            ratio = probe_gil(module, grids)
+            declared = getattr(module, "RELEASES_GIL", False)
+            measured = "n/a (single core)" if ratio is None else f"{ratio:.2f}"
+            print(f"{name:<20} | declared RELEASES_GIL={declared!s:<5} | ticker ratio {measured}")
+    print_scaling_table(scaling_efficiency(args.source, solvers, counts, args.limit, args.mode), counts)
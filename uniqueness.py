@@ -0,0 +1,116 @@
+"""
+Solution counting and uniqueness checks across the solver backends.
+
+Every backend exposes `count_solutions(grid, limit)`, which stops as soon as
+`limit` solutions are found, so `count_solutions(grid, 2) == 1` is a
+uniqueness check:
+- "native": candidate bitmasks with singles propagation (difficulty.py),
+- "backtracking": the naive backtracking search with early exit,
+- "cp-sat": OR-Tools CP-SAT with a solution callback,
+- "pysat": PySAT (Glucose4) with blocking clauses,
+- "z3": Z3 with blocking clauses.
+"""
+
+import importlib
+import os
+import statistics
+import sys
+import time
+
+from tqdm import tqdm
+
+import pipeline
+
+# Backend name -> module path (imported lazily)
+COUNTERS = {
+    "native": "difficulty",
+    "backtracking": "solvers.naive_backtracking",
+    "cp-sat": "solvers.googleORTools_solver",
+    "pysat": "solvers.pysat_solver",
+    "z3": "solvers.z3_solver",
+}
+
+# Search budget of the pure Python counters: past it the count is reported
+# as unsettled instead of running for minutes on multi-solution puzzles
+NODE_LIMIT = 200_000
+BUDGETED = {"native", "backtracking"}
+
+
+def _counter(backend, node_limit=NODE_LIMIT):
+    if backend not in COUNTERS:
+        raise ValueError(f"Unknown backend '{backend}', expected one of {list(COUNTERS)}")
+    count_fn = importlib.import_module(COUNTERS[backend]).count_solutions
+    if backend in BUDGETED:
+        return lambda grid, limit: count_fn(grid, limit, node_limit)
+    return count_fn
+
+
+def count_solutions(grid, limit=2, backend="native", node_limit=NODE_LIMIT):
+    """
+    Number of solutions of `grid`, capped at `limit`. The pure Python
+    backends return None once `node_limit` search nodes are spent.
+    """
+    return _counter(backend, node_limit)([list(row) for row in grid], limit)
+
+
+def is_unique(grid, backend="native"):
+    return count_solutions(grid, 2, backend) == 1
+
+
+def benchmark_uniqueness(source, backends=None, limit=2):
+    """
+    Times the uniqueness check alone for every backend on every puzzle of
+    `source` (directory, packed dataset or one-line text file).
+    Returns {backend: {"times": [...], "counts": {...}, "errors": int}}.
+    """
+    counters = {}
+    for backend in backends or list(COUNTERS):
+        try:
+            counters[backend] = _counter(backend)
+        except ImportError as e:
+            print(f"Skipping backend '{backend}': {e}", file=sys.stderr)
+
+    stats = {b: {"times": [], "counts": {}, "errors": 0} for b in counters}
+    for _, n, flat in tqdm(pipeline.iter_puzzles(source), desc="Counting solutions"):
+        for backend, count_fn in counters.items():
+            grid = pipeline.to_grid(flat, n)
+            start_time = time.perf_counter()
+            try:
+                count = count_fn(grid, limit)
+            except Exception:
+                stats[backend]["errors"] += 1
+                continue
+            stats[backend]["times"].append(time.perf_counter() - start_time)
+            if count is None:
+                label = "unsettled"
+            else:
+                label = f">={limit}" if count >= limit else str(count)
+            stats[backend]["counts"][label] = stats[backend]["counts"].get(label, 0) + 1
+    return stats
+
+
+def print_uniqueness_table(stats):
+    print("\n" + "=" * 85)
+    print(
+        f"{'RANK':<5} | {'BACKEND':<14} | {'CHECKED':<8} | {'AVG TIME (s)':<12} | {'MAX (s)':<8} | {'SOLUTIONS':<20}"
+    )
+    print("=" * 85)
+    ranking = sorted(
+        stats.items(),
+        key=lambda item: statistics.mean(item[1]["times"]) if item[1]["times"] else float("inf"),
+    )
+    for rank, (backend, data) in enumerate(ranking, 1):
+        times = data["times"]
+        avg_str = f"{statistics.mean(times):.4f}" if times else "-"
+        max_str = f"{max(times):.4f}" if times else "-"
+        counts = ", ".join(f"{k}: {v}" for k, v in sorted(data["counts"].items()))
+        print(
+            f"{rank:<5} | {backend:<14} | {len(times):<8} | {avg_str:<12} | {max_str:<8} | {counts:<20}"
+        )
+    print("=" * 85)
+
+
+if __name__ == "__main__":
+    source = sys.argv[1] if len(sys.argv) > 1 else os.path.join("sudokus", "9x9")
+    backends = sys.argv[2].split(",") if len(sys.argv) > 2 else ["native", "cp-sat", "pysat", "z3"]
+    print_uniqueness_table(benchmark_uniqueness(source, backends))
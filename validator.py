@@ -0,0 +1,112 @@
+"""
+Vectorized Sudoku solution validator.
+
+A batch of B solved boards of side N is checked at once as a (B, N, N)
+array. Each row, column and box is reduced to a bitmask of the values it
+contains (bit v set for value v). A unit of N cells is a permutation of
+1..N exactly when its bitmask has the N bits 1..N set, so duplicates,
+zeros and out-of-range values are all caught by a single comparison.
+All 3N units are gathered in one step through the shared unit index table
+(geometry.py).
+"""
+
+import math
+
+import numpy as np
+
+import geometry
+
+# Widest N whose value bitmask fits in an unsigned 64-bit integer (bits 1..N)
+_MAX_BITMASK_N = 63
+
+
+def _as_batch(boards):
+    """Returns `boards` as a (B, N, N) integer array (accepts a single board)."""
+    arr = np.asarray(boards)
+    if arr.ndim == 2:
+        arr = arr[np.newaxis]
+    if arr.ndim != 3 or arr.shape[1] != arr.shape[2]:
+        raise ValueError(f"Expected boards of shape (B, N, N), got {arr.shape}")
+    return arr
+
+
+def unit_view(batch):
+    """Gathers a (B, N, N) batch into (B, 3N, N): rows, then columns, then boxes."""
+    b, n, _ = batch.shape
+    return batch.reshape(b, n * n)[:, geometry.get(n).units_array]
+
+
+def _units_valid_bitmask(units, n):
+    """units: (B, U, N) -> (B,) True where every unit is a permutation of 1..N."""
+    # Out-of-range values map to bit 0, which is never part of the full mask
+    vals = np.where((units >= 1) & (units <= n), units, 0).astype(np.uint64)
+    masks = np.bitwise_or.reduce(np.left_shift(np.uint64(1), vals), axis=2)
+    full = np.uint64(((1 << n) - 1) << 1)
+    return np.all(masks == full, axis=1)
+
+
+def _units_valid_sort(units, n):
+    """Fallback for N > 63: sort every unit and compare against 1..N."""
+    expected = np.arange(1, n + 1, dtype=units.dtype)
+    return np.all(np.sort(units, axis=2) == expected, axis=(1, 2))
+
+
+def validate_batch(solutions, puzzles=None):
+    """
+    Validates a batch of solved boards.
+
+    solutions: array-like of shape (B, N, N) (or a single (N, N) board).
+    puzzles: optional array-like of the same shape with the original clues
+             (0 = empty). When given, every clue must be kept in the solution.
+
+    Returns a boolean array of shape (B,).
+    """
+    sol = _as_batch(solutions)
+    b, n, _ = sol.shape
+    m = math.isqrt(n)
+    if m * m != n:
+        return np.zeros(b, dtype=bool)
+
+    check = _units_valid_bitmask if n <= _MAX_BITMASK_N else _units_valid_sort
+    ok = check(unit_view(sol), n)
+
+    if puzzles is not None:
+        clues = _as_batch(puzzles)
+        if clues.shape[1:] != sol.shape[1:]:
+            return np.zeros(b, dtype=bool)
+        ok &= np.all((clues == 0) | (clues == sol), axis=(1, 2))
+    return ok
+
+
+def validate_solution(grid, puzzle=None):
+    """
+    Validates a single solution (list of lists or array).
+    `puzzle` optionally holds the original clues, either as an N x N grid or
+    as a flat sequence/buffer of N*N cells.
+    """
+    if not grid:
+        return False
+    try:
+        sol = np.asarray(grid, dtype=np.int64)
+    except (ValueError, TypeError):
+        # Ragged rows or non-numeric cells
+        return False
+    if sol.ndim != 2 or sol.shape[0] != sol.shape[1]:
+        return False
+    clues = None
+    if puzzle is not None:
+        clues = _flat_to_board(puzzle, sol.shape[0])
+        if clues is None:
+            return False
+    return bool(validate_batch(sol, clues)[0])
+
+
+def _flat_to_board(puzzle, n):
+    if isinstance(puzzle, (bytes, bytearray, memoryview)):
+        arr = np.frombuffer(puzzle, dtype=np.uint8)
+    else:
+        arr = np.asarray(puzzle)
+    if arr.size != n * n:
+        return None
+    return arr.reshape(n, n)
+